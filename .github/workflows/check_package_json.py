@@ -6,6 +6,8 @@ import sys
 from pathlib import Path
 
 GITHUB_PREFIX = "github:leaphy-robotics/leaphy-micropython/leaphymicropython"
+MPY_GITHUB_PREFIX = "github:leaphy-robotics/leaphy-micropython/dist/mpy/"
+MPY_OUTPUT = Path("dist/mpy")
 
 
 def check_package_json() -> bool:
@@ -34,6 +36,49 @@ def check_package_json() -> bool:
     return True
 
 
+def check_mpy_package_json() -> bool:
+    """Validate that package-mpy.json lists the .mpy file of every module in package.json"""
+    with open("package.json", "r", encoding="utf8") as package_file:
+        package = json.load(package_file)
+    with open("package-mpy.json", "r", encoding="utf8") as package_file:
+        mpy_package = json.load(package_file)
+
+    expected = [
+        url[0][: -len(".py")] + ".mpy" if url[0].endswith(".py") else url[0]
+        for url in package["urls"]
+    ]
+    targets = [url[0] for url in mpy_package["urls"]]
+    if targets != expected:
+        for target in set(expected) - set(targets):
+            print(f"File is missing in package-mpy.json: ❌ {target}")
+        for target in set(targets) - set(expected):
+            print(f"File is not in package.json: ❌ {target}")
+        if set(targets) == set(expected):
+            print("Files are in a different order than package.json: ❌")
+        print("Run tools/build_mpy.py --manifest-only to update package-mpy.json")
+        return False
+    if (
+        mpy_package["version"] != package["version"]
+        or mpy_package["deps"] != package["deps"]
+    ):
+        print("Version or deps differ from package.json: ❌")
+        return False
+
+    for target, url in mpy_package["urls"]:
+        if url != MPY_GITHUB_PREFIX + target:
+            print(f"Package Source {url}: ❌ should be {MPY_GITHUB_PREFIX + target}")
+            return False
+        # The .mpy files only exist after tools/build_mpy.py
+        if MPY_OUTPUT.exists() and not (MPY_OUTPUT / target).exists():
+            print(f"Compiled file {MPY_OUTPUT / target}: ❌ does not exist!")
+            return False
+        print(f"Compiled package URL {target}: 🍰")
+
+    return True
+
+
 if __name__ == "__main__":
     if not check_package_json():
         sys.exit(1)
+    if not check_mpy_package_json():
+        sys.exit(1)
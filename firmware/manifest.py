@@ -0,0 +1,59 @@
+# pylint: disable=undefined-variable
+"""
+Freezes leaphymicropython into a MicroPython firmware.
+
+Frozen modules are compiled when the firmware is built and run from flash,
+so importing them takes almost no RAM. Include this manifest from the
+manifest of a firmware build, like the rp2_*.py manifests next to it:
+
+    include("path/to/leaphy-micropython/firmware/manifest.py", subset="sensors")
+
+The subset selects the modules:
+    all:      every module in package.json
+    sensors:  the sensors and the helpers they need
+    displays: the OLED screens and the helpers they need
+"""
+
+import json
+
+options.defaults(subset="all")
+
+# Helpers that every subset needs
+COMMON = (
+    "leaphymicropython/utils/__init__.py",
+    "leaphymicropython/utils/lazy.py",
+    "leaphymicropython/utils/i2c_helper.py",
+    "leaphymicropython/utils/i2c_address_finder.py",
+)
+
+# For every subset: the files, or folders ending in /, that it freezes
+SUBSETS = {
+    "all": ("leaphymicropython/",),
+    "sensors": COMMON
+    + (
+        "leaphymicropython/utils/pins.py",
+        "leaphymicropython/sensors/",
+    ),
+    "displays": COMMON
+    + (
+        "leaphymicropython/actuators/__init__.py",
+        "leaphymicropython/actuators/oled_screen.py",
+        "leaphymicropython/actuators/sh1106.py",
+        "leaphymicropython/actuators/ssd1306.py",
+    ),
+}
+
+if options.subset not in SUBSETS:
+    raise ValueError(
+        f"Unknown subset {options.subset}, use one of {', '.join(SUBSETS)}"
+    )
+
+# The manifest is run from its own folder
+with open("../package.json", encoding="utf8") as package_file:
+    for path, _ in json.load(package_file)["urls"]:
+        for selected in SUBSETS[options.subset]:
+            if path == selected or (
+                selected.endswith("/") and path.startswith(selected)
+            ):
+                module(path, base_path="..")
+                break
@@ -0,0 +1,11 @@
+# pylint: disable=undefined-variable
+"""
+Firmware for the Raspberry Pi Pico W and Arduino Nano RP2040 Connect with
+all of leaphymicropython frozen in. Build it from the rp2 port of MicroPython:
+
+    make -C ports/rp2 BOARD=RPI_PICO_W FROZEN_MANIFEST=path/to/leaphy-micropython/firmware/rp2_all.py
+"""
+
+# The default manifest of the board, with networking and Bluetooth
+include("$(BOARD_DIR)/manifest.py")
+include("manifest.py", subset="all")
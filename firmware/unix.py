@@ -0,0 +1,11 @@
+# pylint: disable=undefined-variable
+"""
+MicroPython unix port with all of leaphymicropython frozen in, to measure the
+RAM that freezing saves on a computer:
+
+    make -C ports/unix BUILD=build-leaphy FROZEN_MANIFEST=path/to/leaphy-micropython/firmware/unix.py
+    ports/unix/build-leaphy/micropython tools/import_benchmark.py --compare
+"""
+
+include("$(PORT_DIR)/variants/standard/manifest.py")
+include("manifest.py", subset="all")
@@ -0,0 +1,31 @@
+"""
+The actuators (motors, lights, sound and screens) of leaphymicropython.
+
+The classes and functions can be imported from this package directly, for
+example ``from leaphymicropython.actuators import DCMotors``. A module is only
+imported (and compiled) the first time one of its names is used, so drivers
+that are not used take no RAM.
+"""
+
+from leaphymicropython.utils.lazy import lazy_getattr
+
+# For every name: the module that defines it
+_LAZY_NAMES = {
+    "Buzzer": "buzzer",
+    "set_buzzer": "buzzer",
+    "DCMotor": "dcmotor",
+    "DCMotors": "dcmotor",
+    "ClosedLoopDrive": "drive",
+    "Odometry": "drive",
+    "SpeedController": "drive",
+    "LEDStrip": "ledstrip",
+    "OLEDSH1106": "oled_screen",
+    "RGBLed": "rgbled",
+    "Servo": "servo",
+    "ServoGroup": "servo",
+    "set_servo_angle": "servo",
+    "SH1106_I2C": "sh1106",
+    "SSD1306I2C": "ssd1306",
+}
+
+__getattr__ = lazy_getattr(__name__, _LAZY_NAMES, globals())
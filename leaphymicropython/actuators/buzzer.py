@@ -1,4 +1,257 @@
-from leaphymicropython.utils.pins import set_pwm
+from machine import Pin, PWM, Timer
+
+buzzer_instances = {}
+
+# Frequencies in Hz of the notes in octave 4, an octave higher doubles the frequency
+_NOTE_FREQUENCIES = {
+    "c": 261.63,
+    "c#": 277.18,
+    "d": 293.66,
+    "d#": 311.13,
+    "e": 329.63,
+    "f": 349.23,
+    "f#": 369.99,
+    "g": 392.0,
+    "g#": 415.3,
+    "a": 440.0,
+    "a#": 466.16,
+    "b": 493.88,
+}
+
+# The PWM of the rp2 can not go below 8 Hz
+MIN_FREQ = 8
+MAX_FREQ = 20_000
+# The gap between two notes takes at most this part of a note
+_MAX_GAP_DIVISOR = 4
+
+
+def _validate_freq(freq: int):
+    """
+    Validates a buzzer frequency
+    :param freq: int, the frequency, 0 is silence
+    """
+    if freq != 0 and not MIN_FREQ <= freq <= MAX_FREQ:
+        raise ValueError(
+            f"Buzzer frequencies must be 0 or up to and including {MIN_FREQ} and {MAX_FREQ}, "
+            f"your freq is {freq}"
+        )
+
+
+def note_frequency(note: str, octave: int = 4) -> int:
+    """
+    Gives the frequency of a note
+    :param note: str, the note, for example "c", "f#" or "p" for a pause
+    :param octave: int, the octave of the note, the a in octave 4 is 440 Hz
+    :return: int, the frequency in Hz, 0 for a pause
+    """
+    note = note.lower()
+    if note == "p":
+        return 0
+    if note not in _NOTE_FREQUENCIES:
+        raise ValueError(f"Unknown note {note}")
+    return int(_NOTE_FREQUENCIES[note] * 2 ** (octave - 4) + 0.5)
+
+
+def parse_rtttl(song: str):
+    """
+    Converts an RTTTL ringtone to a list of notes
+    :param song: str, the ringtone, for example "beep:d=4,o=5,b=120:c,8e,8g,2c6"
+    :return: list[tuple[int, int]], the frequency in Hz and duration in ms of every note
+    """
+    parts = song.split(":")
+    if len(parts) != 3:
+        raise ValueError("An RTTTL song has the form name:defaults:notes")
+    defaults = {"d": 4, "o": 6, "b": 63}
+    for setting in parts[1].split(","):
+        setting = setting.strip()
+        if setting:
+            key, value = setting.split("=")
+            defaults[key.strip().lower()] = int(value)
+    whole_note_ms = 4 * 60_000 // defaults["b"]
+
+    return [
+        _parse_rtttl_note(token.strip().lower(), defaults, whole_note_ms)
+        for token in parts[2].split(",")
+        if token.strip()
+    ]
+
+
+def _parse_rtttl_note(token: str, defaults: dict, whole_note_ms: int):
+    """
+    Converts one note of an RTTTL ringtone
+    :param token: str, the note, for example "8c#6."
+    :param defaults: dict, the default duration (d) and octave (o)
+    :param whole_note_ms: int, the duration of a whole note in ms
+    :return: tuple[int, int], the frequency in Hz and duration in ms
+    """
+    index = 0
+    while index < len(token) and token[index].isdigit():
+        index += 1
+    duration = int(token[:index]) if index else defaults["d"]
+    note = token[index]
+    index += 1
+    if index < len(token) and token[index] == "#":
+        note += "#"
+        index += 1
+    dotted = False
+    octave = defaults["o"]
+    for char in token[index:]:
+        if char == ".":
+            dotted = True
+        elif char.isdigit():
+            octave = int(char)
+    duration_ms = whole_note_ms // duration
+    if dotted:
+        duration_ms += duration_ms // 2
+    return note_frequency(note, octave), duration_ms
+
+
+# pylint: disable=too-many-instance-attributes
+class Buzzer:
+    """
+    A class to play tones and melodies on a passive buzzer
+
+    The buzzer holds one PWM channel. Melodies are played by a timer in the
+    background, so the program keeps running while the buzzer sounds.
+    """
+
+    def __init__(self, pin: str, volume: int = 255, gap_ms: int = 10):
+        """
+        Creates a buzzer
+        :param pin: str, the pin of the buzzer
+        :param volume: int, the volume, from 0 to 255
+        :param gap_ms: int, the silence in milliseconds at the end of every note in a melody
+        """
+        self.pwm = PWM(Pin(pin))
+        self.pwm.duty_u16(0)
+        self.gap_ms = gap_ms
+        self.volume = 0
+        self.set_volume(volume)
+        self.playing = False
+        self._freq = None
+        self._duty = 0
+        self._notes = ()
+        self._note_index = 0
+        self._repeat = False
+        self._gap_ms = 0
+        self._timer = None
+
+    def set_volume(self, volume: int):
+        """
+        Sets the volume of the next tones
+        :param volume: int, the volume, from 0 to 255
+        """
+        if not 0 <= volume <= 255:
+            raise ValueError(
+                f"Volume must be up to and including 0 and 255, your volume is {volume}"
+            )
+        self.volume = volume
+
+    def tone(self, freq: int, duration_ms: int = None):
+        """
+        Plays a tone, replacing the melody that is playing
+        :param freq: int, the frequency in Hz, 0 is silence
+        :param duration_ms: int, the time in milliseconds, None plays until stop is called
+        """
+        _validate_freq(freq)
+        if duration_ms is None:
+            self.stop()
+            # A passive buzzer is loudest at 50% duty cycle
+            self._write(freq, self.volume * 128)
+            return
+        self.play([(freq, duration_ms)])
+
+    def play(self, notes, repeat: bool = False):
+        """
+        Plays a melody in the background, replacing the melody that is playing
+        :param notes: list[tuple[int, int]], the frequency in Hz and duration in ms of every note
+        :param repeat: bool, if True, start again after the last note
+        """
+        for freq, duration_ms in notes:
+            _validate_freq(freq)
+            if duration_ms < 0:
+                raise ValueError(
+                    f"Duration can not be negative, your duration is {duration_ms}"
+                )
+        self.stop()
+        self._notes = notes
+        self._note_index = 0
+        self._repeat = repeat
+        self.playing = True
+        self._next_note(None)
+
+    def play_rtttl(self, song: str, repeat: bool = False):
+        """
+        Plays an RTTTL ringtone in the background
+        :param song: str, the ringtone, for example "beep:d=4,o=5,b=120:c,8e,8g,2c6"
+        :param repeat: bool, if True, start again after the last note
+        """
+        self.play(parse_rtttl(song), repeat)
+
+    def stop(self):
+        """
+        Stops the sound
+        """
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+        self.playing = False
+        self._write(0, 0)
+
+    def set_pwm(self, value: int, freq: int):
+        """
+        Sets the pwm signal of the buzzer directly, replacing the melody that is playing
+        :param value: int, the duty cycle, from 0 to 255
+        :param freq: int, the frequency in Hz, 0 is silence
+        """
+        _validate_freq(freq)
+        if value < 0 or value > 255:
+            raise ValueError("PWM value must be between 0 and 255")
+        self.stop()
+        self._write(freq, value * 257)
+
+    def _write(self, freq: int, duty: int):
+        """
+        Writes the frequency and duty cycle, skipping values that do not change
+        """
+        if freq == 0:
+            duty = 0
+        elif freq != self._freq:
+            self.pwm.freq(freq)
+            self._freq = freq
+        if duty != self._duty:
+            self.pwm.duty_u16(duty)
+            self._duty = duty
+
+    def _schedule(self, period_ms: int, callback):
+        self._timer = Timer(mode=Timer.ONE_SHOT, period=period_ms, callback=callback)
+
+    def _next_note(self, _timer):
+        """
+        Timer callback, starts the next note
+        """
+        if self._note_index >= len(self._notes):
+            if not self._repeat or not self._notes:
+                self._timer = None
+                self.stop()
+                return
+            self._note_index = 0
+        freq, duration_ms = self._notes[self._note_index]
+        self._note_index += 1
+        self._write(freq, self.volume * 128)
+        # A short note keeps most of its time, so every note is heard
+        self._gap_ms = min(self.gap_ms, duration_ms // _MAX_GAP_DIVISOR)
+        if self._gap_ms:
+            self._schedule(duration_ms - self._gap_ms, self._note_gap)
+        else:
+            self._schedule(duration_ms, self._next_note)
+
+    def _note_gap(self, _timer):
+        """
+        Timer callback, silences the buzzer between two notes
+        """
+        self._write(0, 0)
+        self._schedule(self._gap_ms, self._next_note)
 
 
 def set_buzzer(pin: str, value: int, freq: int):
@@ -8,8 +261,8 @@ def set_buzzer(pin: str, value: int, freq: int):
     :param value: int, the value of the buzzer
     :param freq: int, the frequency of the buzzer
     """
-    if freq < 0 or freq > 255:
-        raise ValueError(
-            f"Buzzer values must be up to and including 0 and 255, your freq is {freq}"
-        )
-    set_pwm(pin, value, freq)
+    buzzer = buzzer_instances.get(pin)
+    if buzzer is None:
+        buzzer = Buzzer(pin)
+        buzzer_instances[pin] = buzzer
+    buzzer.set_pwm(value, freq)
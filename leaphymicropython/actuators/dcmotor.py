@@ -2,24 +2,133 @@
 Module for controlling DC motors.
 """
 
-from time import sleep
-from machine import Pin, PWM  # pylint: disable=import-error
+from machine import Pin, PWM, Timer  # pylint: disable=import-error
 
+# duty_u16 value for every speed from 0 to 255
+_DUTY_U16 = tuple((speed * 65535) // 255 for speed in range(256))
 
-class DCMotors:  # pylint: disable=too-few-public-methods
+# Speeds of the motor test, every speed runs for one second
+_TEST_SPEEDS = (255, -255)
+_TEST_STEP_MS = 1000
+
+_STEER_LEFT = 0
+_STEER_RIGHT = 1
+_STEER_FORWARD = 2
+_STEER_BACKWARD = 3
+_STEER_DIRECTIONS = {
+    "left": _STEER_LEFT,
+    "right": _STEER_RIGHT,
+    "forward": _STEER_FORWARD,
+    "backward": _STEER_BACKWARD,
+}
+
+
+def _validate_signed_speed(speed: int):
+    """
+    Validates a signed speed
+    :param speed: int, the speed of the motor, negative for backward
+    """
+    if not -255 <= speed <= 255:
+        raise ValueError(
+            f"Speed must be up to and including -255 and 255, your speed is {speed}"
+        )
+
+
+def _duty_u16(speed) -> int:
+    """
+    Looks up the duty cycle of a speed
+    :param speed: int or float, the speed of the motor, rounded down and clamped to 0..255
+    :return: int, the duty_u16 value of the speed
+    """
+    speed = int(speed)
+    if speed <= 0:
+        return 0
+    return _DUTY_U16[min(speed, 255)]
+
+
+def _approach(current: int, target: int, step: int) -> int:
+    """
+    Moves a value towards a target with a maximum step
+    :param current: int, the current value
+    :param target: int, the value to move to
+    :param step: int, the maximum change
+    :return: int, the new value
+    """
+    if current < target:
+        return min(current + step, target)
+    return max(current - step, target)
+
+
+# pylint: disable=too-many-instance-attributes
+class DCMotors:
     """
     A class to control multiple DC motors
     """
 
+    # pylint: disable=too-many-positional-arguments
     def __init__(
         self,
         dir_pin_motor_a="D2",
         dir_pin_motor_b="D4",
         pwm_pin_motor_a="D3",
         pwm_pin_motor_b="D11",
+        acceleration=None,
+        ramp_period_ms=10,
     ):
+        """
+        Creates the DC motors
+        :param acceleration: int, the maximum change in speed per second, None to disable ramping
+        :param ramp_period_ms: int, the time in milliseconds between two ramping steps
+        """
         self.motor_a = DCMotor(direction_pin=dir_pin_motor_a, pwm_pin=pwm_pin_motor_a)
         self.motor_b = DCMotor(direction_pin=dir_pin_motor_b, pwm_pin=pwm_pin_motor_b)
+        self.speed_left = 0
+        self.speed_right = 0
+        self._target_left = 0
+        self._target_right = 0
+        self._ramp_step = 0
+        self._ramp_period_ms = ramp_period_ms
+        self._ramp_timer = None
+        self._motions = []
+        self._motion_timer = None
+        self.motion_done = True
+        self.degrees_per_second = None
+        self._turn_speed = 255
+        self.set_acceleration(acceleration, ramp_period_ms)
+
+    def set_acceleration(self, acceleration, period_ms=10):
+        """
+        Sets the maximum acceleration of the motors.
+
+        With an acceleration, set_signed and steer return immediately and a timer
+        moves the speed of both motors towards the new speeds in small steps.
+        This prevents current spikes, brownouts and slipping wheels.
+
+        :param acceleration: int, the maximum change in speed per second,
+            for example 510 goes from 0 to full speed in half a second.
+            None disables ramping.
+        :param period_ms: int, the time in milliseconds between two ramping steps
+        """
+        if acceleration is not None and (acceleration <= 0 or period_ms <= 0):
+            raise ValueError("Acceleration and period_ms must be larger than 0")
+        self._ramp_period_ms = period_ms
+        if acceleration is None:
+            self._ramp_step = 0
+            self._cancel_ramp()
+            if not self.ramp_done:
+                self._apply(self._target_left, self._target_right)
+        else:
+            self._ramp_step = max(1, acceleration * period_ms // 1000)
+
+    @property
+    def ramp_done(self) -> bool:
+        """
+        :return: True if both motors run at the last requested speed
+        """
+        return (
+            self.speed_left == self._target_left
+            and self.speed_right == self._target_right
+        )
 
     def steer(self, direction: str, speed: int, steering_intensity: float):
         """
@@ -38,7 +147,8 @@ class DCMotors:  # pylint: disable=too-few-public-methods
         self.motor_b.validate_speed(speed)
         if steering_intensity < 0 or steering_intensity > 1:
             raise ValueError("Steering intensity must be between 0 and 1")
-        if direction not in ["left", "right", "forward", "backward"]:
+        steer = _STEER_DIRECTIONS.get(direction)
+        if steer is None:
             raise ValueError(
                 "Steering direction should be left, right, forward or backward"
             )
@@ -46,40 +156,179 @@ class DCMotors:  # pylint: disable=too-few-public-methods
         speed_left = speed
         speed_right = speed
 
-        if direction == "left":
+        if steer == _STEER_LEFT:
             speed_left = int(speed * (1 - 2 * steering_intensity))
-        elif direction == "right":
+        elif steer == _STEER_RIGHT:
             speed_right = int(speed * (1 - 2 * steering_intensity))
-        elif direction == "forward":
-            # Default values are good
-            pass
-        elif direction == "backward":
+        elif steer == _STEER_BACKWARD:
             speed_left = -speed
             speed_right = -speed
 
-        if speed_left >= 0:
-            self.motor_a.forward(speed_left)
-        else:
-            self.motor_a.backward(-speed_left)
+        self.set_signed(speed_left, speed_right)
 
-        if speed_right >= 0:
-            self.motor_b.forward(speed_right)
-        else:
-            self.motor_b.backward(-speed_right)
+    def set_signed(self, left: int, right: int):
+        """
+        Sets both motors with signed speeds, without the string based steering.
+
+        We're assuming that:
+        - motor_a is the left motor
+        - motor_b is the right motor
+
+        :param left: int, the speed of the left motor, from -255 (backward) to 255 (forward)
+        :param right: int, the speed of the right motor, from -255 (backward) to 255 (forward)
+        """
+        _validate_signed_speed(left)
+        _validate_signed_speed(right)
+        self._target_left = left
+        self._target_right = right
+        if not self._ramp_step:
+            self._apply(left, right)
+        elif self._ramp_timer is None and not self.ramp_done:
+            self._ramp_timer = Timer(
+                mode=Timer.PERIODIC,
+                period=self._ramp_period_ms,
+                callback=self._ramp_tick,
+            )
 
     def stop(self):
         """
-        Stops the DC motors
+        Stops the DC motors immediately, also when ramping is enabled.
+        Queued motions are cancelled.
         """
+        self._cancel_motions()
+        self._cancel_ramp()
+        self._target_left = 0
+        self._target_right = 0
+        self.speed_left = 0
+        self.speed_right = 0
         self.motor_a.stop()
         self.motor_b.stop()
 
+    def _apply(self, left: int, right: int):
+        """
+        Writes signed speeds to both motors
+        """
+        self.motor_a.set_signed(left)
+        self.motor_b.set_signed(right)
+        self.speed_left = left
+        self.speed_right = right
+
+    def _cancel_ramp(self):
+        if self._ramp_timer is not None:
+            self._ramp_timer.deinit()
+            self._ramp_timer = None
+
+    def _ramp_tick(self, _timer):
+        """
+        Timer callback, moves both motors one step towards their target
+        """
+        step = self._ramp_step
+        self._apply(
+            _approach(self.speed_left, self._target_left, step),
+            _approach(self.speed_right, self._target_right, step),
+        )
+        if self.ramp_done:
+            self._cancel_ramp()
+
+    def drive(self, left: int, right: int, duration_ms: int, preempt=False):
+        """
+        Drives for a time in the background, the motors stop when the
+        last queued motion is finished.
+        :param left: int, the speed of the left motor, from -255 (backward) to 255 (forward)
+        :param right: int, the speed of the right motor, from -255 (backward) to 255 (forward)
+        :param duration_ms: int, the time in milliseconds to drive
+        :param preempt: bool, if True, cancel the queued motions and start immediately
+        """
+        _validate_signed_speed(left)
+        _validate_signed_speed(right)
+        if duration_ms < 0:
+            raise ValueError(
+                f"Duration can not be negative, your duration is {duration_ms}"
+            )
+        if preempt:
+            self._cancel_motions()
+        self._motions.append((left, right, duration_ms))
+        self.motion_done = False
+        if self._motion_timer is None:
+            self._next_motion(None)
+
+    def pause(self, duration_ms: int, preempt=False):
+        """
+        Stands still for a time in the background
+        :param duration_ms: int, the time in milliseconds to stand still
+        :param preempt: bool, if True, cancel the queued motions and start immediately
+        """
+        self.drive(0, 0, duration_ms, preempt)
+
+    def calibrate_turn(self, degrees_per_second: float, speed: int = 255):
+        """
+        Sets how fast the robot turns on the spot, this is used by turn
+        :param degrees_per_second: float, the measured turning speed
+        :param speed: int, the motor speed the turning speed was measured with
+        """
+        self.motor_a.validate_speed(speed)
+        if degrees_per_second <= 0 or speed == 0:
+            raise ValueError("Degrees per second and speed must be larger than 0")
+        self.degrees_per_second = degrees_per_second
+        self._turn_speed = speed
+
+    def turn(self, angle: float, speed: int = 255, preempt=False):
+        """
+        Turns on the spot in the background, call calibrate_turn first
+        :param angle: float, the angle in degrees, positive turns left, negative turns right
+        :param speed: int, the speed of the motors
+        :param preempt: bool, if True, cancel the queued motions and start immediately
+        """
+        if self.degrees_per_second is None:
+            raise ValueError("Call calibrate_turn before using turn")
+        self.motor_a.validate_speed(speed)
+        if speed == 0:
+            raise ValueError("Speed must be larger than 0 to turn")
+        rate = self.degrees_per_second * speed / self._turn_speed
+        duration_ms = int(abs(angle) * 1000 / rate)
+        if angle >= 0:
+            self.drive(-speed, speed, duration_ms, preempt)
+        else:
+            self.drive(speed, -speed, duration_ms, preempt)
+
+    async def wait_motion(self, poll_ms: int = 10):
+        """
+        Waits until all queued motions are finished, for use with asyncio
+        :param poll_ms: int, the time in milliseconds between two checks
+        """
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        while not self.motion_done:
+            await asyncio.sleep_ms(poll_ms)  # pylint: disable=no-member
+
+    def _cancel_motions(self):
+        if self._motion_timer is not None:
+            self._motion_timer.deinit()
+            self._motion_timer = None
+        self._motions.clear()
+        self.motion_done = True
+
+    def _next_motion(self, _timer):
+        """
+        Timer callback, starts the next queued motion
+        """
+        if not self._motions:
+            self._motion_timer = None
+            self.set_signed(0, 0)
+            self.motion_done = True
+            return
+        left, right, duration_ms = self._motions.pop(0)
+        self.set_signed(left, right)
+        self._motion_timer = Timer(
+            mode=Timer.ONE_SHOT, period=duration_ms, callback=self._next_motion
+        )
+
     def test(self):
         """
-        Tests the DC motors
+        Tests the DC motors, returns immediately and runs in the background
         """
-        self.motor_a.test()
-        self.motor_b.test()
+        for speed in _TEST_SPEEDS:
+            self.drive(speed, speed, _TEST_STEP_MS)
 
 
 class DCMotor:
@@ -99,6 +348,11 @@ class DCMotor:
         self.direction = Pin(direction_pin, Pin.OUT)
         self.pwm = PWM(pwm_pin)
         self.pwm.freq(freq)
+        # The last values written to the pins, None forces the next write
+        self._direction_value = None
+        self._duty_u16 = None
+        self._test_step = 0
+        self._test_timer = None
 
     def forward(self, speed: int):
         """
@@ -106,9 +360,7 @@ class DCMotor:
         :param speed: int, the speed of the motor
         """
         self.validate_speed(speed)
-        self.direction.value(1)
-        speed_u16 = self.convert_speed_to_duty_u16(speed)
-        self.pwm.duty_u16(speed_u16)
+        self._write(1, _duty_u16(speed))
 
     def backward(self, speed: int):
         """
@@ -116,26 +368,65 @@ class DCMotor:
         :param speed: int, the speed of the motor
         """
         self.validate_speed(speed)
-        self.direction.value(0)
-        speed_u16 = self.convert_speed_to_duty_u16(speed)
-        self.pwm.duty_u16(speed_u16)
+        self._write(0, _duty_u16(speed))
+
+    def set_signed(self, speed: int):
+        """
+        Sets the speed and direction of the DC motor in one call
+        :param speed: int, the speed of the motor, from -255 (backward) to 255 (forward)
+        """
+        if speed >= 0:
+            if speed > 255:
+                self.validate_speed(speed)
+            self._write(1, _duty_u16(speed))
+        else:
+            if speed < -255:
+                self.validate_speed(-speed)
+            self._write(0, _duty_u16(-speed))
 
     def stop(self):
         """
         Stops the DC motor
         """
-        self.pwm.duty_u16(0)
+        if self._duty_u16 != 0:
+            self.pwm.duty_u16(0)
+            self._duty_u16 = 0
+
+    def _write(self, direction_value: int, duty_u16: int):
+        """
+        Writes the direction and duty cycle, skipping the pins that do not change
+        :param direction_value: int, 1 for forward and 0 for backward
+        :param duty_u16: int, the duty cycle of the pwm signal
+        """
+        if direction_value != self._direction_value:
+            self.direction.value(direction_value)
+            self._direction_value = direction_value
+        if duty_u16 != self._duty_u16:
+            self.pwm.duty_u16(duty_u16)
+            self._duty_u16 = duty_u16
 
     def test(self):
         """
-        Tests the DC motor
+        Tests the DC motor, returns immediately and runs in the background
+        """
+        if self._test_timer is not None:
+            self._test_timer.deinit()
+        self._test_step = 0
+        self._test_tick(None)
+
+    def _test_tick(self, _timer):
+        """
+        Timer callback, runs the next step of the test
         """
-        self.forward(255)
-        sleep(1)
-        self.backward(255)
-        sleep(1)
-        self.stop()
-        sleep(1)
+        if self._test_step >= len(_TEST_SPEEDS):
+            self._test_timer = None
+            self.stop()
+            return
+        self.set_signed(_TEST_SPEEDS[self._test_step])
+        self._test_step += 1
+        self._test_timer = Timer(
+            mode=Timer.ONE_SHOT, period=_TEST_STEP_MS, callback=self._test_tick
+        )
 
     def validate_speed(self, speed):
         """
@@ -154,6 +445,4 @@ class DCMotor:
 
         :return: int, the u16 cycle of the speed
         """
-        u16 = speed * (self.MAX_U16 / 255)
-        u16 = int(u16)
-        return u16
+        return _duty_u16(speed)
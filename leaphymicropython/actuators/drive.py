@@ -0,0 +1,282 @@
+"""
+Module for closed-loop speed control and odometry of two DC motors.
+"""
+
+from math import pi, sin
+from machine import Timer
+
+# A heading is stored as a binary angle: 65536 is one full turn
+_FULL_TURN = 65536
+_QUARTER_TURN = _FULL_TURN // 4
+# sin of a quarter turn in 256 steps, in Q14 fixed point
+_SIN_STEPS = 256
+_SIN_SHIFT = 14
+_SIN_TABLE = tuple(
+    int(sin(pi / 2 * step / _SIN_STEPS) * (1 << _SIN_SHIFT) + 0.5)
+    for step in range(_SIN_STEPS + 1)
+)
+_ANGLE_TO_STEP_SHIFT = 6  # _QUARTER_TURN // _SIN_STEPS == 64
+_HEADING_Q16_MASK = (_FULL_TURN << 16) - 1
+_PWM_LIMIT = 255
+# PID gains are stored in Q8 fixed point
+_GAIN_SHIFT = 8
+
+
+def _sin_q14(angle: int) -> int:
+    """
+    Calculates the sine of a binary angle
+    :param angle: int, the angle, 65536 is a full turn
+    :return: int, the sine in Q14 fixed point
+    """
+    angle &= _FULL_TURN - 1
+    quadrant = angle // _QUARTER_TURN
+    step = (angle % _QUARTER_TURN) >> _ANGLE_TO_STEP_SHIFT
+    if quadrant & 1:
+        step = _SIN_STEPS - step
+    if quadrant & 2:
+        return -_SIN_TABLE[step]
+    return _SIN_TABLE[step]
+
+
+def _cos_q14(angle: int) -> int:
+    """
+    Calculates the cosine of a binary angle
+    :param angle: int, the angle, 65536 is a full turn
+    :return: int, the cosine in Q14 fixed point
+    """
+    return _sin_q14(angle + _QUARTER_TURN)
+
+
+# pylint: disable=too-many-instance-attributes
+class SpeedController:
+    """
+    An integer PID controller that turns a speed error into a pwm value.
+
+    The gains are converted to Q8 fixed point once, so an update only uses
+    integer arithmetic and does not allocate memory.
+    """
+
+    # pylint: disable=too-many-positional-arguments
+    def __init__(self, kp=1.0, ki=0.2, kd=0.0, kf=0.0, limit=_PWM_LIMIT):
+        """
+        Creates a speed controller
+        :param kp: float, the proportional gain, in pwm per mm/s error
+        :param ki: float, the integral gain, in pwm per mm/s error per update
+        :param kd: float, the derivative gain, in pwm per mm/s change per update
+        :param kf: float, the feed forward gain, in pwm per mm/s target
+        :param limit: int, the maximum absolute pwm value
+        """
+        self.limit = limit
+        self._kp = int(kp * (1 << _GAIN_SHIFT))
+        self._ki = int(ki * (1 << _GAIN_SHIFT))
+        self._kd = int(kd * (1 << _GAIN_SHIFT))
+        self._kf = int(kf * (1 << _GAIN_SHIFT))
+        self._integral = 0
+        self._previous_error = 0
+        # The integral is clamped so its contribution stays within the limit
+        self._integral_limit = (limit << _GAIN_SHIFT) // self._ki if self._ki else 0
+
+    def reset(self):
+        """
+        Clears the integral and derivative state
+        """
+        self._integral = 0
+        self._previous_error = 0
+
+    def update(self, target: int, measured: int) -> int:
+        """
+        Calculates the next pwm value
+        :param target: int, the target speed in mm/s
+        :param measured: int, the measured speed in mm/s
+        :return: int, the pwm value, between -limit and limit
+        """
+        error = target - measured
+        integral = self._integral + error
+        if integral > self._integral_limit:
+            integral = self._integral_limit
+        elif integral < -self._integral_limit:
+            integral = -self._integral_limit
+        self._integral = integral
+        output = (
+            self._kp * error
+            + self._ki * integral
+            + self._kd * (error - self._previous_error)
+            + self._kf * target
+        ) >> _GAIN_SHIFT
+        self._previous_error = error
+        if output > self.limit:
+            return self.limit
+        if output < -self.limit:
+            return -self.limit
+        return output
+
+
+class Odometry:
+    """
+    Tracks the position and heading of a two wheeled robot from encoder counts.
+
+    The position is kept in micrometers and the heading as a binary angle
+    (65536 is a full turn), so updates only use integer arithmetic.
+    """
+
+    def __init__(self, mm_per_count: float, wheel_base_mm: float):
+        """
+        Creates the odometry
+        :param mm_per_count: float, the distance a wheel travels per encoder count
+        :param wheel_base_mm: float, the distance between the wheels
+        """
+        self.um_per_count = int(mm_per_count * 1000 + 0.5)
+        # Heading change per count of difference between the wheels, in Q16
+        self._angle_per_count = int(
+            mm_per_count / (2 * pi * wheel_base_mm) * _FULL_TURN * 65536 + 0.5
+        )
+        self.x_um = 0
+        self.y_um = 0
+        # The heading keeps 16 fractional bits, so rounding errors do not add up
+        self._heading_q16 = 0
+
+    def reset(self, x_mm=0, y_mm=0, heading_degrees=0):
+        """
+        Sets the pose of the robot
+        :param x_mm: float, the x position in mm
+        :param y_mm: float, the y position in mm
+        :param heading_degrees: float, the heading in degrees
+        """
+        self.x_um = int(x_mm * 1000)
+        self.y_um = int(y_mm * 1000)
+        heading = int(heading_degrees * _FULL_TURN / 360) & (_FULL_TURN - 1)
+        self._heading_q16 = heading << 16
+
+    def update(self, left_counts: int, right_counts: int):
+        """
+        Adds the movement of the wheels since the previous update
+        :param left_counts: int, the encoder counts of the left wheel
+        :param right_counts: int, the encoder counts of the right wheel
+        """
+        distance = (left_counts + right_counts) * self.um_per_count // 2
+        turn = (right_counts - left_counts) * self._angle_per_count
+        # Use the heading halfway the movement for the direction
+        middle = (self._heading_q16 + turn // 2) >> 16
+        self.x_um += (distance * _cos_q14(middle)) >> _SIN_SHIFT
+        self.y_um += (distance * _sin_q14(middle)) >> _SIN_SHIFT
+        self._heading_q16 = (self._heading_q16 + turn) & _HEADING_Q16_MASK
+
+    @property
+    def heading(self) -> int:
+        """
+        :return: int, the heading as a binary angle, 65536 is a full turn
+        """
+        return self._heading_q16 >> 16
+
+    def pose(self):
+        """
+        :return: tuple[float, float, float], the x and y position in mm
+        and the heading in degrees
+        """
+        return (
+            self.x_um / 1000,
+            self.y_um / 1000,
+            self.heading * 360 / _FULL_TURN,
+        )
+
+
+# pylint: disable=too-many-instance-attributes
+class ClosedLoopDrive:
+    """
+    Controls the speed of both motors of a DCMotors object with wheel encoders.
+
+    A timer measures the speed of both wheels at a fixed rate, updates the
+    odometry and sets the pwm of the motors with a SpeedController per wheel.
+    """
+
+    # pylint: disable=too-many-positional-arguments
+    def __init__(
+        self,
+        motors,
+        left_encoder,
+        right_encoder,
+        mm_per_count: float,
+        wheel_base_mm: float,
+        period_ms: int = 20,
+        left_controller: SpeedController = None,
+        right_controller: SpeedController = None,
+    ):
+        """
+        Creates a closed loop drive
+        :param motors: DCMotors, the motors, motor_a is the left motor
+        :param left_encoder: WheelEncoder, the encoder of the left wheel
+        :param right_encoder: WheelEncoder, the encoder of the right wheel
+        :param mm_per_count: float, the distance a wheel travels per encoder count
+        :param wheel_base_mm: float, the distance between the wheels
+        :param period_ms: int, the time in milliseconds between two control updates
+        :param left_controller: SpeedController, the controller of the left wheel
+        :param right_controller: SpeedController, the controller of the right wheel
+        """
+        self.motors = motors
+        self.left_encoder = left_encoder
+        self.right_encoder = right_encoder
+        self.odometry = Odometry(mm_per_count, wheel_base_mm)
+        self.period_ms = period_ms
+        self.left_controller = left_controller or SpeedController()
+        self.right_controller = right_controller or SpeedController()
+        self.target_left = 0
+        self.target_right = 0
+        self.speed_left = 0
+        self.speed_right = 0
+        self._timer = None
+
+    def set_speed(self, left: int, right: int):
+        """
+        Sets the target speed of both wheels and starts the control loop
+        :param left: int, the speed of the left wheel in mm/s, negative for backward
+        :param right: int, the speed of the right wheel in mm/s, negative for backward
+        """
+        self.target_left = int(left)
+        self.target_right = int(right)
+        if self._timer is None:
+            self.left_encoder.take_count()
+            self.right_encoder.take_count()
+            self._timer = Timer(
+                mode=Timer.PERIODIC, period=self.period_ms, callback=self._tick
+            )
+
+    def stop(self):
+        """
+        Stops the control loop and the motors
+        """
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+        self.target_left = 0
+        self.target_right = 0
+        self.left_controller.reset()
+        self.right_controller.reset()
+        self.motors.stop()
+
+    def pose(self):
+        """
+        :return: tuple[float, float, float], the x and y position in mm
+        and the heading in degrees
+        """
+        return self.odometry.pose()
+
+    def _tick(self, _timer):
+        self.update()
+
+    def update(self):
+        """
+        Runs one control step, this is called by the timer
+        """
+        left_counts = self.left_encoder.take_count()
+        right_counts = self.right_encoder.take_count()
+        self.odometry.update(left_counts, right_counts)
+        # um per ms is mm per s
+        um_per_count = self.odometry.um_per_count
+        self.speed_left = left_counts * um_per_count // self.period_ms
+        self.speed_right = right_counts * um_per_count // self.period_ms
+        left = self.left_controller.update(self.target_left, self.speed_left)
+        right = self.right_controller.update(self.target_right, self.speed_right)
+        # Single channel encoders count in the direction the motor is driven
+        self.left_encoder.direction = -1 if left < 0 else 1
+        self.right_encoder.direction = -1 if right < 0 else 1
+        self.motors.set_signed(left, right)
@@ -0,0 +1,252 @@
+"""
+Module for addressable LED strips (WS2812 / NeoPixel).
+"""
+
+import machine
+from machine import Pin
+
+try:
+    import rp2
+except ImportError:
+    rp2 = None
+
+
+def _build_hue_table() -> bytes:
+    """
+    Builds the red, green and blue values at full saturation and value for 256 hues
+    """
+    table = bytearray(256 * 3)
+    for hue in range(256):
+        # 6 sectors of about 42.7 hues each
+        sector, rising = divmod(hue * 6, 256)
+        falling = 255 - rising
+        red, green, blue = (
+            (255, rising, 0),
+            (falling, 255, 0),
+            (0, 255, rising),
+            (0, falling, 255),
+            (rising, 0, 255),
+            (255, 0, falling),
+        )[sector]
+        table[hue * 3] = red
+        table[hue * 3 + 1] = green
+        table[hue * 3 + 2] = blue
+    return bytes(table)
+
+
+_HUE_TABLE = _build_hue_table()
+# brightness for every value from 0 to 255, corrected for the eye with gamma 2.2
+_GAMMA8 = bytes(int((value / 255) ** 2.2 * 255 + 0.5) for value in range(256))
+_BITSTREAM_TIMING_NS = (400, 850, 800, 450)
+
+if rp2 is not None:
+    # pylint: disable=undefined-variable,expression-not-assigned,pointless-statement
+    @rp2.asm_pio(
+        sideset_init=rp2.PIO.OUT_LOW,
+        out_shiftdir=rp2.PIO.SHIFT_LEFT,
+        autopull=True,
+        pull_thresh=8,
+    )
+    def _ws2812():
+        """
+        Sends every byte in the TX FIFO to a WS2812 chain, most significant bit first.
+        At 8 MHz every bit takes 10 cycles: 1.25 us.
+        """
+        wrap_target()
+        label("bitloop")
+        out(x, 1).side(0)[2]
+        jmp(not_x, "do_zero").side(1)[1]
+        jmp("bitloop").side(1)[4]
+        label("do_zero")
+        nop().side(0)[4]
+        wrap()
+
+
+# pylint: disable=too-many-instance-attributes
+class LEDStrip:
+    """
+    A class to control an addressable LED strip (WS2812 / NeoPixel)
+
+    The colors are kept in a bytearray frame buffer. show() sends the buffer to
+    the strip, but only if something changed since the previous show. On the
+    RP2040 the buffer is sent by a PIO state machine, so the CPU does not have
+    to generate the timing.
+    """
+
+    # pylint: disable=too-many-positional-arguments
+    def __init__(
+        self,
+        pin: str,
+        count: int,
+        order: str = "GRB",
+        brightness: int = 255,
+        gamma: bool = True,
+        state_machine: int = 0,
+    ):
+        """
+        Creates an LED strip
+        :param pin: str, the pin connected to the data input of the strip
+        :param count: int, the amount of LEDs
+        :param order: str, the order of the colors on the wire, GRB for most WS2812 strips
+        :param brightness: int, the maximum brightness, from 0 to 255
+        :param gamma: bool, if True, correct the brightness so it looks linear to the eye
+        :param state_machine: int, the PIO state machine to use on the RP2040
+        """
+        if sorted(order.upper()) != ["B", "G", "R"]:
+            raise ValueError(
+                f"Order must contain R, G and B once, your order is {order}"
+            )
+        self.count = count
+        self.buf = bytearray(count * 3)
+        self._red = order.upper().index("R")
+        self._green = order.upper().index("G")
+        self._blue = order.upper().index("B")
+        self.gamma = gamma
+        self._levels = b""
+        self.brightness = 0
+        self.set_brightness(brightness)
+        self.changed = True
+        self.pin = Pin(pin, Pin.OUT)
+        self._state_machine = None
+        if rp2 is not None:
+            self._state_machine = rp2.StateMachine(
+                state_machine, _ws2812, freq=8_000_000, sideset_base=self.pin
+            )
+            self._state_machine.active(1)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __setitem__(self, index: int, color):
+        self.set_pixel(index, color[0], color[1], color[2])
+
+    def __getitem__(self, index: int):
+        offset = index * 3
+        buf = self.buf
+        return (
+            buf[offset + self._red],
+            buf[offset + self._green],
+            buf[offset + self._blue],
+        )
+
+    def set_brightness(self, brightness: int):
+        """
+        Sets the maximum brightness of the colors that are set after this call
+        :param brightness: int, the maximum brightness, from 0 to 255
+        """
+        if not 0 <= brightness <= 255:
+            raise ValueError(
+                f"Brightness must be up to and including 0 and 255, your brightness is {brightness}"
+            )
+        self.brightness = brightness
+        curve = _GAMMA8 if self.gamma else range(256)
+        # One lookup applies both the gamma correction and the brightness
+        self._levels = bytes(curve[value] * brightness // 255 for value in range(256))
+
+    def set_pixel(self, index: int, red: int, green: int, blue: int):
+        """
+        Sets the color of one LED
+        :param index: int, the LED, 0 is the first LED
+        :param red: int, the red value, from 0 to 255
+        :param green: int, the green value, from 0 to 255
+        :param blue: int, the blue value, from 0 to 255
+        """
+        levels = self._levels
+        offset = index * 3
+        buf = self.buf
+        red = levels[red]
+        green = levels[green]
+        blue = levels[blue]
+        if (
+            buf[offset + self._red] != red
+            or buf[offset + self._green] != green
+            or buf[offset + self._blue] != blue
+        ):
+            buf[offset + self._red] = red
+            buf[offset + self._green] = green
+            buf[offset + self._blue] = blue
+            self.changed = True
+
+    def set_hsv(self, index: int, hue: int, saturation: int = 255, value: int = 255):
+        """
+        Sets the color of one LED with hue, saturation and value
+        :param index: int, the LED, 0 is the first LED
+        :param hue: int, the color, from 0 to 255, 0 is red, 85 is green and 170 is blue
+        :param saturation: int, from 0 (white) to 255 (full color)
+        :param value: int, the brightness, from 0 to 255
+        """
+        self.set_pixel(index, *hsv_to_rgb(hue, saturation, value))
+
+    def fill(self, color):
+        """
+        Sets all LEDs to one color
+        :param color: tuple[int, int, int], the red, green and blue values
+        """
+        self.set_range(0, self.count, color)
+
+    def set_range(self, start: int, stop: int, color):
+        """
+        Sets a range of LEDs to one color, the strip is only marked as changed
+        when one of the LEDs had another color
+        :param start: int, the first LED
+        :param stop: int, the LED after the last LED
+        :param color: tuple[int, int, int], the red, green and blue values
+        """
+        start = max(start, 0)
+        stop = min(stop, self.count)
+        if start >= stop:
+            return
+        self.set_pixel(start, color[0], color[1], color[2])
+        # Copy the first pixel in doubling blocks instead of LED by LED,
+        # the blocks before the first difference already hold the color
+        buf = self.buf
+        view = memoryview(buf)
+        begin = start * 3
+        end = stop * 3
+        done = 3
+        differs = False
+        while begin + done < end:
+            size = min(done, end - begin - done)
+            target = begin + done
+            if differs or buf[target : target + size] != buf[begin : begin + size]:
+                differs = True
+                view[target : target + size] = view[begin : begin + size]
+            done += size
+        if differs:
+            self.changed = True
+
+    def clear(self):
+        """
+        Turns all LEDs off
+        """
+        self.fill((0, 0, 0))
+
+    def show(self, force: bool = False):
+        """
+        Sends the colors to the strip
+        :param force: bool, if True, also send the colors if nothing changed
+        """
+        if not self.changed and not force:
+            return
+        if self._state_machine is not None:
+            # Every byte goes in its own FIFO word, the PIO program shifts out the top 8 bits
+            self._state_machine.put(self.buf, 24)
+        else:
+            machine.bitstream(self.pin, 0, _BITSTREAM_TIMING_NS, self.buf)
+        self.changed = False
+
+
+def hsv_to_rgb(hue: int, saturation: int = 255, value: int = 255):
+    """
+    Converts hue, saturation and value to red, green and blue with a precomputed table
+    :param hue: int, the color, from 0 to 255, 0 is red, 85 is green and 170 is blue
+    :param saturation: int, from 0 (white) to 255 (full color)
+    :param value: int, the brightness, from 0 to 255
+    :return: tuple[int, int, int], the red, green and blue values
+    """
+    offset = (hue & 0xFF) * 3
+    white = 255 - saturation
+    red = _HUE_TABLE[offset] * saturation // 255 + white
+    green = _HUE_TABLE[offset + 1] * saturation // 255 + white
+    blue = _HUE_TABLE[offset + 2] * saturation // 255 + white
+    return red * value // 255, green * value // 255, blue * value // 255
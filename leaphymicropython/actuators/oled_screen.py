@@ -1,6 +1,5 @@
 """This module provides OLED SSH1106 methods"""
 
-from leaphymicropython.actuators.sh1106 import SH1106_I2C
 from leaphymicropython.utils.i2c_helper import I2CDevice
 from leaphymicropython.utils.i2c_helper import handle_i2c_errors
 
@@ -69,6 +68,10 @@ class OLEDSH1106(I2CDevice):
         correct screen dimensions and I2C address.
         """
         super().initialize_device()
+        # Imported here, so the driver is only compiled when a screen is made
+        # pylint: disable-next=import-outside-toplevel
+        from leaphymicropython.actuators.sh1106 import SH1106_I2C
+
         self.screen = SH1106_I2C(self.width, self.height, self.i2c, addr=self.ADDRESS)
 
     def _color_to_digit(self, color: str):
@@ -1,9 +1,19 @@
-from leaphymicropython.utils.pins import set_pwm
+from machine import Pin, PWM, Timer
+from utime import ticks_ms, ticks_diff
 
+# duty_u16 for every brightness from 0 to 255, corrected for the eye with gamma 2.2
+_GAMMA_DUTY_U16 = tuple(int((value / 255) ** 2.2 * 65535 + 0.5) for value in range(256))
+# duty_u16 for every brightness from 0 to 255, without correction
+_LINEAR_DUTY_U16 = tuple(value * 257 for value in range(256))
 
+
+# pylint: disable=too-many-instance-attributes
 class RGBLed:
     """
     A class to control an RGB LED
+
+    Fades, blinks and colour cycles run on a timer in the background,
+    so the program keeps running while the LED changes colour.
     """
 
     Colors = {
@@ -17,16 +27,36 @@ class RGBLed:
         "Brown": (139, 69, 19),
     }
 
-    def __init__(self, red_pin: str, green_pin: str, blue_pin: str):
+    # pylint: disable=too-many-positional-arguments
+    def __init__(
+        self,
+        red_pin: str,
+        green_pin: str,
+        blue_pin: str,
+        freq: int = 1000,
+        gamma: bool = False,
+    ):
         """
         Creates an RGB LED
         :param red_pin: str, the pin of the red LED
         :param green_pin: str, the pin of the green LED
         :param blue_pin: str, the pin of the blue LED
+        :param freq: int, the frequency of the pwm signals
+        :param gamma: bool, if True, correct the brightness so it looks linear to the eye,
+            which makes fades smoother but changes the duty cycle of set_color
         """
-        self.red = red_pin
-        self.green = green_pin
-        self.blue = blue_pin
+        self.freq = freq
+        self._duty_table = _GAMMA_DUTY_U16 if gamma else _LINEAR_DUTY_U16
+        self.color = (0, 0, 0)
+        self._duties = [-1, -1, -1]
+        self._start = [0, 0, 0]
+        self._keyframes = ()
+        self._keyframe_index = 0
+        self._repeat = False
+        self._started_ms = 0
+        self._timer = None
+        self.animating = False
+        self.set_pins(red_pin, green_pin, blue_pin)
 
     def set_pins(self, red_pin: str, green_pin: str, blue_pin: str):
         """
@@ -38,17 +68,68 @@ class RGBLed:
         self.red = red_pin
         self.green = green_pin
         self.blue = blue_pin
+        self.pwms = []
+        for pin in (red_pin, green_pin, blue_pin):
+            pwm = PWM(Pin(pin))
+            pwm.freq(self.freq)
+            self.pwms.append(pwm)
+        self._duties = [-1, -1, -1]
 
     def set_color(self, r: int, g: int, b: int):
         """
-        Sets the color of the RGB LED
+        Sets the color of the RGB LED, stopping the running animation
         :param r: int, the red value
         :param g: int, the green value
         :param b: int, the blue value
         """
-        set_pwm(self.red, r, 255)
-        set_pwm(self.green, g, 255)
-        set_pwm(self.blue, b, 255)
+        self.stop()
+        self._write(_to_rgb((r, g, b)))
+
+    def set_named_color(self, name: str):
+        """
+        Sets the color of the RGB LED to one of the Colors, stopping the running animation
+        :param name: str, the name of the color, for example "Orange"
+        """
+        self.set_color(*self._to_color(name))
+
+    def fade(self, color, duration_ms: int):
+        """
+        Fades from the current color to a new color in the background
+        :param color: tuple[int, int, int] or str, the RGB values or the name of one of the Colors
+        :param duration_ms: int, the time in milliseconds the fade takes
+        """
+        self._animate(((self._to_color(color), duration_ms, True),), False)
+
+    def blink(self, color, period_ms: int = 1000):
+        """
+        Blinks in the background until another color is set
+        :param color: tuple[int, int, int] or str, the RGB values or the name of one of the Colors
+        :param period_ms: int, the time in milliseconds of one on and off cycle
+        """
+        half = period_ms // 2
+        self._animate(
+            ((self._to_color(color), half, False), ((0, 0, 0), half, False)), True
+        )
+
+    def cycle(self, colors, step_ms: int = 1000, smooth: bool = True, repeat=True):
+        """
+        Goes through a list of colors in the background
+        :param colors: list, RGB tuples or names of the Colors
+        :param step_ms: int, the time in milliseconds for every color
+        :param smooth: bool, if True, fade to every color, otherwise switch
+        :param repeat: bool, if True, start again after the last color
+        """
+        keyframes = tuple((self._to_color(color), step_ms, smooth) for color in colors)
+        self._animate(keyframes, repeat)
+
+    def stop(self):
+        """
+        Stops the running animation, the LED keeps its current color
+        """
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+        self.animating = False
 
     def print_base_colors(self):
         """
@@ -56,3 +137,91 @@ class RGBLed:
         """
         for kleur, rgb in self.Colors.items():
             print(f"{kleur}: RGB{rgb}")
+
+    def _to_color(self, color):
+        """
+        Converts a color name or RGB tuple to a validated RGB tuple
+        """
+        if isinstance(color, str):
+            if color not in self.Colors:
+                raise ValueError(
+                    f"Unknown color {color}, use one of {', '.join(self.Colors)}"
+                )
+            return self.Colors[color]
+        return _to_rgb(color)
+
+    def _write(self, color):
+        """
+        Writes a color to the pwm channels, skipping channels that do not change
+        """
+        self.color = color
+        table = self._duty_table
+        for index in range(3):  # pylint: disable=consider-using-enumerate
+            duty = table[color[index]]
+            if duty != self._duties[index]:
+                self.pwms[index].duty_u16(duty)
+                self._duties[index] = duty
+
+    def _animate(self, keyframes, repeat: bool, period_ms: int = 20):
+        """
+        Starts an animation
+        :param keyframes: tuple, (color, duration_ms, fade) for every step
+        :param repeat: bool, if True, start again after the last step
+        :param period_ms: int, the time in milliseconds between two updates
+        """
+        self.stop()
+        if not keyframes:
+            return
+        self._keyframes = keyframes
+        self._keyframe_index = 0
+        self._repeat = repeat
+        self.animating = True
+        self._start_keyframe()
+        self._timer = Timer(mode=Timer.PERIODIC, period=period_ms, callback=self._tick)
+
+    def _start_keyframe(self):
+        color, _, fade = self._keyframes[self._keyframe_index]
+        self._start[0], self._start[1], self._start[2] = self.color
+        if not fade:
+            self._write(color)
+        self._started_ms = ticks_ms()
+
+    def _tick(self, _timer):
+        """
+        Timer callback, updates the color of the running animation
+        """
+        color, duration_ms, fade = self._keyframes[self._keyframe_index]
+        elapsed = ticks_diff(ticks_ms(), self._started_ms)
+        if elapsed < duration_ms:
+            if fade:
+                start = self._start
+                self._write(
+                    (
+                        start[0] + (color[0] - start[0]) * elapsed // duration_ms,
+                        start[1] + (color[1] - start[1]) * elapsed // duration_ms,
+                        start[2] + (color[2] - start[2]) * elapsed // duration_ms,
+                    )
+                )
+            return
+        self._write(color)
+        self._keyframe_index += 1
+        if self._keyframe_index >= len(self._keyframes):
+            if not self._repeat:
+                self.stop()
+                return
+            self._keyframe_index = 0
+        self._start_keyframe()
+
+
+def _to_rgb(color):
+    """
+    Validates an RGB tuple
+    :param color: tuple[int, int, int], the red, green and blue values
+    :return: tuple[int, int, int], the validated color
+    """
+    if len(color) != 3:
+        raise ValueError(f"A color needs a red, green and blue value, got {color}")
+    for value in color:
+        if value < 0 or value > 255:
+            raise ValueError("PWM value must be between 0 and 255")
+    return tuple(int(value) for value in color)
@@ -1,4 +1,104 @@
-from machine import Pin, PWM
+from machine import Pin, PWM, Timer
+from utime import ticks_ms, ticks_diff
+
+servo_instances = {}
+
+EASE_LINEAR = 0
+EASE_IN = 1
+EASE_OUT = 2
+EASE_IN_OUT = 3
+
+# Progress of a movement in Q12 fixed point, small enough to never need a big int
+_PROGRESS_SHIFT = 12
+_PROGRESS_ONE = 1 << _PROGRESS_SHIFT
+
+
+class Servo:
+    """
+    A class to control a servo motor
+
+    The PWM channel is created once, and angles are mapped to duty cycles
+    with integer arithmetic only.
+    """
+
+    # Arduino's pulse width mapping (544-2400 microseconds)
+    MIN_PULSE_US = 544
+    MAX_PULSE_US = 2400
+
+    # pylint: disable=too-many-positional-arguments
+    def __init__(
+        self,
+        pin: str,
+        min_pulse_us: int = MIN_PULSE_US,
+        max_pulse_us: int = MAX_PULSE_US,
+        max_angle: int = 180,
+        freq: int = 50,
+    ):
+        """
+        Creates a servo
+        :param pin: str, the pin name to which the servo motor is connected
+        :param min_pulse_us: int, the pulse width in microseconds at angle 0
+        :param max_pulse_us: int, the pulse width in microseconds at max_angle
+        :param max_angle: int, the largest angle of the servo
+        :param freq: int, the frequency of the pwm signal
+        """
+        if not 0 < min_pulse_us < max_pulse_us < 1_000_000 // freq:
+            raise ValueError(
+                f"Pulse widths must fit in the period, got {min_pulse_us} and {max_pulse_us}"
+            )
+        self.max_angle = max_angle
+        period_us = 1_000_000 // freq
+        # duty_u16 takes a value from 0-65535 for the whole period,
+        # the duty at angle 0 and the duty per degree are in Q16 fixed point
+        self._min_duty = (min_pulse_us * 65535 << 16) // period_us
+        self._duty_per_degree = ((max_pulse_us - min_pulse_us) * 65535 << 16) // (
+            period_us * max_angle
+        )
+        self.angle = None
+        # The duty cycle written last, None while the servo does not hold a position
+        self.duty = None
+        self.pwm = PWM(Pin(pin))
+        self.pwm.freq(freq)
+
+    def angle_to_duty_u16(self, angle: int) -> int:
+        """
+        Converts an angle to a duty cycle
+        :param angle: int, the angle in degrees
+        :return: int, the duty_u16 value
+        """
+        return (self._min_duty + angle * self._duty_per_degree) >> 16
+
+    def set_angle(self, angle: int) -> None:
+        """
+        Puts the servo on an angle, nothing is written if the angle does not change
+        :param angle: int, the angle to set the servo motor to
+        """
+        if not 0 <= angle <= self.max_angle:
+            raise ValueError(
+                f"Angle must be up to and including 0 and {self.max_angle}, your angle is {angle}"
+            )
+        angle = int(angle)
+        if angle == self.angle:
+            return
+        self.write_duty_u16(self.angle_to_duty_u16(angle))
+        self.angle = angle
+
+    def write_duty_u16(self, duty: int) -> None:
+        """
+        Writes a duty cycle, the angle is not known after this until set_angle is called
+        :param duty: int, the duty_u16 value
+        """
+        self.pwm.duty_u16(duty)
+        self.duty = duty
+        self.angle = None
+
+    def release(self) -> None:
+        """
+        Stops sending pulses, so the servo no longer holds its position
+        """
+        self.pwm.duty_u16(0)
+        self.duty = None
+        self.angle = None
 
 
 def set_servo_angle(pin: str, angle: int) -> None:
@@ -7,24 +107,155 @@ def set_servo_angle(pin: str, angle: int) -> None:
     :param pin: The pin name to which the servo motor is connected
     :param angle: The angle to set the servo motor to
     """
-    if not 0 <= angle <= 180:
-        raise ValueError(
-            f"Speed must be up to and including 0 and 180, your angle is {angle}"
-        )
+    servo = servo_instances.get(pin)
+    if servo is None:
+        servo = Servo(pin)
+        servo_instances[pin] = servo
+    servo.set_angle(angle)
 
-    pwm = PWM(Pin(pin))
-    pwm.freq(50)
 
-    # Use Arduino's pulse width mapping (544-2400 microseconds)
-    min_pulse = 544
-    max_pulse = 2400
+def _ease(easing: int, progress: int) -> int:
+    """
+    Applies an easing curve
+    :param easing: int, EASE_LINEAR, EASE_IN, EASE_OUT or EASE_IN_OUT
+    :param progress: int, the progress of the movement in Q12 fixed point
+    :return: int, the eased progress in Q12 fixed point
+    """
+    if easing == EASE_IN:
+        return (progress * progress) >> _PROGRESS_SHIFT
+    if easing == EASE_OUT:
+        return (progress * (2 * _PROGRESS_ONE - progress)) >> _PROGRESS_SHIFT
+    if easing == EASE_IN_OUT:
+        # smoothstep: 3p^2 - 2p^3
+        square = (progress * progress) >> _PROGRESS_SHIFT
+        return (square * (3 * _PROGRESS_ONE - 2 * progress)) >> _PROGRESS_SHIFT
+    return progress
+
+
+# pylint: disable=too-many-instance-attributes
+class ServoGroup:
+    """
+    Moves several servos together along interpolated trajectories.
+
+    One timer updates all servos in a single pass per tick, so the servos start
+    and arrive at the same time. The trajectory state is preallocated, so the
+    timer callback does not allocate memory.
+    """
+
+    def __init__(self, servos, period_ms: int = 20):
+        """
+        Creates a group of servos
+        :param servos: list, Servo objects or pin names
+        :param period_ms: int, the time in milliseconds between two updates, 20 matches 50 Hz
+        """
+        self.servos = [
+            Servo(servo) if isinstance(servo, str) else servo for servo in servos
+        ]
+        self.period_ms = period_ms
+        count = len(self.servos)
+        self._start = [0] * count
+        self._end = [0] * count
+        self._targets = [None] * count
+        self._poses = []
+        self._pose_index = 0
+        self._easing = EASE_IN_OUT
+        self._duration_ms = 0
+        self._started_ms = 0
+        self._timer = None
+        self.done = True
+
+    def move_to(self, angles, duration_ms: int, easing: int = EASE_IN_OUT):
+        """
+        Moves all servos to a pose, replacing the running movement
+        :param angles: list, the angle for every servo, None keeps a servo where it is
+        :param duration_ms: int, the time in milliseconds the movement takes
+        :param easing: int, EASE_LINEAR, EASE_IN, EASE_OUT or EASE_IN_OUT
+        """
+        self.play([(angles, duration_ms)], easing)
+
+    def play(self, poses, easing: int = EASE_IN_OUT):
+        """
+        Moves through a list of poses, replacing the running movement
+        :param poses: list, tuples of (angles, duration_ms), see move_to
+        :param easing: int, EASE_LINEAR, EASE_IN, EASE_OUT or EASE_IN_OUT
+        """
+        for angles, duration_ms in poses:
+            if len(angles) != len(self.servos):
+                raise ValueError(
+                    f"A pose needs {len(self.servos)} angles, this pose has {len(angles)}"
+                )
+            for servo, angle in zip(self.servos, angles):
+                if angle is not None and not 0 <= angle <= servo.max_angle:
+                    raise ValueError(
+                        f"Angle must be up to and including 0 and {servo.max_angle}, "
+                        f"your angle is {angle}"
+                    )
+            if duration_ms < 0:
+                raise ValueError(
+                    f"Duration can not be negative, your duration is {duration_ms}"
+                )
+        self.stop()
+        self._poses = poses
+        self._pose_index = 0
+        self._easing = easing
+        self.done = False
+        self._start_pose()
+        self._timer = Timer(
+            mode=Timer.PERIODIC, period=self.period_ms, callback=self._tick
+        )
+        self._tick(None)
 
-    # Map angle (0-180) to pulse width in microseconds
-    pulse_width = min_pulse + (angle * (max_pulse - min_pulse) / 180)
+    def stop(self):
+        """
+        Stops the movement, the servos stay where they are
+        """
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+        self.done = True
 
-    # Convert microseconds to 16-bit duty cycle value
-    # 20ms period (50Hz) = 20,000 microseconds
-    # duty_u16 takes a value from 0-65535
-    duty_cycle = int((pulse_width / 20000) * 65535)
+    def _start_pose(self):
+        angles, self._duration_ms = self._poses[self._pose_index]
+        for index, servo in enumerate(self.servos):
+            angle = angles[index]
+            start = servo.duty
+            if start is None:
+                # Unknown position: start at the target, or leave a released servo alone
+                start = -1 if angle is None else servo.angle_to_duty_u16(int(angle))
+            self._start[index] = start
+            if angle is None:
+                self._end[index] = start
+                self._targets[index] = servo.angle
+            else:
+                self._end[index] = servo.angle_to_duty_u16(int(angle))
+                self._targets[index] = int(angle)
+        self._started_ms = ticks_ms()
 
-    pwm.duty_u16(duty_cycle)
+    def _tick(self, _timer):
+        """
+        Timer callback, writes the interpolated duty cycle of every servo
+        """
+        elapsed = ticks_diff(ticks_ms(), self._started_ms)
+        if elapsed >= self._duration_ms:
+            progress = _PROGRESS_ONE
+        else:
+            progress = (elapsed << _PROGRESS_SHIFT) // self._duration_ms
+        eased = _ease(self._easing, progress)
+        # enumerate would allocate a tuple for every servo on every tick
+        # pylint: disable-next=consider-using-enumerate
+        for index in range(len(self.servos)):
+            start = self._start[index]
+            duty = start + (((self._end[index] - start) * eased) >> _PROGRESS_SHIFT)
+            servo = self.servos[index]
+            if duty != servo.duty and duty >= 0:
+                # The angle is set again when the pose is reached
+                servo.write_duty_u16(duty)
+        if progress < _PROGRESS_ONE:
+            return
+        for servo, target in zip(self.servos, self._targets):
+            servo.angle = target
+        self._pose_index += 1
+        if self._pose_index < len(self._poses):
+            self._start_pose()
+        else:
+            self.stop()
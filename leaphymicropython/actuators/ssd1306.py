@@ -193,6 +193,7 @@ class SSD1306I2C(SSD1306, I2CDevice):
         scl_gpio_pin=13,
         bus_id=0,
         show_warnings=True,
+        freq=400_000,
     ):
         """
         Initializes the SSD1306 I2C display.
@@ -209,11 +210,17 @@ class SSD1306I2C(SSD1306, I2CDevice):
             for example bus 0 or 1. Defaults to 0.
             show_warnings (bool, optional): If True, show warnings about device address not found.
             Defaults to True.
+            freq (int, optional): I2C bus frequency in Hz. Defaults to 400000.
         """
         I2CDevice.__init__(
-            self, channel, sda_gpio_pin, scl_gpio_pin, bus_id, show_warnings
+            self,
+            channel,
+            sda_gpio_pin,
+            scl_gpio_pin,
+            bus_id,
+            freq,
+            show_warnings,
         )
-        self.find_device(show_warnings=self.show_warnings)
 
         self.temp = bytearray(2)
         # Add an extra byte to the data buffer to hold an I2C data/command byte
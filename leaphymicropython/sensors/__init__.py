@@ -0,0 +1,26 @@
+"""
+The sensors of leaphymicropython.
+
+The classes and functions can be imported from this package directly, for
+example ``from leaphymicropython.sensors import TimeOfFlight``. A module is only
+imported (and compiled) the first time one of its names is used, so drivers
+that are not used take no RAM.
+"""
+
+from leaphymicropython.utils.lazy import lazy_getattr
+
+# For every name: the module that defines it
+_LAZY_NAMES = {
+    "Adps9960": "adps9960",
+    "BarometricPressure": "barometer",
+    "BMP280": "bmp280",
+    "QMC5883L": "compass",
+    "DHT22": "dht22",
+    "WheelEncoder": "encoder",
+    "AnalogIR": "linesensor",
+    "read_distance": "sonar",
+    "TimeOfFlight": "tof",
+    "VL53L0X": "vl53l0x",
+}
+
+__getattr__ = lazy_getattr(__name__, _LAZY_NAMES, globals())
@@ -121,7 +121,8 @@ class Adps9960(I2CDevice):
             light-levels, expressed as 16-bit unsigned integers.
         """
         raw_data = self._memory_read(_REG_CDATAL, _COLOR_DATA_LEN)
-        clear, red, green, blue = ustruct.unpack(">HHHH", raw_data)
+        # The channels are little-endian, the low byte comes first
+        clear, red, green, blue = ustruct.unpack("<HHHH", raw_data)
         self._register_update(_REG_ENABLE, _MASK_NONE, _ENABLE_MASK_AEN)
         return red, green, blue, clear
 
@@ -3,7 +3,6 @@ This module provides barometric pressure sensor (BMP280) related measurements.
 """
 
 from leaphymicropython.utils.i2c_helper import I2CDevice, handle_i2c_errors
-from leaphymicropython.sensors.bmp280 import BMP280
 
 
 class BarometricPressure(I2CDevice):
@@ -29,6 +28,8 @@ class BarometricPressure(I2CDevice):
     """
 
     ADDRESS = 0x76  # or 0x77, depending on your setup
+    # Time in milliseconds the sensor needs after wake() before it can be read
+    wake_ms = 45
 
     # pylint: disable=too-many-positional-arguments
     def __init__(
@@ -50,8 +51,12 @@ class BarometricPressure(I2CDevice):
         Initializes the external BMP280 driver.
         """
         super().initialize_device()
+        # Imported here, so the large driver is only compiled when a sensor is made
+        # pylint: disable-next=import-outside-toplevel
+        from leaphymicropython.sensors.bmp280 import BMP280, BMP280_CASE_INDOOR
+
         self.bmp = BMP280(self.i2c)
-        self.bmp.use_case(self.bmp.BMP280_CASE_INDOOR)
+        self.bmp.use_case(BMP280_CASE_INDOOR)
 
     @handle_i2c_errors
     def get_temperature(self):
@@ -72,3 +77,17 @@ class BarometricPressure(I2CDevice):
             float: Pressure in Pa, or None if sensor not found.
         """
         return self.bmp.pressure
+
+    @handle_i2c_errors
+    def standby(self):
+        """
+        Puts the sensor in sleep mode, to save power until wake().
+        """
+        self.bmp.sleep()
+
+    @handle_i2c_errors
+    def wake(self):
+        """
+        Wakes the sensor up with a single measurement in forced mode.
+        """
+        self.bmp.force_measure()
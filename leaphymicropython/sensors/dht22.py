@@ -23,5 +23,5 @@ class DHT22:
         :return: humidity: gives the humidity in percentages
         """
         self.sensor.measure()
-        humidity = self.read_humidity()
+        humidity = self.sensor.humidity()
         return humidity
@@ -0,0 +1,61 @@
+"""A module for wheel encoders"""
+
+from machine import Pin, disable_irq, enable_irq
+
+
+class WheelEncoder:
+    """
+    A class to count the pulses of a wheel encoder
+
+    The pulses are counted in a pin interrupt, so no pulse is missed while
+    the main program is busy.
+
+    With only pin_a (a single channel encoder), the direction can not be
+    measured. Set the direction attribute to 1 or -1 to give the direction
+    the wheel turns in, for example the direction the motor is driven.
+    With pin_b (a quadrature encoder), the direction is measured.
+    """
+
+    def __init__(self, pin_a: str, pin_b: str = None, pull=Pin.PULL_UP):
+        """
+        Creates a wheel encoder
+        :param pin_a: str, the pin of the A channel of the encoder
+        :param pin_b: str, the pin of the B channel of the encoder, None for a single channel
+        :param pull: the pull resistor of the pins
+        """
+        self.count = 0
+        self.direction = 1
+        self.pin_a = Pin(pin_a, Pin.IN, pull)
+        self.pin_b = None
+        if pin_b is None:
+            handler = self._on_pulse
+        else:
+            self.pin_b = Pin(pin_b, Pin.IN, pull)
+            handler = self._on_quadrature_pulse
+        self.pin_a.irq(trigger=Pin.IRQ_RISING, handler=handler, hard=True)
+
+    def _on_pulse(self, _pin):
+        self.count += self.direction
+
+    def _on_quadrature_pulse(self, _pin):
+        if self.pin_b.value():
+            self.count -= 1
+        else:
+            self.count += 1
+
+    def take_count(self) -> int:
+        """
+        Reads the amount of pulses since the previous call
+        :return: int, the amount of pulses, negative when the wheel turns backward
+        """
+        state = disable_irq()
+        count = self.count
+        self.count = 0
+        enable_irq(state)
+        return count
+
+    def stop(self):
+        """
+        Stops counting pulses
+        """
+        self.pin_a.irq(handler=None)
@@ -1,14 +1,18 @@
 """A module for the new leaphy line sensor"""
 
+from machine import Timer
+from utime import ticks_ms, ticks_diff
 from leaphymicropython.utils.pins import get_analog_pin
 
 
+# pylint: disable=too-many-instance-attributes
 class AnalogIR:
     """
     A class to control the analog ir sensor
     """
 
-    def __init__(self, pin_name, above_black=4000):
+    # pylint: disable=too-many-positional-arguments
+    def __init__(self, pin_name, above_black=4000, hysteresis=0, min_dwell_ms=0):
         """
         Initializes the AnalogIR object.
 
@@ -23,9 +27,25 @@ class AnalogIR:
             With this parameter, you can determine the threshold between a black
             and a white line. From experience, above 4000 usually indicates
             a black line, but obviously you can change this.
+            hysteresis (int, optional): the width of the band around above_black
+            in which the state does not change. The state only becomes black above
+            above_black + hysteresis / 2 and only becomes white below
+            above_black - hysteresis / 2. Used by update, changed and on_change.
+            min_dwell_ms (int, optional): the time in milliseconds a new state has
+            to be seen before it is reported. Used by update, changed and on_change.
         """
+        if hysteresis < 0 or min_dwell_ms < 0:
+            raise ValueError("Hysteresis and min_dwell_ms can not be negative")
         self.pin = get_analog_pin(pin_name)
         self.above_black = above_black
+        self.hysteresis = hysteresis
+        self.min_dwell_ms = min_dwell_ms
+        self.state = None
+        self._candidate = None
+        self._candidate_since = 0
+        self._changed = False
+        self._callback = None
+        self._timer = None
 
     def get_analog_value(self):
         """
@@ -41,3 +61,74 @@ class AnalogIR:
         if self.get_analog_value() >= self.above_black:
             return "black"
         return "white"
+
+    def update(self):
+        """
+        Reads the sensor and updates the debounced state.
+
+        The state only changes when the value leaves the hysteresis band and
+        the new state is seen for at least min_dwell_ms. The first reading only
+        sets the state, it is not a transition.
+
+        :return: the new state ("black" or "white") on a transition, None otherwise
+        """
+        value = self.get_analog_value()
+        half_band = self.hysteresis // 2
+        if self.state == "black":
+            seen = "white" if value < self.above_black - half_band else "black"
+        elif self.state == "white":
+            seen = "black" if value >= self.above_black + half_band else "white"
+        else:
+            self.state = "black" if value >= self.above_black else "white"
+            return None
+
+        if seen == self.state:
+            self._candidate = None
+            return None
+
+        now = ticks_ms()
+        if seen != self._candidate:
+            self._candidate = seen
+            self._candidate_since = now
+        if ticks_diff(now, self._candidate_since) < self.min_dwell_ms:
+            return None
+
+        self.state = seen
+        self._candidate = None
+        self._changed = True
+        if self._callback is not None:
+            self._callback(seen)
+        return seen
+
+    def changed(self):
+        """
+        Polls the sensor for a state change.
+
+        :return: the new state ("black" or "white") if the state changed since
+        the previous call, None otherwise
+        """
+        self.update()
+        if not self._changed:
+            return None
+        self._changed = False
+        return self.state
+
+    def on_change(self, callback, period_ms=5):
+        """
+        Calls a function on every state change.
+
+        The sensor is read in the background by a timer, so the main loop does
+        not have to poll it.
+
+        :param callback: the function to call with the new state, None to stop
+        :param period_ms: the time in milliseconds between two readings
+        """
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+        self._callback = callback
+        if callback is None:
+            return
+        self._timer = Timer(
+            mode=Timer.PERIODIC, period=period_ms, callback=lambda _: self.update()
+        )
@@ -1,6 +1,5 @@
 """This module provides time-of-flight related calculations."""
 
-from leaphymicropython.sensors.vl53l0x import VL53L0X
 from leaphymicropython.utils.i2c_helper import I2CDevice
 from leaphymicropython.utils.i2c_helper import handle_i2c_errors
 
@@ -37,6 +36,8 @@ class TimeOfFlight(I2CDevice):
 
     # the following attribute is used by decorator handle_i2c_errors
     ADDRESS = 0x29
+    # Time in milliseconds the sensor needs after wake() before it can be read
+    wake_ms = 35
 
     # pylint: disable=too-many-positional-arguments
     def __init__(
@@ -64,14 +65,40 @@ class TimeOfFlight(I2CDevice):
             channel, sda_gpio_pin, scl_gpio_pin, bus_id, freq, show_warnings
         )
         self.tof = None
+        self._standby_period = None
 
     def initialize_device(self):
         """
         initialize external library
         """
         super().initialize_device()
+        # Imported here, so the large driver is only compiled when a sensor is made
+        # pylint: disable-next=import-outside-toplevel
+        from leaphymicropython.sensors.vl53l0x import VL53L0X
+
         self.tof = VL53L0X(self.i2c)
 
+    def reset_device(self):
+        """
+        Resets the sensor after a failed call, without a new SPAD calibration.
+
+        A failed call can leave a measurement running, so it is stopped. If the
+        sensor lost its configuration, init() runs again with the SPAD
+        information of the first initialization.
+
+        Returns:
+            bool: False if the sensor was never initialized.
+        """
+        if self.tof is None:
+            return False
+        self.tof.stop()
+        if not self.tof.is_configured():
+            self.tof.init()
+            self.tof.set_measurement_timing_budget(
+                self.tof.measurement_timing_budget_us
+            )
+        return True
+
     @handle_i2c_errors
     def get_distance(self):
         """
@@ -84,3 +111,24 @@ class TimeOfFlight(I2CDevice):
             int: The measured distance in millimeters.
         """
         return self.tof.ping()
+
+    @handle_i2c_errors
+    def standby(self):
+        """
+        Stops continuous ranging, to save power until wake().
+
+        get_distance() measures once and then the sensor is in standby already,
+        so this only saves power when the driver was started in continuous mode.
+        """
+        if self.tof.started:
+            self._standby_period = self.tof.period
+            self.tof.stop()
+
+    @handle_i2c_errors
+    def wake(self):
+        """
+        Starts continuous ranging again, with the period it had before standby().
+        """
+        if self._standby_period is not None:
+            self.tof.start(self._standby_period)
+            self._standby_period = None
@@ -119,8 +119,11 @@ class VL53L0X:
         self.i2c = i2c
         self.address = address
         utime.sleep_ms(100)  # give the I2C time to init
+        # The SPAD information of the chip, kept so init() can be run again faster
+        self.spad_info = None
         self.init()
         self._started = False
+        self.period = 0
         self.measurement_timing_budget_us = 0
         self.set_measurement_timing_budget(self.measurement_timing_budget_us)
         self.enables = {"tcc": 0, "dss": 0, "msrc": 0, "pre_range": 0, "final_range": 0}
@@ -136,6 +139,10 @@ class VL53L0X:
         }
         self.vcsel_period_type = ["VcselPeriodPreRange", "VcselPeriodFinalRange"]
 
+    @property
+    def started(self):
+        return self._started
+
     def ping(self):
         self.start()
         distance = self.read()
@@ -197,7 +204,9 @@ class VL53L0X:
 
         self._register(_SYSTEM_SEQUENCE, 0xFF)
 
-        spad_count, is_aperture = self._spad_info()
+        if self.spad_info is None:
+            self.spad_info = self._spad_info()
+        spad_count, is_aperture = self.spad_info
         spad_map = bytearray(self._registers(_SPAD_ENABLES, struct="6B"))
 
         # set reference spads
@@ -317,6 +326,10 @@ class VL53L0X:
 
         self._register(_SYSTEM_SEQUENCE, 0xE8)
 
+    def is_configured(self):
+        # init() ends with this sequence, the chip forgets it when it loses power
+        return self._register(_SYSTEM_SEQUENCE) == 0xE8
+
     def _spad_info(self):
         self._config(
             (0x80, 0x01),
@@ -369,6 +382,7 @@ class VL53L0X:
         self._register(_SYSRANGE_START, 0x00)
 
     def start(self, period=0):
+        self.period = period
         self._config(
             (0x80, 0x01),
             (0xFF, 0x01),
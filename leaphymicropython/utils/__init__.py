@@ -0,0 +1,35 @@
+"""
+The helpers (pins, timing, communication) of leaphymicropython.
+
+The classes and functions can be imported from this package directly, for
+example ``from leaphymicropython.utils import Scheduler``. A module is only
+imported (and compiled) the first time one of its names is used, so drivers
+that are not used take no RAM.
+"""
+
+from leaphymicropython.utils.lazy import lazy_getattr
+
+# For every name: the module that defines it
+_LAZY_NAMES = {
+    "Bluetooth": "bluetooth",
+    "MessageLink": "bluetooth",
+    "find_i2c_address": "i2c_address_finder",
+    "I2CDevice": "i2c_helper",
+    "PerfCounters": "i2c_helper",
+    "scan_bus": "i2c_helper",
+    "AnalogSampler": "pins",
+    "read_analog": "pins",
+    "read_pin": "pins",
+    "set_pin": "pins",
+    "set_pwm": "pins",
+    "IdleManager": "power",
+    "HTTPPublisher": "publish",
+    "MQTTPublisher": "publish",
+    "TelemetryPublisher": "telemetry",
+    "Scheduler": "timeschedule",
+    "sleep_minute": "timeschedule",
+    "WifiManager": "wifi",
+    "connect": "wifi",
+}
+
+__getattr__ = lazy_getattr(__name__, _LAZY_NAMES, globals())
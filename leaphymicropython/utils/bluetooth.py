@@ -1,4 +1,5 @@
 from machine import UART
+from leaphymicropython.utils.framing import crc16, cobs_encode, cobs_decode
 
 
 class Bluetooth:
@@ -6,11 +7,18 @@ class Bluetooth:
     A class for the use of bluetooth
     """
 
-    def __init__(self, baudrate: int) -> None:
+    def __init__(
+        self, baudrate: int, uart_id: int = 0, rxbuf: int = 256, txbuf: int = 256
+    ) -> None:
         """
         set baudrate
+        :param baudrate: int, the baudrate of the bluetooth module
+        :param uart_id: int, the UART the bluetooth module is connected to
+        :param rxbuf: int, the size in bytes of the receive ring buffer
+        :param txbuf: int, the size in bytes of the transmit ring buffer,
+            writes that fit in it return without waiting
         """
-        self.uart = UART(0, baudrate)
+        self.uart = UART(uart_id, baudrate, rxbuf=rxbuf, txbuf=txbuf)
 
     def read_uart(self) -> bytes:
         """
@@ -21,8 +29,159 @@ class Bluetooth:
             return data
         return b""
 
+    def readinto(self, buf) -> int:
+        """
+        Read uart from your bluetooth module into a preallocated buffer, without waiting
+        :param buf: bytearray, the buffer to read into
+        :return: int, the amount of bytes read
+        """
+        if self.uart.any() > 0:
+            return self.uart.readinto(buf) or 0
+        return 0
+
     def write_uart(self, data: bytes) -> None:
         """
         write uart to your bluetooth module
         """
         self.uart.write(data)
+
+
+# pylint: disable=too-many-instance-attributes
+class MessageLink:
+    """
+    Sends and receives whole messages over a Bluetooth module or UART.
+
+    Every message is followed by a CRC-16, encoded with COBS and ended with a
+    zero byte. A receiver can therefore always find the start of the next
+    message, and damaged messages are dropped instead of returned.
+
+    All buffers are allocated once, so sending and receiving does not
+    allocate memory.
+    """
+
+    # pylint: disable=too-many-positional-arguments
+    def __init__(
+        self,
+        port,
+        max_payload: int = 64,
+        batch_size: int = 256,
+        rx_chunk: int = 64,
+    ):
+        """
+        Creates a message link
+        :param port: Bluetooth or UART, the connection to send the messages over
+        :param max_payload: int, the largest message in bytes
+        :param batch_size: int, the size of the buffer that collects queued messages
+        :param rx_chunk: int, the amount of bytes read from the UART at once
+        """
+        self.uart = getattr(port, "uart", port)
+        self.max_payload = max_payload
+        # COBS adds one byte per 254 bytes, plus the code byte and the delimiter
+        self._max_frame = max_payload + 2 + (max_payload + 2) // 254 + 2
+        if batch_size < self._max_frame:
+            raise ValueError(f"batch_size must be at least {self._max_frame}")
+        self._scratch = bytearray(max_payload + 2)
+        self._batch = bytearray(batch_size)
+        self._batch_view = memoryview(self._batch)
+        self._batch_length = 0
+        self._chunk = bytearray(rx_chunk)
+        self._chunk_position = 0
+        self._chunk_length = 0
+        self._frame = bytearray(self._max_frame)
+        self._frame_length = 0
+        self._frame_overflow = False
+        self._decoded = bytearray(max_payload + 2)
+        self._decoded_view = memoryview(self._decoded)
+        self.crc_errors = 0
+        self.dropped = 0
+
+    def send(self, payload) -> None:
+        """
+        Sends a message, together with the messages queued before
+        :param payload: bytes, the message
+        """
+        self.queue(payload)
+        self.flush()
+
+    def queue(self, payload) -> None:
+        """
+        Adds a message to the batch, the batch is sent when it is full or on flush
+        :param payload: bytes, the message
+        """
+        length = len(payload)
+        if length > self.max_payload:
+            raise ValueError(
+                f"Message is {length} bytes, the maximum is {self.max_payload}"
+            )
+        if self._batch_length + self._max_frame > len(self._batch):
+            self.flush()
+        scratch = self._scratch
+        scratch[:length] = payload
+        crc = crc16(scratch, length)
+        scratch[length] = crc >> 8
+        scratch[length + 1] = crc & 0xFF
+        end = cobs_encode(scratch, length + 2, self._batch, self._batch_length)
+        self._batch[end] = 0
+        self._batch_length = end + 1
+
+    def flush(self) -> None:
+        """
+        Sends the queued messages in one write
+        """
+        if self._batch_length:
+            self.uart.write(self._batch_view[: self._batch_length])
+            self._batch_length = 0
+
+    def receive(self):
+        """
+        Returns the next complete message, without waiting
+        :return: memoryview, the message, or None if no complete message was received.
+            The memoryview is only valid until the next call.
+        """
+        while True:
+            if self._chunk_position >= self._chunk_length:
+                if not self.uart.any():
+                    return None
+                self._chunk_length = self.uart.readinto(self._chunk) or 0
+                self._chunk_position = 0
+                if not self._chunk_length:
+                    return None
+            message = self._scan_chunk()
+            if message is not None:
+                return message
+
+    def _scan_chunk(self):
+        """
+        Moves received bytes into the frame until a delimiter completes a valid message
+        """
+        chunk = self._chunk
+        frame = self._frame
+        while self._chunk_position < self._chunk_length:
+            byte = chunk[self._chunk_position]
+            self._chunk_position += 1
+            if byte:
+                if self._frame_length < len(frame):
+                    frame[self._frame_length] = byte
+                    self._frame_length += 1
+                else:
+                    self._frame_overflow = True
+                continue
+            length = self._frame_length
+            overflow = self._frame_overflow
+            self._frame_length = 0
+            self._frame_overflow = False
+            if overflow:
+                self.dropped += 1
+                continue
+            if length == 0:
+                continue
+            decoded = cobs_decode(frame, length, self._decoded)
+            if decoded < 2:
+                self.dropped += 1
+                continue
+            crc = (self._decoded[decoded - 2] << 8) | self._decoded[decoded - 1]
+            if crc16(self._decoded, decoded - 2) != crc:
+                self.crc_errors += 1
+                continue
+            return self._decoded_view[: decoded - 2]
+        return None
@@ -0,0 +1,89 @@
+"""
+This module provides message framing: CRC-16 checksums and COBS encoding.
+
+It does not depend on the machine module, so it can also be used on a computer
+to decode messages sent by the robot.
+"""
+
+from array import array
+
+
+def _crc16_entry(index: int) -> int:
+    crc = index << 8
+    for _ in range(8):
+        crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+    return crc & 0xFFFF
+
+
+_CRC16_TABLE = array("H", [_crc16_entry(index) for index in range(256)])
+
+
+def crc16(data, length: int = None, crc: int = 0xFFFF) -> int:
+    """
+    Calculates the CRC-16/CCITT-FALSE checksum of data
+    :param data: bytes, the data
+    :param length: int, the amount of bytes to use, None for all
+    :param crc: int, the start value
+    :return: int, the checksum
+    """
+    table = _CRC16_TABLE
+    if length is None:
+        length = len(data)
+    for index in range(length):
+        crc = ((crc << 8) & 0xFF00) ^ table[((crc >> 8) ^ data[index]) & 0xFF]
+    return crc
+
+
+def cobs_encode(source, length: int, target, offset: int = 0) -> int:
+    """
+    Encodes data with Consistent Overhead Byte Stuffing, so it contains no zero bytes
+    :param source: bytes, the data to encode
+    :param length: int, the amount of bytes to encode
+    :param target: bytearray, the buffer to write the encoded data to
+    :param offset: int, the position in target to start writing
+    :return: int, the position in target after the encoded data
+    """
+    code_index = offset
+    out = offset + 1
+    code = 1
+    for index in range(length):
+        byte = source[index]
+        if byte:
+            target[out] = byte
+            out += 1
+            code += 1
+        if not byte or code == 0xFF:
+            target[code_index] = code
+            code_index = out
+            out += 1
+            code = 1
+    target[code_index] = code
+    return out
+
+
+def cobs_decode(source, length: int, target) -> int:
+    """
+    Decodes data encoded with cobs_encode
+    :param source: bytes, the encoded data, without the zero delimiter
+    :param length: int, the amount of bytes to decode
+    :param target: bytearray, the buffer to write the decoded data to
+    :return: int, the amount of decoded bytes, -1 if the data is invalid
+    """
+    index = 0
+    out = 0
+    while index < length:
+        code = source[index]
+        index += 1
+        end = index + code - 1
+        if code == 0 or end > length or out + code - 1 > len(target):
+            return -1
+        while index < end:
+            target[out] = source[index]
+            out += 1
+            index += 1
+        if code != 0xFF and index < length:
+            if out >= len(target):
+                return -1
+            target[out] = 0
+            out += 1
+    return out
@@ -7,8 +7,8 @@ def is_device_address_visible(i2c, target_address):
     """
     Check if a specific I2C address is visible on the bus.
 
-    Performs an I2C scan and checks if the target address is present
-    in the list of detected device addresses.
+    Probes only the target address (see probe_address) instead of scanning
+    the whole bus, so checking a device takes one transaction instead of 112.
 
     Args:
         i2c (machine.I2C): An initialized I2C object from the machine module.
@@ -17,9 +17,28 @@ def is_device_address_visible(i2c, target_address):
     Returns:
         bool: True if the target address is found on the bus, False otherwise.
     """
-    devices = i2c.scan()
-    is_visible = target_address in devices
-    return is_visible
+    return probe_address(i2c, target_address)
+
+
+def probe_address(i2c, target_address) -> bool:
+    """
+    Check if a device answers at a specific I2C address.
+
+    Writes zero bytes to the address, like i2c.scan() does for every address,
+    so only one address is tried instead of the whole bus.
+
+    Args:
+        i2c (machine.I2C): An initialized I2C object from the machine module.
+        target_address (int): The 7-bit I2C address to probe.
+
+    Returns:
+        bool: True if a device acknowledges the address, False otherwise.
+    """
+    try:
+        i2c.writeto(target_address, b"")
+    except OSError:
+        return False
+    return True
 
 
 def find_i2c_address(scl_pin: int, sda_pin: int) -> list[hex]:
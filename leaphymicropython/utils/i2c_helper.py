@@ -2,12 +2,23 @@
 
 import struct
 from machine import Pin, I2C
-from leaphymicropython.utils.i2c_address_finder import is_device_address_visible
+from utime import ticks_us, ticks_ms, ticks_diff, ticks_add
+from leaphymicropython.utils.i2c_address_finder import (
+    is_device_address_visible,
+    probe_address,
+)
 
+# The I2C buses the devices share: an I2CBusEntry by bus id
 i2c_bus_instances = {}
 
+# How long in ms scan_bus() reuses the last scan of a bus
+SCAN_CACHE_TTL_MS = 1000
+
 _I2C_ERROR_CODES = {5, 9, 110, 116}
 
+# The names of the methods wrapped by handle_i2c_errors, they get the slots of the PerfCounters
+_instrumented_methods = []
+
 
 def _is_recoverable_os_error(ex):
     """Check if an OSError has a known recoverable I2C error code."""
@@ -38,34 +49,114 @@ def handle_i2c_errors(func):
         The wrapped function.
     """
 
+    name = func.__name__
+    if name not in _instrumented_methods:
+        _instrumented_methods.append(name)
+
     def wrapper(*args, **kwargs):
         instance = args[0]
         if not isinstance(instance, I2CDevice):
             return func(*args, **kwargs)
 
+        # Only when the counters are enabled, the call is timed
+        perf_counters = instance.perf_counters
+        if perf_counters is not None:
+            start = ticks_us()
         result = None
+        failed = False
         try:
             if instance.reinitialize:
-                instance.initialize_i2c()
-                instance.find_device(show_warnings=instance.show_warnings)
-                instance.initialize_device()
-                instance.reinitialize = False
+                if instance.recover() and perf_counters is not None:
+                    perf_counters.record_initialization()
 
             if not instance.reinitialize:
                 instance.select_channel()
                 result = func(*args, **kwargs)
         except RuntimeError as ex:
+            failed = True
             _handle_error(instance, ex, set_reinitialize=True)
         except OSError as ex:
             if _is_recoverable_os_error(ex):
+                failed = True
                 _handle_error(instance, ex, set_reinitialize=True)
             else:
                 raise
+        if perf_counters is not None:
+            perf_counters.record(name, ticks_diff(ticks_us(), start), failed)
         return result
 
     return wrapper
 
 
+# pylint: disable=too-few-public-methods
+class I2CBusEntry:
+    """
+    An I2C bus in i2c_bus_instances, with the last scan of the bus.
+
+    The scan belongs to the entry, so when the bus is created again, its new
+    entry starts without a scan.
+    """
+
+    def __init__(self, i2c):
+        self.i2c = i2c
+        self.scan = None
+        self.scanned_at = 0
+
+
+def get_i2c_bus(
+    bus_id: int = 0,
+    sda_gpio_pin: int = 12,
+    scl_gpio_pin: int = 13,
+    freq: int = 400_000,
+) -> I2CBusEntry:
+    """
+    Returns the entry of a bus in i2c_bus_instances, and creates the bus if it is not there yet.
+
+    Args:
+        bus_id: The id of the bus.
+        sda_gpio_pin: The SDA pin, used when the bus is created.
+        scl_gpio_pin: The SCL pin, used when the bus is created.
+        freq: The frequency of the bus, used when the bus is created.
+
+    Returns:
+        I2CBusEntry: The entry with the machine.I2C object of the bus.
+    """
+    entry = i2c_bus_instances.get(bus_id)
+    if entry is None:
+        entry = I2CBusEntry(
+            I2C(id=bus_id, scl=Pin(scl_gpio_pin), sda=Pin(sda_gpio_pin), freq=freq)
+        )
+        i2c_bus_instances[bus_id] = entry
+    return entry
+
+
+def scan_bus(bus_id: int = 0, max_age_ms: int = None) -> list:
+    """
+    Scans an I2C bus, or returns the addresses of a recent scan of the bus.
+
+    A scan tries all 112 addresses, so it is kept in the entry of the bus in
+    i2c_bus_instances for SCAN_CACHE_TTL_MS: code that looks at the bus several
+    times shares one scan. A bus that does not exist yet is created with the
+    default pins. The drivers probe their own address instead, because a
+    device behind a multiplexer is only found on the channel that is selected.
+
+    Args:
+        bus_id: The id of the bus.
+        max_age_ms: The oldest scan in ms that is used, defaults to SCAN_CACHE_TTL_MS.
+
+    Returns:
+        list: The addresses that answered.
+    """
+    if max_age_ms is None:
+        max_age_ms = SCAN_CACHE_TTL_MS
+    entry = get_i2c_bus(bus_id)
+    now = ticks_ms()
+    if entry.scan is None or ticks_diff(now, entry.scanned_at) > max_age_ms:
+        entry.scan = entry.i2c.scan()
+        entry.scanned_at = now
+    return entry.scan
+
+
 def select_channel(i2c, multiplexer_address, channel_number) -> None:
     """
     Selects a channel on an I2C multiplexer.
@@ -91,6 +182,106 @@ def select_channel(i2c, multiplexer_address, channel_number) -> None:
         print("Invalid channel number. Please select a channel between 0 and 7 or 255.")
 
 
+# pylint: disable=too-many-instance-attributes
+class PerfCounters:
+    """
+    Counts the calls of the methods of an I2CDevice that handle_i2c_errors wraps.
+
+    For every method it keeps the amount of calls and errors, and the shortest,
+    longest and total time of a call in microseconds (ticks_us). Every method
+    has a slot in lists that are made when the counters are enabled, so
+    counting a call does not allocate memory. The calls that failed and the
+    (re)initializations of the device are counted too: a recovery is an
+    initialization after a failed call.
+
+    The trace function, if given, is called after every call with the name of
+    the method, the time in microseconds and whether the call failed.
+    """
+
+    def __init__(self, names, trace=None):
+        self.names = tuple(names)
+        self._slots = {name: slot for slot, name in enumerate(self.names)}
+        self.trace = trace
+        size = len(self.names)
+        self.calls = [0] * size
+        self.errors = [0] * size
+        self.total_us = [0] * size
+        self.min_us = [0] * size
+        self.max_us = [0] * size
+        self.initializations = 0
+        self.recoveries = 0
+        self._failed = False
+
+    def reset(self) -> None:
+        """
+        Sets all counters to zero
+        """
+        for slot in range(len(self.names)):
+            self.calls[slot] = 0
+            self.errors[slot] = 0
+            self.total_us[slot] = 0
+            self.min_us[slot] = 0
+            self.max_us[slot] = 0
+        self.initializations = 0
+        self.recoveries = 0
+        self._failed = False
+
+    def record(self, name: str, elapsed_us: int, failed: bool) -> None:
+        """
+        Counts a call of a method
+        :param name: str, the name of the method
+        :param elapsed_us: int, the time the call took in microseconds
+        :param failed: bool, True if an I2C error was caught
+        """
+        slot = self._slots.get(name)
+        if slot is not None:
+            calls = self.calls[slot]
+            if calls == 0 or elapsed_us < self.min_us[slot]:
+                self.min_us[slot] = elapsed_us
+            if elapsed_us > self.max_us[slot]:
+                self.max_us[slot] = elapsed_us
+            self.calls[slot] = calls + 1
+            self.total_us[slot] += elapsed_us
+            if failed:
+                self.errors[slot] += 1
+        if failed:
+            self._failed = True
+        if self.trace is not None:
+            self.trace(name, elapsed_us, failed)
+
+    def record_initialization(self) -> None:
+        """
+        Counts an initialization of the device, it is a recovery after a failed call
+        """
+        self.initializations += 1
+        if self._failed:
+            self.recoveries += 1
+            self._failed = False
+
+    def snapshot(self) -> dict:
+        """
+        :return: dict, the initializations, recoveries and errors of the device, and for
+            every method that was called its calls, errors, min_us, max_us and mean_us
+        """
+        methods = {}
+        for slot, name in enumerate(self.names):
+            calls = self.calls[slot]
+            if calls:
+                methods[name] = {
+                    "calls": calls,
+                    "errors": self.errors[slot],
+                    "min_us": self.min_us[slot],
+                    "max_us": self.max_us[slot],
+                    "mean_us": self.total_us[slot] // calls,
+                }
+        return {
+            "initializations": self.initializations,
+            "recoveries": self.recoveries,
+            "errors": sum(self.errors),
+            "methods": methods,
+        }
+
+
 # pylint: disable=too-many-positional-arguments
 # pylint: disable=too-many-instance-attributes
 class I2CDevice:
@@ -104,6 +295,10 @@ class I2CDevice:
 
     MULTIPLEXER_ADDRESS = 0x70
     ADDRESS = None
+    # The first wait in ms before a device that does not answer is tried again,
+    # it doubles with every failed recovery up to the maximum
+    RECOVERY_BACKOFF_MS = 20
+    RECOVERY_BACKOFF_MAX_MS = 1000
 
     def __init__(
         self,
@@ -123,6 +318,35 @@ class I2CDevice:
         self.freq: int = freq
         self.show_warnings: bool = show_warnings
         self._mux_used = None
+        self.perf_counters = None
+        self._reset_failed = False
+        self._backoff_ms = 0
+        self._retry_at = None
+
+    def enable_perf_counters(self, trace=None) -> PerfCounters:
+        """
+        Starts counting the calls of the methods of the device, see PerfCounters.
+
+        The counters are off by default, then the methods are not timed at all.
+
+        Args:
+            trace (function, optional): Called after every call with the name of the
+            method, the time in microseconds and whether it failed.
+
+        Returns:
+            The PerfCounters, perf_counters.snapshot() returns them as a dict.
+        """
+        cls = type(self)
+        self.perf_counters = PerfCounters(
+            [name for name in _instrumented_methods if hasattr(cls, name)], trace
+        )
+        return self.perf_counters
+
+    def disable_perf_counters(self) -> None:
+        """
+        Stops counting the calls of the methods of the device.
+        """
+        self.perf_counters = None
 
     def initialize_i2c(self) -> None:
         """
@@ -132,22 +356,81 @@ class I2CDevice:
         It is called during the initialization of the I2C device.
         """
 
-        if self.bus_id in i2c_bus_instances:
-            self.i2c = i2c_bus_instances[self.bus_id]
-        else:
-            self.i2c = I2C(
-                id=self.bus_id,
-                scl=Pin(self.scl_gpio_pin),
-                sda=Pin(self.sda_gpio_pin),
-                freq=self.freq,
-            )
-            i2c_bus_instances[self.bus_id] = self.i2c
+        self.i2c = get_i2c_bus(
+            self.bus_id, self.sda_gpio_pin, self.scl_gpio_pin, self.freq
+        ).i2c
 
     def initialize_device(self) -> None:
         """
         Abstract method. Initializes the I2C device attached to the bus.
         """
 
+    def reset_device(self) -> bool:
+        """
+        Resets the device after a failed call, faster than initialize_device().
+
+        Called when the device answers again after a failed call. Devices that
+        keep their configuration, or can restore it from what they learned in
+        the first initialization, override this.
+
+        Returns:
+            bool: True if the device is ready, False if it has to be initialized again.
+        """
+        return False
+
+    def recover(self) -> bool:
+        """
+        Makes the device ready after a failed call, or the first time it is used.
+
+        The recovery is done in tiers, so a loose cable does not cost a bus scan
+        and a new initialization: first only the address of the device is probed,
+        a device that answers gets a light reset (reset_device()), and only if
+        that is not enough or failed before it is initialized again. When the
+        device does not answer, it is only tried again after a backoff that
+        doubles every time, so a missing device does not keep the bus busy.
+
+        Returns:
+            bool: True if the device is ready.
+        """
+        if self._retry_at is not None:
+            if ticks_diff(self._retry_at, ticks_ms()) > 0:
+                return False
+        if self.i2c is None:
+            self.initialize_i2c()
+            self.find_device(show_warnings=self.show_warnings)
+            self._reset_failed = True
+        else:
+            self.select_channel()
+            if not probe_address(self.i2c, self.ADDRESS):
+                if self.show_warnings:
+                    print(
+                        f"can not find device (address should be {hex(self.ADDRESS)})"
+                    )
+                self._back_off()
+                return False
+        try:
+            if self._reset_failed or not self.reset_device():
+                self.initialize_device()
+        except (OSError, RuntimeError):
+            self._reset_failed = True
+            self._back_off()
+            raise
+        self._reset_failed = False
+        self._backoff_ms = 0
+        self._retry_at = None
+        self.reinitialize = False
+        return True
+
+    def _back_off(self) -> None:
+        """
+        Doubles the time until the next recovery
+        """
+        self._backoff_ms = min(
+            max(2 * self._backoff_ms, self.RECOVERY_BACKOFF_MS),
+            self.RECOVERY_BACKOFF_MAX_MS,
+        )
+        self._retry_at = ticks_add(ticks_ms(), self._backoff_ms)
+
     def find_device(self, show_warnings=True) -> None:
         """Finds the I2C device on the bus.
 
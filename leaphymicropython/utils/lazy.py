@@ -0,0 +1,25 @@
+"""
+This module lets a package import its modules only when they are used.
+"""
+
+
+def lazy_getattr(package: str, names: dict, namespace: dict):
+    """
+    Makes a module __getattr__ that imports the module of a name the first time it is used
+    :param package: str, the name of the package, __name__ in its __init__.py
+    :param names: dict, for every name the module in the package that defines it
+    :param namespace: dict, the globals() of the package
+    :return: function, the __getattr__ of the package
+    """
+
+    def getattr_(name):
+        module_name = names.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package} has no attribute {name}")
+        module = __import__(f"{package}.{module_name}", None, None, [name])
+        value = getattr(module, name)
+        # Later lookups find the name directly, without calling __getattr__
+        namespace[name] = value
+        return value
+
+    return getattr_
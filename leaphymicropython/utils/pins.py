@@ -1,4 +1,31 @@
-from machine import Pin, PWM, ADC
+from array import array
+from machine import Pin, PWM, ADC, Timer
+import machine
+
+try:
+    import rp2
+except ImportError:
+    rp2 = None
+
+adc_instances = {}
+
+# RP2040 ADC registers, see section 4.9.6 of the RP2040 datasheet
+_ADC_BASE = 0x4004C000
+_ADC_CS = _ADC_BASE + 0x00
+_ADC_FCS = _ADC_BASE + 0x08
+_ADC_FIFO = _ADC_BASE + 0x0C
+_ADC_DIV = _ADC_BASE + 0x10
+_ADC_CS_EN = 1 << 0
+_ADC_CS_START_MANY = 1 << 3
+_ADC_FCS_EN = 1 << 0
+_ADC_FCS_DREQ_EN = 1 << 3
+_ADC_FCS_UNDER = 1 << 10
+_ADC_FCS_OVER = 1 << 11
+_ADC_FCS_THRESH_1 = 1 << 24
+_ADC_FCS_LEVEL_MASK = 0xF << 16
+_DREQ_ADC = 36
+_ADC_CLOCK_HZ = 48_000_000
+_ADC_MAX_CONVERSIONS_PER_SECOND = 500_000
 
 
 def get_analog_pin(pin_name: str) -> ADC:
@@ -65,11 +92,276 @@ def read_pin(pin: str) -> int:
     return pin_obj.value()
 
 
-def read_analog(pin: str) -> int:
+def read_analog(pin: str, oversample: int = 1) -> int:
     """
     reads an analog pin
     :param pin: the pin to read
+    :param oversample: int, the amount of conversions that are averaged, must be a power of 2
     :return: returns the value
     """
-    adcpin = ADC(Pin(pin))
-    return adcpin.read_u16()
+    adcpin = adc_instances.get(pin)
+    if adcpin is None:
+        adcpin = ADC(Pin(pin))
+        adc_instances[pin] = adcpin
+    if oversample == 1:
+        return adcpin.read_u16()
+    shift = _oversample_shift(oversample)
+    total = 0
+    for _ in range(oversample):
+        total += adcpin.read_u16()
+    return total >> shift
+
+
+def _oversample_shift(oversample: int) -> int:
+    """
+    Validates an oversample factor
+    :param oversample: int, the amount of conversions per sample
+    :return: int, the amount of bits to shift the sum of the conversions with
+    """
+    if oversample < 1 or oversample & (oversample - 1):
+        raise ValueError(
+            f"Oversample must be a power of 2 (1, 2, 4, ...), your oversample is {oversample}"
+        )
+    shift = 0
+    while (1 << shift) < oversample:
+        shift += 1
+    return shift
+
+
+def _adc_channel(adc: ADC):
+    """
+    Finds the hardware channel of an ADC object
+    :param adc: ADC, the adc to inspect
+    :return: int, the channel, or None if it can not be determined
+    """
+    # The rp2 port prints ADC objects as <ADC channel=0>
+    description = repr(adc)
+    index = description.find("channel=")
+    if index < 0:
+        return None
+    digits = ""
+    for char in description[index + 8 :]:
+        if not "0" <= char <= "9":
+            break
+        digits += char
+    return int(digits) if digits else None
+
+
+# pylint: disable=too-many-instance-attributes
+class AnalogSampler:
+    """
+    Samples one or more analog pins at a fixed rate into a preallocated buffer.
+
+    The samples are stored interleaved, so sample i of pin number j (the index in pins)
+    is at buffer[i * len(pins) + j]. Every sample is a 16-bit value, like ADC.read_u16.
+
+    On the RP2040 the ADC free-running mode is used together with the ADC FIFO and a
+    DMA channel, which gives jitter-free sampling up to 500.000 conversions per second
+    in total. On other boards, or when DMA is not available, a machine.Timer reads the
+    pins in its callback instead.
+
+    With oversample, every sample is the average of several conversions. This lowers
+    the maximum rate, but the noise is averaged out and the low bits of the sample
+    contain real resolution instead of a copy of the high bits.
+    """
+
+    # pylint: disable=too-many-positional-arguments
+    def __init__(
+        self,
+        pins,
+        rate: int,
+        samples: int,
+        oversample: int = 1,
+        use_dma: bool = True,
+    ):
+        """
+        Creates an analog sampler
+        :param pins: list[str], the analog pins to sample
+        :param rate: int, the amount of samples per second (per pin)
+        :param samples: int, the amount of samples per pin in one capture
+        :param oversample: int, the amount of conversions averaged per sample, a power of 2
+        :param use_dma: bool, use the ADC FIFO and DMA if available
+        """
+        if isinstance(pins, str):
+            pins = [pins]
+        if rate <= 0 or samples <= 0:
+            raise ValueError("Rate and samples must be larger than 0")
+        self._shift = _oversample_shift(oversample)
+        self.oversample = oversample
+        self.rate = rate
+        self.samples = samples
+        self.adcs = [get_analog_pin(pin) for pin in pins]
+        self.buffer = array("H", bytes(2 * samples * len(self.adcs)))
+        self.done = True
+        self._callback = None
+        self._timer = None
+        self._index = 0
+        self._dma = None
+        self._raw = None
+        self._raw_slots = None
+        self._channel_mask = 0
+        self._first_channel = 0
+        if use_dma and self._dma_supported():
+            self._setup_dma()
+
+    @property
+    def uses_dma(self) -> bool:
+        """
+        :return: True if the samples are taken with the ADC FIFO and DMA
+        """
+        return self._raw is not None
+
+    def _dma_supported(self) -> bool:
+        if rp2 is None or not hasattr(rp2, "DMA") or not hasattr(machine, "mem32"):
+            return False
+        channels = [_adc_channel(adc) for adc in self.adcs]
+        if None in channels or len(set(channels)) != len(channels):
+            return False
+        conversions = self.rate * len(self.adcs) * self.oversample
+        return conversions <= _ADC_MAX_CONVERSIONS_PER_SECOND
+
+    def _setup_dma(self):
+        channels = [_adc_channel(adc) for adc in self.adcs]
+        # In round robin mode the ADC converts the channels in ascending order
+        ordered = sorted(channels)
+        self._raw_slots = [ordered.index(channel) for channel in channels]
+        for channel in channels:
+            self._channel_mask |= 1 << channel
+        self._first_channel = ordered[0]
+        raw_length = self.samples * len(self.adcs) * self.oversample
+        self._raw = array("H", bytes(2 * raw_length))
+        self._dma = rp2.DMA()
+
+    def capture(self):
+        """
+        Takes a full set of samples and waits until it is finished
+        :return: array, the buffer with the samples
+        """
+        self.start()
+        while not self.done:
+            machine.idle()
+        return self.buffer
+
+    def start(self, callback=None):
+        """
+        Starts taking samples in the background.
+        The done attribute becomes True when the buffer is full.
+        :param callback: function, called with this sampler when the buffer is full
+        """
+        self.stop()
+        self._callback = callback
+        self.done = False
+        if self.uses_dma:
+            self._start_dma()
+        else:
+            self._index = 0
+            self._timer = Timer(
+                mode=Timer.PERIODIC, freq=self.rate, callback=self._timer_tick
+            )
+
+    def stop(self):
+        """
+        Stops taking samples, the buffer keeps the samples taken so far.
+        The done attribute becomes True.
+        """
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+        if self._dma is not None and self._dma.active():
+            self._dma.active(0)
+            self._stop_adc()
+        self.done = True
+
+    def average(self, pin_index: int = 0) -> int:
+        """
+        Averages the samples of one pin in the buffer
+        :param pin_index: int, the index of the pin in the list of pins
+        :return: int, the average of the samples
+        """
+        step = len(self.adcs)
+        total = 0
+        for index in range(pin_index, len(self.buffer), step):
+            total += self.buffer[index]
+        return total // self.samples
+
+    def _finish(self):
+        self.done = True
+        if self._callback is not None:
+            self._callback(self)
+
+    def _timer_tick(self, _timer):
+        shift = self._shift
+        index = self._index
+        for adc in self.adcs:
+            total = 0
+            for _ in range(self.oversample):
+                total += adc.read_u16()
+            self.buffer[index] = total >> shift
+            index += 1
+        self._index = index
+        if index >= len(self.buffer):
+            self._timer.deinit()
+            self._timer = None
+            self._finish()
+
+    def _start_dma(self):
+        mem32 = machine.mem32
+        conversions = self.rate * len(self.adcs) * self.oversample
+        # The ADC takes (DIV + 1) clock cycles per conversion, DIV has 8 fractional bits
+        mem32[_ADC_DIV] = (_ADC_CLOCK_HZ * 256) // conversions - 256
+        mem32[_ADC_FCS] = _ADC_FCS_EN | _ADC_FCS_DREQ_EN | _ADC_FCS_THRESH_1
+        while mem32[_ADC_FCS] & _ADC_FCS_LEVEL_MASK:
+            _ = mem32[_ADC_FIFO]
+        # UNDER and OVER are cleared by writing 1, ERR is a setting and stays off
+        mem32[_ADC_FCS] |= _ADC_FCS_UNDER | _ADC_FCS_OVER
+        # The IRQ of a DMA channel is quiet by default, then _dma_done is never called
+        control = self._dma.pack_ctrl(
+            size=1,
+            inc_read=False,
+            inc_write=True,
+            treq_sel=_DREQ_ADC,
+            irq_quiet=False,
+        )
+        self._dma.irq(handler=self._dma_done)
+        self._dma.config(
+            read=_ADC_FIFO,
+            write=self._raw,
+            count=len(self._raw),
+            ctrl=control,
+            trigger=True,
+        )
+        mem32[_ADC_CS] = (
+            _ADC_CS_EN
+            | (self._first_channel << 12)
+            | (self._channel_mask << 16)
+            | _ADC_CS_START_MANY
+        )
+
+    def _stop_adc(self):
+        mem32 = machine.mem32
+        mem32[_ADC_CS] = _ADC_CS_EN
+        mem32[_ADC_FCS] = 0
+        mem32[_ADC_DIV] = 0
+        while mem32[_ADC_FCS] & _ADC_FCS_LEVEL_MASK:
+            _ = mem32[_ADC_FIFO]
+
+    def _dma_done(self, _dma):
+        self._stop_adc()
+        self._reduce()
+        self._finish()
+
+    def _reduce(self):
+        pins = len(self.adcs)
+        oversample = self.oversample
+        shift = self._shift
+        raw = self._raw
+        index = 0
+        for sample in range(self.samples):
+            start = sample * oversample * pins
+            for slot in self._raw_slots:
+                total = 0
+                for position in range(start + slot, start + oversample * pins, pins):
+                    total += raw[position]
+                # The FIFO contains 12-bit conversions, scale them to 16 bits
+                self.buffer[index] = (total << 4) >> shift
+                index += 1
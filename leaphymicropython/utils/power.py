@@ -0,0 +1,222 @@
+"""
+This module saves power by sleeping between the jobs of a Scheduler.
+
+An IdleManager runs the jobs of a Scheduler and, in between, sleeps until
+the next job is due with machine.lightsleep() (or machine.idle() for short
+waits). Sensors that are only read by a job can be put in standby while the
+job is far away, and are woken up just in time for the next reading.
+"""
+
+import machine
+from leaphymicropython.utils.timeschedule import Scheduler
+
+# Time in milliseconds a sensor needs after waking up before it can be read
+BMP280_WAKE_MS = 45
+VL53L0X_WAKE_MS = 35
+
+
+def _standby_functions(device):
+    """
+    Finds out how to put a sensor in standby
+    :param device: BarometricPressure, TimeOfFlight, BMP280, VL53L0X, or an
+        object with standby() and wake() methods
+    :return: tuple, the standby function, the wake function and the wake up time in ms
+    """
+    if hasattr(device, "standby") and hasattr(device, "wake"):
+        # The I2CDevice classes look up their driver on every call, so this works
+        # before the first reading and after a recovery, and handles I2C errors
+        return device.standby, device.wake, getattr(device, "wake_ms", 0)
+    if hasattr(device, "force_measure"):
+        # BMP280: sleep mode, and a single measurement in forced mode to wake up
+        return device.sleep, device.force_measure, BMP280_WAKE_MS
+    if hasattr(device, "started"):
+        # VL53L0X: stop continuous ranging, and start again with the same period
+        period = [None]
+
+        def standby():
+            period[0] = device.period if device.started else None
+            if period[0] is not None:
+                device.stop()
+
+        def wake():
+            if period[0] is not None:
+                device.start(period[0])
+
+        return standby, wake, VL53L0X_WAKE_MS
+    raise ValueError(f"Don't know how to put {type(device).__name__} in standby")
+
+
+# pylint: disable=too-many-instance-attributes
+class IdleManager:
+    """
+    Runs the jobs of a Scheduler and sleeps until the next one is due.
+
+    The manager keeps track of the time spent running jobs and sleeping, see
+    stats(). While the robot sleeps with lightsleep(), USB serial may stop and
+    PWM and timers may pause, so use lightsleep only for battery robots that
+    do all their work in the jobs.
+    """
+
+    # pylint: disable=too-many-positional-arguments
+    def __init__(
+        self,
+        scheduler: Scheduler = None,
+        use_lightsleep: bool = True,
+        min_lightsleep_ms: int = 10,
+        min_standby_ms: int = 100,
+        lightsleep=None,
+        idle=None,
+    ):
+        """
+        Creates an idle manager
+        :param scheduler: Scheduler, the scheduler with the jobs, a new one if None
+        :param use_lightsleep: bool, if False, only use machine.idle()
+        :param min_lightsleep_ms: int, shorter waits use machine.idle()
+        :param min_standby_ms: int, a sensor is put in standby when its job is
+            at least this many milliseconds (plus its wake up time) away
+        :param lightsleep: function, sleeps for the given milliseconds, machine.lightsleep if None
+        :param idle: function, waits for the next interrupt, machine.idle if None
+        """
+        self.scheduler = Scheduler() if scheduler is None else scheduler
+        self.use_lightsleep = use_lightsleep
+        self.min_lightsleep_ms = min_lightsleep_ms
+        self.min_standby_ms = min_standby_ms
+        self._lightsleep = machine.lightsleep if lightsleep is None else lightsleep
+        self._idle = machine.idle if idle is None else idle
+        # For every sensor: job, standby function, wake function, wake up time, in standby
+        self._devices = []
+        self.reset_stats()
+
+    def every(self, period_ms: int, callback, *args, device=None, wake_ms: int = None):
+        """
+        Runs a function every period_ms milliseconds, see Scheduler.every()
+        :param device: the sensor read by the function, put in standby in between, None for no sensor
+        :param wake_ms: int, the wake up time of the sensor, None for the default of the sensor
+        :return: Job, the job, use job.cancel() to stop it
+        """
+        job = self.scheduler.every(period_ms, callback, *args)
+        if device is not None:
+            self.add_device(job, device, wake_ms)
+        return job
+
+    def after(self, delay_ms: int, callback, *args):
+        """
+        Runs a function once, after delay_ms milliseconds, see Scheduler.after()
+        """
+        return self.scheduler.after(delay_ms, callback, *args)
+
+    def add_device(self, job, device, wake_ms: int = None):
+        """
+        Puts a sensor in standby while the job that reads it is far away
+        :param job: Job, the job that reads the sensor
+        :param device: BarometricPressure, TimeOfFlight, BMP280, VL53L0X, or an
+            object with standby() and wake() methods
+        :param wake_ms: int, the wake up time of the sensor, None for the default of the sensor
+        """
+        standby, wake, default_wake_ms = _standby_functions(device)
+        if wake_ms is None:
+            wake_ms = default_wake_ms
+        self._devices.append([job, standby, wake, wake_ms, False])
+
+    def reset_stats(self):
+        """
+        Sets the statistics to zero
+        """
+        self.active_ms = 0
+        self.sleep_ms = 0
+        self.lightsleeps = 0
+        self.idles = 0
+        self.standbys = 0
+
+    def stats(self) -> dict:
+        """
+        :return: dict, the time running and sleeping in ms, the duty cycle in percent,
+            and the amount of lightsleeps, idle waits and sensor standbys
+        """
+        total = self.active_ms + self.sleep_ms
+        return {
+            "active_ms": self.active_ms,
+            "sleep_ms": self.sleep_ms,
+            "duty_cycle": 100 * self.active_ms // total if total else 100,
+            "lightsleeps": self.lightsleeps,
+            "idles": self.idles,
+            "standbys": self.standbys,
+        }
+
+    def _update_devices(self, now: int):
+        """
+        Puts sensors in standby or wakes them up
+        :return: int, the time in ms until a sensor has to wake up, None if none is in standby
+        """
+        next_wake = None
+        cancelled = False
+        for device in self._devices:
+            job, standby, wake, wake_ms, in_standby = device
+            if job.cancelled:
+                if in_standby:
+                    wake()
+                    device[4] = False
+                cancelled = True
+                continue
+            until_wake = job.due - now - wake_ms
+            if not in_standby and until_wake >= self.min_standby_ms:
+                standby()
+                device[4] = in_standby = True
+                self.standbys += 1
+            elif in_standby and until_wake <= 0:
+                wake()
+                device[4] = in_standby = False
+            if in_standby and (next_wake is None or until_wake < next_wake):
+                next_wake = until_wake
+        if cancelled:
+            self._devices = [
+                device for device in self._devices if not device[0].cancelled
+            ]
+        return next_wake
+
+    def _sleep(self, wait: int):
+        """
+        Sleeps for wait milliseconds
+        """
+        scheduler = self.scheduler
+        if self.use_lightsleep and wait >= self.min_lightsleep_ms:
+            self._lightsleep(wait)
+            self.lightsleeps += 1
+            return
+        # idle() returns on the next interrupt, at least every millisecond
+        end = scheduler.now() + wait
+        while scheduler.now() < end:
+            self._idle()
+        self.idles += 1
+
+    def run_pending(self) -> int:
+        """
+        Runs the jobs that are due and updates the sensors
+        :return: int, the time in milliseconds until the manager has to run again, None if there are no jobs
+        """
+        scheduler = self.scheduler
+        start = scheduler.now()
+        scheduler.run_pending()
+        now = scheduler.now()
+        next_wake = self._update_devices(now)
+        wait = scheduler.time_until_next()
+        if next_wake is not None and (wait is None or next_wake < wait):
+            wait = next_wake
+        self.active_ms += scheduler.now() - start
+        return wait
+
+    def run(self, duration_ms: int = None):
+        """
+        Runs the jobs and sleeps in between, until duration_ms has passed or no jobs are left
+        :param duration_ms: int, the time in milliseconds to run, forever if None
+        """
+        scheduler = self.scheduler
+        end = None if duration_ms is None else scheduler.now() + duration_ms
+        while True:
+            wait = scheduler.limit_wait(self.run_pending(), end)
+            if wait is None:
+                return
+            if wait > 0:
+                start = scheduler.now()
+                self._sleep(wait)
+                self.sleep_ms += scheduler.now() - start
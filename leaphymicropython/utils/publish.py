@@ -0,0 +1,605 @@
+"""
+This module publishes sensor data over a persistent MQTT or HTTP connection.
+
+The connection is opened once and reused, so the TCP (and TLS) setup is not
+paid for every upload. Messages are collected in batches, and the batches
+wait in a bounded buffer until the socket accepts them. When the link is too
+slow and the buffer is full, queue() returns False and the new message is
+dropped, so the robot never blocks on the network.
+
+poll() and flush() also connect without waiting: the connection is set up
+over several calls and given up after timeout_ms. Only the first connection
+waits for the name of the host to be looked up, the address is kept for the
+reconnects, and the handshake waits for a server that accepted the connection.
+
+MQTTPublisher and HTTPPublisher have the queue/flush methods of a MessageLink,
+so they can be given to a TelemetryPublisher directly.
+"""
+
+import errno
+import select
+import socket
+import struct
+from utime import ticks_ms, ticks_diff, ticks_add, sleep_ms
+
+_WOULD_BLOCK = (errno.EAGAIN, getattr(errno, "EWOULDBLOCK", errno.EAGAIN))
+
+
+# pylint: disable=too-many-instance-attributes
+class _BatchingConnection:
+    """
+    Base class for a reusable connection that sends batches of messages.
+
+    Every message in a batch is prefixed with its length (one byte), so the
+    receiver can split the batch again. The pending buffer holds whole
+    packets; after a reconnect, a packet that was sent halfway is sent again
+    from the start.
+    """
+
+    # Keep a packet in the pending buffer until the server replied to it
+    _WAIT_FOR_REPLY = False
+
+    # pylint: disable=too-many-positional-arguments
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        use_ssl: bool = False,
+        max_batch: int = 512,
+        max_delay_ms: int = 1000,
+        max_pending: int = 4096,
+        timeout_ms: int = 5000,
+        reconnect_ms: int = 5000,
+    ):
+        """
+        :param host: str, the host name or ip address of the server
+        :param port: int, the port of the server
+        :param use_ssl: bool, if True, use TLS
+        :param max_batch: int, the size in bytes of a batch
+        :param max_delay_ms: int, the longest time in milliseconds a message waits in a batch
+        :param max_pending: int, the amount of bytes that may wait for the socket
+        :param timeout_ms: int, the time in milliseconds connecting and the handshake may take
+        :param reconnect_ms: int, the time in milliseconds between two connection attempts
+        """
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.max_delay_ms = max_delay_ms
+        self.timeout_ms = timeout_ms
+        self.reconnect_ms = reconnect_ms
+        self.sock = None
+        self._address = None
+        # The socket that is connecting, poll() checks if it is ready
+        self._connecting = None
+        self._connect_poller = None
+        self._connect_started = 0
+        self._batch = bytearray(max_batch)
+        self._batch_length = 0
+        self._batch_started = 0
+        self._pending = bytearray(max_pending)
+        self._pending_view = memoryview(self._pending)
+        self._pending_length = 0
+        # Sizes of the packets in the pending buffer, and the bytes of the first one written
+        self._packets = []
+        self._written = 0
+        self._waiting_for_reply = False
+        self._next_attempt = ticks_ms()
+        self._has_connected = False
+        self.batches = 0
+        self.dropped = 0
+        self.reconnects = 0
+
+    def _check_sizes(self):
+        """
+        Checks that a full batch fits in the pending buffer, called by the subclasses
+        """
+        if self._packet_length(len(self._batch)) > len(self._pending):
+            raise ValueError(
+                f"max_pending must be at least {self._packet_length(len(self._batch))}"
+            )
+
+    @property
+    def connected(self) -> bool:
+        """
+        :return: True if the connection is open
+        """
+        return self.sock is not None
+
+    @property
+    def pending(self) -> int:
+        """
+        :return: int, the amount of bytes waiting for the socket
+        """
+        return self._pending_length
+
+    def open(self):
+        """
+        Opens the connection, waiting at most timeout_ms. poll() connects without waiting.
+        """
+        self._start_connect()
+        try:
+            while not self._finish_connect():
+                sleep_ms(1)
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        """
+        Closes the connection, the batches that were not sent yet are kept
+        """
+        if self._connecting is not None:
+            self._connecting.close()
+            self._connecting = None
+            self._connect_poller = None
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def _start_connect(self):
+        """
+        Starts connecting without waiting, _finish_connect() checks if it is done
+        """
+        self.close()
+        if self._address is None:
+            self._address = socket.getaddrinfo(self.host, self.port)[0][-1]
+        sock = socket.socket()
+        sock.setblocking(False)
+        try:
+            sock.connect(self._address)
+        except OSError as ex:
+            if ex.errno != errno.EINPROGRESS:
+                sock.close()
+                raise
+        self._connecting = sock
+        self._connect_poller = select.poll()
+        self._connect_poller.register(sock, select.POLLOUT)
+        self._connect_started = ticks_ms()
+
+    def _finish_connect(self) -> bool:
+        """
+        Sets up the connection once the server accepted it
+        :return: bool, True if the connection is open, False if it is still connecting
+        """
+        events = self._connect_poller.poll(0)
+        if not events:
+            if ticks_diff(ticks_ms(), self._connect_started) >= self.timeout_ms:
+                raise OSError(errno.ETIMEDOUT, "connecting timed out")
+            return False
+        if events[0][1] & (select.POLLERR | select.POLLHUP):
+            raise OSError(errno.ECONNREFUSED, "connection refused")
+        sock = self._connecting
+        self._connecting = None
+        self._connect_poller = None
+        try:
+            sock.setblocking(True)
+            sock.settimeout(self.timeout_ms / 1000)
+            if self.use_ssl:
+                import ssl  # pylint: disable=import-outside-toplevel
+
+                context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+                sock = context.wrap_socket(sock, server_hostname=self.host)
+            self.sock = sock
+            self._handshake()
+            sock.setblocking(False)
+        except OSError:
+            sock.close()
+            self.sock = None
+            raise
+        self._written = 0
+        self._waiting_for_reply = False
+        if self._has_connected:
+            self.reconnects += 1
+        self._has_connected = True
+        return True
+
+    def queue(self, message) -> bool:
+        """
+        Adds a message to the batch
+        :param message: bytes, the message, up to 255 bytes
+        :return: bool, False if the message was dropped because the link is too slow
+        """
+        length = len(message)
+        if length > 0xFF or length + 1 > len(self._batch):
+            raise ValueError(
+                f"Message is {length} bytes, the maximum is {min(0xFF, len(self._batch) - 1)}"
+            )
+        if self._batch_length + length + 1 > len(self._batch):
+            if not self._close_batch():
+                self.dropped += 1
+                return False
+        if not self._batch_length:
+            self._batch_started = ticks_ms()
+        self._batch[self._batch_length] = length
+        self._batch[self._batch_length + 1 : self._batch_length + 1 + length] = message
+        self._batch_length += length + 1
+        return True
+
+    def flush(self, force: bool = False) -> None:
+        """
+        Sends the batch when it is older than max_delay_ms, and handles the connection
+        :param force: bool, if True, send the batch now
+        """
+        if self._batch_length and (
+            force or ticks_diff(ticks_ms(), self._batch_started) >= self.max_delay_ms
+        ):
+            self._close_batch()
+        self.poll()
+
+    def poll(self) -> None:
+        """
+        Sends waiting data, reads replies and reconnects when needed, without waiting
+        """
+        if self.sock is None:
+            if self._connecting is None and (
+                not self._packets or ticks_diff(ticks_ms(), self._next_attempt) < 0
+            ):
+                return
+            try:
+                if self._connecting is None:
+                    self._start_connect()
+                if not self._finish_connect():
+                    return
+            except OSError:
+                self.close()
+                # The next attempt is planned from the end of this one
+                self._next_attempt = ticks_add(ticks_ms(), self.reconnect_ms)
+                return
+        try:
+            self._receive()
+            self._send_pending()
+        except OSError:
+            self.close()
+
+    def _add_packet(self, packet) -> bool:
+        """
+        Adds a ready made packet to the pending buffer
+        :return: bool, False if there was no room and the packet was dropped
+        """
+        end = self._pending_length + len(packet)
+        if end > len(self._pending):
+            self.dropped += 1
+            return False
+        self._pending[self._pending_length : end] = packet
+        self._pending_length = end
+        self._packets.append(len(packet))
+        return True
+
+    def _close_batch(self) -> bool:
+        """
+        Moves the batch to the pending buffer as one packet
+        :return: bool, False if there was no room, the batch is then kept
+        """
+        length = self._batch_length
+        start = self._pending_length
+        if start + self._packet_length(length) > len(self._pending):
+            return False
+        self._batch_length = 0
+        end = self._write_packet(self._pending, start, memoryview(self._batch)[:length])
+        self._pending_length = end
+        self._packets.append(end - start)
+        self.batches += 1
+        return True
+
+    def _release(self, size: int):
+        """
+        Removes size bytes of finished packets from the front of the pending buffer
+        """
+        remaining = self._pending_length - size
+        self._pending_view[:remaining] = self._pending_view[size : self._pending_length]
+        self._pending_length = remaining
+        self._written -= size
+
+    def _send_pending(self):
+        if not self._packets or self._waiting_for_reply:
+            return
+        end = self._packets[0] if self._WAIT_FOR_REPLY else self._pending_length
+        written = self._write_data(self._pending_view[self._written : end])
+        if not written:
+            return
+        self._written += written
+        self._sent()
+        if self._WAIT_FOR_REPLY:
+            self._waiting_for_reply = self._written == self._packets[0]
+            return
+        done = 0
+        while self._packets and self._written - done >= self._packets[0]:
+            done += self._packets.pop(0)
+        self._release(done)
+
+    def _receive(self):
+        while True:
+            data = self._read_data()
+            if not data:
+                return
+            self._handle_reply(data)
+
+    def _write_data(self, data) -> int:
+        """
+        Writes to the socket without waiting
+        :return: int, the amount of bytes written
+        """
+        try:
+            if hasattr(self.sock, "write"):
+                written = self.sock.write(data)
+            else:
+                written = self.sock.send(data)
+        except OSError as ex:
+            if ex.errno in _WOULD_BLOCK:
+                return 0
+            raise
+        return written or 0
+
+    def _read_data(self, size: int = 64):
+        """
+        Reads from the socket without waiting
+        :return: bytes, the data, None if nothing is available
+        """
+        try:
+            if hasattr(self.sock, "read"):
+                data = self.sock.read(size)
+            else:
+                data = self.sock.recv(size)
+        except OSError as ex:
+            if ex.errno in _WOULD_BLOCK:
+                return None
+            raise
+        if data == b"":
+            raise OSError(errno.ECONNRESET, "connection closed")
+        return data
+
+    def _write_blocking(self, data):
+        """
+        Writes all data while the socket is still blocking, used by _handshake
+        """
+        if hasattr(self.sock, "write"):
+            self.sock.write(data)
+        else:
+            self.sock.sendall(data)
+
+    def _read_blocking(self, size: int) -> bytes:
+        """
+        Reads size bytes while the socket is still blocking, used by _handshake
+        """
+        data = b""
+        while len(data) < size:
+            if hasattr(self.sock, "read"):
+                chunk = self.sock.read(size - len(data))
+            else:
+                chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise OSError(errno.ECONNRESET, "connection closed")
+            data += chunk
+        return data
+
+    def _handshake(self):
+        """
+        Sets up the protocol on a new connection
+        """
+
+    def _sent(self):
+        """
+        Called when the socket accepted data
+        """
+
+    def _handle_reply(self, data):
+        """
+        Handles data received from the server
+        """
+
+    def _packet_length(self, length: int) -> int:
+        """
+        :return: int, the size of the packet around a batch of length bytes
+        """
+        return length
+
+    def _write_packet(self, target, offset: int, batch) -> int:
+        """
+        Writes the packet around a batch into target
+        :return: int, the position after the packet
+        """
+        target[offset : offset + len(batch)] = batch
+        return offset + len(batch)
+
+
+def _remaining_length(length: int) -> bytes:
+    """
+    Encodes the remaining length of an MQTT packet
+    """
+    encoded = bytearray()
+    while True:
+        byte = length & 0x7F
+        length >>= 7
+        encoded.append(byte | 0x80 if length else byte)
+        if not length:
+            return bytes(encoded)
+
+
+def _mqtt_string(text) -> bytes:
+    if isinstance(text, str):
+        text = text.encode()
+    return struct.pack("!H", len(text)) + text
+
+
+class MQTTPublisher(_BatchingConnection):
+    """
+    Publishes batches of messages to an MQTT broker (MQTT 3.1.1, QoS 0)
+    """
+
+    # pylint: disable=too-many-positional-arguments
+    def __init__(
+        self,
+        host: str,
+        topic: str,
+        client_id: str = "leaphy",
+        port: int = 1883,
+        user: str = None,
+        password: str = None,
+        keepalive_s: int = 60,
+        **kwargs,
+    ):
+        """
+        Creates an MQTT publisher
+        :param host: str, the host name or ip address of the broker
+        :param topic: str, the topic the batches are published to
+        :param client_id: str, the client id, must be unique on the broker
+        :param port: int, the port of the broker
+        :param user: str, the user name, None for no login
+        :param password: str, the password
+        :param keepalive_s: int, the keep alive interval in seconds
+        :param kwargs: see _BatchingConnection, for example use_ssl or max_batch
+        """
+        super().__init__(host, port, **kwargs)
+        self.topic = _mqtt_string(topic)
+        self.client_id = client_id
+        self.user = user
+        self.password = password
+        self.keepalive_s = keepalive_s
+        self._last_write = ticks_ms()
+        self._check_sizes()
+
+    def publish(self, payload, topic: str = None) -> bool:
+        """
+        Publishes one message directly, outside of the batches
+        :param payload: bytes, the message
+        :param topic: str, the topic, None for the topic of the publisher
+        :return: bool, False if the message was dropped because the link is too slow
+        """
+        topic = self.topic if topic is None else _mqtt_string(topic)
+        body_length = len(topic) + len(payload)
+        if not self._add_packet(
+            b"\x30" + _remaining_length(body_length) + topic + payload
+        ):
+            return False
+        self.poll()
+        return True
+
+    def poll(self) -> None:
+        if (
+            self.sock is not None
+            and not self._packets
+            and ticks_diff(ticks_ms(), self._last_write) >= self.keepalive_s * 500
+        ):
+            # PINGREQ, halfway the keep alive interval
+            self._add_packet(b"\xc0\x00")
+        super().poll()
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self._write_data(b"\xe0\x00")
+            except OSError:
+                pass
+        super().close()
+
+    def _handshake(self):
+        flags = 0x02  # clean session
+        payload = _mqtt_string(self.client_id)
+        if self.user is not None:
+            flags |= 0x80
+            payload += _mqtt_string(self.user)
+            if self.password is not None:
+                flags |= 0x40
+                payload += _mqtt_string(self.password)
+        body = (
+            b"\x00\x04MQTT\x04" + struct.pack("!BH", flags, self.keepalive_s) + payload
+        )
+        self._write_blocking(b"\x10" + _remaining_length(len(body)) + body)
+        reply = self._read_blocking(4)
+        if reply[0] != 0x20 or reply[3] != 0:
+            raise OSError(errno.ECONNREFUSED, f"MQTT connection refused ({reply[3]})")
+        self._last_write = ticks_ms()
+
+    def _sent(self):
+        self._last_write = ticks_ms()
+
+    def _packet_length(self, length: int) -> int:
+        body_length = len(self.topic) + length
+        return 1 + len(_remaining_length(body_length)) + body_length
+
+    def _write_packet(self, target, offset: int, batch) -> int:
+        header = b"\x30" + _remaining_length(len(self.topic) + len(batch)) + self.topic
+        end = offset + len(header)
+        target[offset:end] = header
+        target[end : end + len(batch)] = batch
+        return end + len(batch)
+
+
+class HTTPPublisher(_BatchingConnection):
+    """
+    Posts batches of messages to an HTTP server over a keep-alive connection.
+
+    Only one request is sent at a time: the next batch waits for the reply.
+    The server must answer with a Content-Length, chunked replies are not supported.
+    """
+
+    _WAIT_FOR_REPLY = True
+
+    # pylint: disable=too-many-positional-arguments
+    def __init__(
+        self,
+        host: str,
+        path: str = "/",
+        port: int = 80,
+        content_type: str = "application/octet-stream",
+        **kwargs,
+    ):
+        """
+        Creates an HTTP publisher
+        :param host: str, the host name or ip address of the server
+        :param path: str, the path the batches are posted to
+        :param port: int, the port of the server
+        :param content_type: str, the content type of the batches
+        :param kwargs: see _BatchingConnection, for example use_ssl or max_batch
+        """
+        super().__init__(host, port, **kwargs)
+        self._request_head = (
+            f"POST {path} HTTP/1.1\r\nHost: {host}\r\n"
+            f"Content-Type: {content_type}\r\nConnection: keep-alive\r\n"
+            "Content-Length: "
+        ).encode()
+        self._reply = bytearray()
+        self._body_remaining = None
+        self.errors = 0
+        self._check_sizes()
+
+    def _handshake(self):
+        # A new connection starts without a reply
+        self._reply = bytearray()
+        self._body_remaining = None
+
+    def _packet_length(self, length: int) -> int:
+        return len(self._request_head) + len(str(length)) + 4 + length
+
+    def _write_packet(self, target, offset: int, batch) -> int:
+        head = self._request_head + str(len(batch)).encode() + b"\r\n\r\n"
+        end = offset + len(head)
+        target[offset:end] = head
+        target[end : end + len(batch)] = batch
+        return end + len(batch)
+
+    def _handle_reply(self, data):
+        self._reply += data
+        if self._body_remaining is None:
+            end = self._reply.find(b"\r\n\r\n")
+            if end < 0:
+                return
+            head = bytes(self._reply[:end]).decode()
+            self._reply = self._reply[end + 4 :]
+            if not head.split(" ", 2)[1].startswith("2"):
+                self.errors += 1
+            self._body_remaining = 0
+            for line in head.split("\r\n")[1:]:
+                name, _, value = line.partition(":")
+                if name.strip().lower() == "content-length":
+                    self._body_remaining = int(value)
+        if len(self._reply) < self._body_remaining:
+            return
+        self._reply = self._reply[self._body_remaining :]
+        self._body_remaining = None
+        if not self._waiting_for_reply:
+            # A reply to no request, for example a timeout of the server, is ignored
+            return
+        # The request is answered, the next one may be sent
+        self._release(self._packets.pop(0))
+        self._waiting_for_reply = False
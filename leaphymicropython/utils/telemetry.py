@@ -0,0 +1,196 @@
+"""
+This module streams sensor readings as compact binary records.
+
+Every record is a struct with a header (kind, source, timestamp) and the
+readings of one sensor in fixed point. The records are sent as messages of a
+MessageLink, so they are framed and checked with a CRC-16. The record formats
+do not depend on the machine module, so decode_record can also be used on a
+computer, see tools/telemetry_decoder.py.
+"""
+
+import struct
+
+try:
+    from utime import ticks_ms, ticks_diff, ticks_add
+except ImportError:  # On a computer only the decoding is used
+    ticks_ms = ticks_diff = ticks_add = None
+
+KIND_DISTANCE = 1
+KIND_BAROMETER = 2
+KIND_MAGNETIC = 3
+KIND_COLOR = 4
+KIND_CLIMATE = 5
+
+# kind, source, timestamp in ms since the publisher was created
+RECORD_HEADER = "<BBI"
+RECORD_HEADER_SIZE = struct.calcsize(RECORD_HEADER)
+
+# For every kind: the name, the struct format of the readings,
+# the names of the readings and the divisor that gives the real value
+RECORD_FORMATS = {
+    KIND_DISTANCE: ("distance", "<H", ("distance_mm",), (1,)),
+    KIND_BAROMETER: ("barometer", "<hI", ("temperature_c", "pressure_pa"), (100, 1)),
+    KIND_MAGNETIC: ("magnetic", "<hhh", ("x_gauss", "y_gauss", "z_gauss"), (1000,) * 3),
+    KIND_COLOR: ("color", "<HHHH", ("red", "green", "blue", "clear"), (1,) * 4),
+    KIND_CLIMATE: ("climate", "<hH", ("temperature_c", "humidity_pct"), (10, 10)),
+}
+
+
+def _read_distance(sensor):
+    distance = sensor.get_distance()
+    if distance is None:
+        return None
+    return (min(int(distance), 0xFFFF),)
+
+
+def _read_barometer(sensor):
+    temperature = sensor.get_temperature()
+    pressure = sensor.get_pressure()
+    if temperature is None or pressure is None:
+        return None
+    return int(temperature * 100), int(pressure)
+
+
+def _read_magnetic(sensor):
+    x, y, z = sensor.magnetic
+    return int(x * 1000), int(y * 1000), int(z * 1000)
+
+
+def _read_color(sensor):
+    if not sensor.color_available():
+        return None
+    return sensor.read_color()
+
+
+def _read_climate(sensor):
+    # DHT22 wraps the dht driver, one measurement gives both readings
+    dht = getattr(sensor, "sensor", sensor)
+    dht.measure()
+    return int(dht.temperature() * 10), int(dht.humidity() * 10)
+
+
+_READERS = {
+    KIND_DISTANCE: _read_distance,
+    KIND_BAROMETER: _read_barometer,
+    KIND_MAGNETIC: _read_magnetic,
+    KIND_COLOR: _read_color,
+    KIND_CLIMATE: _read_climate,
+}
+
+
+def detect_kind(sensor) -> int:
+    """
+    Finds the record kind of a sensor object
+    :param sensor: TimeOfFlight, BarometricPressure, QMC5883L, Adps9960 or DHT22
+    :return: int, one of the KIND_ constants
+    """
+    if hasattr(sensor, "get_distance"):
+        return KIND_DISTANCE
+    if hasattr(sensor, "get_pressure"):
+        return KIND_BAROMETER
+    if hasattr(type(sensor), "magnetic"):
+        return KIND_MAGNETIC
+    if hasattr(sensor, "read_color"):
+        return KIND_COLOR
+    if hasattr(sensor, "read_humidity"):
+        return KIND_CLIMATE
+    raise ValueError(f"Telemetry does not support {type(sensor).__name__}")
+
+
+def decode_record(payload):
+    """
+    Decodes a record
+    :param payload: bytes, the record
+    :return: tuple[str, int, int, dict], the kind name, source, timestamp in ms and readings
+    """
+    kind, source, timestamp = struct.unpack_from(RECORD_HEADER, payload)
+    if kind not in RECORD_FORMATS:
+        raise ValueError(f"Unknown record kind {kind}")
+    name, form, fields, divisors = RECORD_FORMATS[kind]
+    values = struct.unpack_from(form, payload, RECORD_HEADER_SIZE)
+    readings = {}
+    for field, value, divisor in zip(fields, values, divisors):
+        readings[field] = value / divisor if divisor != 1 else value
+    return name, source, timestamp, readings
+
+
+# pylint: disable=too-many-instance-attributes
+class TelemetryPublisher:
+    """
+    Reads sensors at their own rate and streams the readings as binary records.
+
+    Call poll() often, for example in the main loop. Every sensor whose period
+    has passed is read, and all records of one poll are sent in one write.
+    """
+
+    def __init__(self, link):
+        """
+        Creates a telemetry publisher
+        :param link: MessageLink, for example MessageLink(Bluetooth(115200))
+            or MessageLink(sys.stdout.buffer) for USB serial
+        """
+        self.link = link
+        self._sources = []
+        self._buffers = {}
+        self.sent = 0
+        self.skipped = 0
+        # ticks_ms wraps after 2^30 ms, so the timestamp adds up the time between polls
+        self._elapsed_ms = 0
+        self._last_ticks = ticks_ms()
+
+    def add(self, sensor, period_ms: int, kind: int = None) -> int:
+        """
+        Adds a sensor
+        :param sensor: TimeOfFlight, BarometricPressure, QMC5883L, Adps9960 or DHT22
+        :param period_ms: int, the time in milliseconds between two readings
+        :param kind: int, one of the KIND_ constants, None to detect it
+        :return: int, the source number that is sent in the records of this sensor
+        """
+        if kind is None:
+            kind = detect_kind(sensor)
+        if kind not in RECORD_FORMATS:
+            raise ValueError(f"Unknown record kind {kind}")
+        if len(self._sources) > 0xFF:
+            raise ValueError("Telemetry supports up to 256 sources")
+        if kind not in self._buffers:
+            size = RECORD_HEADER_SIZE + struct.calcsize(RECORD_FORMATS[kind][1])
+            self._buffers[kind] = bytearray(size)
+        source = len(self._sources)
+        # kind, sensor, period, time of the next reading
+        self._sources.append([kind, sensor, period_ms, ticks_ms()])
+        return source
+
+    def poll(self) -> int:
+        """
+        Reads and sends the sensors that are due
+        :return: int, the amount of records sent
+        """
+        now = ticks_ms()
+        self._elapsed_ms += ticks_diff(now, self._last_ticks)
+        self._last_ticks = now
+        timestamp = self._elapsed_ms & 0xFFFFFFFF
+        count = 0
+        for source, entry in enumerate(self._sources):
+            kind, sensor, period_ms, due = entry
+            if ticks_diff(now, due) < 0:
+                continue
+            # Keep the rate fixed, unless the publisher fell more than a period behind
+            due = ticks_add(due, period_ms)
+            if ticks_diff(now, due) >= 0:
+                due = ticks_add(now, period_ms)
+            entry[3] = due
+            values = _READERS[kind](sensor)
+            if values is None:
+                self.skipped += 1
+                continue
+            buffer = self._buffers[kind]
+            struct.pack_into(RECORD_HEADER, buffer, 0, kind, source, timestamp)
+            struct.pack_into(
+                RECORD_FORMATS[kind][1], buffer, RECORD_HEADER_SIZE, *values
+            )
+            self.link.queue(buffer)
+            count += 1
+        if count:
+            self.link.flush()
+            self.sent += count
+        return count
@@ -1,5 +1,29 @@
+import heapq
 from time import sleep
 
+try:
+    from utime import ticks_ms, ticks_diff, sleep_ms
+except ImportError:  # CPython, to test the scheduler on a computer
+    from time import monotonic
+
+    def ticks_ms() -> int:
+        """
+        :return: int, a time in milliseconds
+        """
+        return int(monotonic() * 1000)
+
+    def ticks_diff(end: int, start: int) -> int:
+        """
+        :return: int, the difference between two ticks_ms() values
+        """
+        return end - start
+
+    def sleep_ms(milliseconds: int):
+        """
+        :param milliseconds: int, the time to sleep
+        """
+        sleep(milliseconds / 1000)
+
 
 def sleep_minute(minutes: int):
     """
@@ -7,3 +31,214 @@ def sleep_minute(minutes: int):
     :param minutes: the amount of minutes
     """
     sleep(60 * minutes)
+
+
+# pylint: disable=too-many-instance-attributes
+class Job:
+    """
+    A job of a Scheduler, returned by Scheduler.every() and Scheduler.after()
+    """
+
+    # pylint: disable=too-many-positional-arguments
+    def __init__(self, scheduler, callback, args, due: int, period_ms: int, order: int):
+        self.scheduler = scheduler
+        self.callback = callback
+        self.args = args
+        # Time of the next run, in milliseconds since the scheduler was made
+        self.due = due
+        # None for a one-shot job
+        self.period_ms = period_ms
+        self.order = order
+        self.cancelled = False
+        self.runs = 0
+        self.overruns = 0
+        self.max_late_ms = 0
+
+    def __lt__(self, other) -> bool:
+        if self.due != other.due:
+            return self.due < other.due
+        return self.order < other.order
+
+    def cancel(self):
+        """
+        Stops the job, it is removed from the scheduler the next time it is due
+        """
+        self.cancelled = True
+
+
+class Scheduler:
+    """
+    Runs periodic and one-shot jobs without blocking the rest of the program.
+
+    Periodic jobs run at a fixed rate: the next run is planned from the time
+    the previous run was due, not from when it finished, so the timing does
+    not drift. When a job is so late that it missed a whole period, the missed
+    runs are skipped and counted as overruns.
+
+    The jobs are kept in a heap ordered by their due time. Times are counted
+    in milliseconds since the scheduler was made, so wrap-around of ticks_ms()
+    does not break the order.
+    """
+
+    def __init__(self, clock=None, on_overrun=None):
+        """
+        Creates a scheduler
+        :param clock: function, returns the time in milliseconds, ticks_ms if None
+        :param on_overrun: function, called with the job and the amount of
+            milliseconds it was late when it missed a period
+        """
+        self.clock = ticks_ms if clock is None else clock
+        self.on_overrun = on_overrun
+        self._jobs = []
+        self._order = 0
+        self._last_tick = self.clock()
+        self._elapsed = 0
+        self._event = None
+
+    def now(self) -> int:
+        """
+        :return: int, the time in milliseconds since the scheduler was made
+        """
+        tick = self.clock()
+        self._elapsed += ticks_diff(tick, self._last_tick)
+        self._last_tick = tick
+        return self._elapsed
+
+    def every(self, period_ms: int, callback, *args, delay_ms: int = None) -> Job:
+        """
+        Runs a function every period_ms milliseconds
+        :param period_ms: int, the time in milliseconds between two runs
+        :param callback: function, called with args
+        :param delay_ms: int, the time in milliseconds until the first run, period_ms if None
+        :return: Job, the job, use job.cancel() to stop it
+        """
+        if period_ms <= 0:
+            raise ValueError(f"period_ms must be positive, got {period_ms}")
+        if delay_ms is None:
+            delay_ms = period_ms
+        return self._add(callback, args, delay_ms, period_ms)
+
+    def after(self, delay_ms: int, callback, *args) -> Job:
+        """
+        Runs a function once, after delay_ms milliseconds
+        :param delay_ms: int, the time in milliseconds until the run
+        :param callback: function, called with args
+        :return: Job, the job, use job.cancel() to stop it
+        """
+        return self._add(callback, args, delay_ms, None)
+
+    def cancel(self, job: Job):
+        """
+        Stops a job
+        :param job: Job, the job returned by every() or after()
+        """
+        job.cancel()
+
+    def _add(self, callback, args, delay_ms: int, period_ms: int) -> Job:
+        if delay_ms < 0:
+            raise ValueError(f"delay_ms can't be negative, got {delay_ms}")
+        self._order += 1
+        job = Job(self, callback, args, self.now() + delay_ms, period_ms, self._order)
+        heapq.heappush(self._jobs, job)
+        if self._event is not None:
+            self._event.set()
+        return job
+
+    def time_until_next(self) -> int:
+        """
+        :return: int, the time in milliseconds until the next job is due,
+            0 if one is due, None if there are no jobs
+        """
+        jobs = self._jobs
+        while jobs and jobs[0].cancelled:
+            heapq.heappop(jobs)
+        if not jobs:
+            return None
+        return max(0, jobs[0].due - self.now())
+
+    def run_pending(self) -> int:
+        """
+        Runs the jobs that are due
+        :return: int, the amount of jobs that ran
+        """
+        jobs = self._jobs
+        now = self.now()
+        count = 0
+        while jobs and jobs[0].due <= now:
+            job = heapq.heappop(jobs)
+            if job.cancelled:
+                continue
+            late = now - job.due
+            job.max_late_ms = max(job.max_late_ms, late)
+            job.runs += 1
+            job.callback(*job.args)
+            count += 1
+            if job.period_ms is None or job.cancelled:
+                continue
+            job.due += job.period_ms
+            now = self.now()
+            if job.due <= now:
+                # The job missed one or more periods, skip them instead of catching up
+                missed = (now - job.due) // job.period_ms + 1
+                job.due += missed * job.period_ms
+                job.overruns += missed
+                if self.on_overrun is not None:
+                    self.on_overrun(job, late)
+            heapq.heappush(jobs, job)
+        return count
+
+    def run(self, duration_ms: int = None, sleep_function=None):
+        """
+        Runs the jobs, sleeping in between, until duration_ms has passed or no jobs are left
+        :param duration_ms: int, the time in milliseconds to run, forever if None
+        :param sleep_function: function, sleeps for the given milliseconds, sleep_ms if None
+        """
+        sleep_function = sleep_ms if sleep_function is None else sleep_function
+        end = None if duration_ms is None else self.now() + duration_ms
+        while True:
+            self.run_pending()
+            wait = self.limit_wait(self.time_until_next(), end)
+            if wait is None:
+                return
+            if wait > 0:
+                sleep_function(wait)
+
+    def limit_wait(self, wait: int, end: int) -> int:
+        """
+        Limits the time to sleep in a run loop to the end of the run
+        :param wait: int, the time in milliseconds until the next job, None if there are no jobs
+        :param end: int, the time from now() at which the run ends, None to run forever
+        :return: int, the time in milliseconds to sleep, None if the run is over
+        """
+        if end is None:
+            return wait
+        left = end - self.now()
+        if left <= 0:
+            return None
+        return left if wait is None else min(wait, left)
+
+    async def run_async(self):
+        """
+        Runs the jobs as an asyncio task, other tasks run while the scheduler waits.
+        Jobs added from other tasks wake the scheduler up.
+        """
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        self._event = asyncio.Event()
+        try:
+            while True:
+                self.run_pending()
+                wait = self.time_until_next()
+                self._event.clear()
+                if wait == 0:
+                    await asyncio.sleep(0)
+                    continue
+                try:
+                    if wait is None:
+                        await self._event.wait()
+                    else:
+                        await asyncio.wait_for(self._event.wait(), wait / 1000)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._event = None
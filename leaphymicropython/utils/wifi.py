@@ -1,18 +1,260 @@
-from time import sleep
+import json
+import micropython
 import network
+from machine import Timer, idle
+from utime import ticks_ms, ticks_diff, ticks_add
 
+STATE_IDLE = "idle"
+STATE_CONNECTING = "connecting"
+STATE_CONNECTED = "connected"
+STATE_BACKOFF = "backoff"
+STATE_FAILED = "failed"
 
-def connect(ssid: str, password: str) -> str:
+# Statuses that will not get better by waiting or retrying
+_FATAL_STATUSES = {
+    network.STAT_WRONG_PASSWORD: "wrong password",
+}
+_RETRY_STATUSES = {
+    network.STAT_NO_AP_FOUND: "network not found",
+    network.STAT_CONNECT_FAIL: "connection failed",
+}
+
+
+# pylint: disable=too-many-instance-attributes
+class WifiManager:
+    """
+    A class to connect to Wi-Fi and keep the connection alive
+
+    connect() waits for the connection with a deadline, and keeps trying until
+    then. start() connects in the background: a timer checks the link, and
+    reconnects with an exponential backoff when it is lost. A wrong password is
+    reported immediately instead of retried. After the first connection, one
+    scan finds the BSSID of the access point, which is cached in a file, so the
+    next connection does not need to search for the network.
+    """
+
+    # pylint: disable=too-many-positional-arguments
+    def __init__(
+        self,
+        ssid: str,
+        password: str,
+        timeout_ms: int = 15_000,
+        min_backoff_ms: int = 1_000,
+        max_backoff_ms: int = 60_000,
+        cache_file: str = "wifi_cache.json",
+    ):
+        """
+        Creates a Wi-Fi manager
+        :param ssid: str, the Wi-Fi name
+        :param password: str, the Wi-Fi password
+        :param timeout_ms: int, the time in milliseconds one connection attempt may take
+        :param min_backoff_ms: int, the wait in milliseconds after the first failed attempt
+        :param max_backoff_ms: int, the longest wait in milliseconds between two attempts
+        :param cache_file: str, the file to store the BSSID in, None to disable the cache
+        """
+        self.ssid = ssid
+        self.password = password
+        self.timeout_ms = timeout_ms
+        self.min_backoff_ms = min_backoff_ms
+        self.max_backoff_ms = max_backoff_ms
+        self.cache_file = cache_file
+        self.wlan = network.WLAN(network.STA_IF)
+        self.state = STATE_IDLE
+        self.error = None
+        self.attempts = 0
+        self.reconnects = 0
+        self._backoff_ms = min_backoff_ms
+        self._deadline = 0
+        self._used_bssid = False
+        self._timer = None
+        self._bssid = self._load_bssid()
+        # Bound once, so scheduling it from the timer callback does not allocate
+        self._store_bssid_ref = self._store_bssid
+
+    @property
+    def ip(self) -> str:
+        """
+        :return: str, the ip address, or None when not connected
+        """
+        if not self.wlan.isconnected():
+            return None
+        return self.wlan.ifconfig()[0]
+
+    def connect(self, timeout_ms: int = None) -> str:
+        """
+        Connects and waits until the connection is made.
+
+        Failed attempts, for example because the router is still starting, are
+        retried after the backoff until timeout_ms has passed. A wrong password
+        fails at once.
+        :param timeout_ms: int, the time in milliseconds to wait, None for the timeout of the manager
+        :return: str, the ip address
+        """
+        deadline = ticks_add(ticks_ms(), timeout_ms or self.timeout_ms)
+        self._begin(deadline)
+        while self.state not in (STATE_CONNECTED, STATE_FAILED):
+            if ticks_diff(deadline, ticks_ms()) <= 0:
+                if self.state == STATE_CONNECTING:
+                    self._fail_attempt("timeout")
+                break
+            if self.state == STATE_CONNECTING:
+                self._check_attempt()
+            elif ticks_diff(self._deadline, ticks_ms()) <= 0:
+                self._begin(deadline)
+            idle()
+        if self.state != STATE_CONNECTED:
+            raise RuntimeError(f"Could not connect to {self.ssid}: {self.error}")
+        return self.ip
+
+    def start(self, period_ms: int = 250):
+        """
+        Connects in the background and reconnects when the connection is lost
+        :param period_ms: int, the time in milliseconds between two checks of the link
+        """
+        self.stop()
+        if not self.wlan.isconnected():
+            self._begin()
+        else:
+            self.state = STATE_CONNECTED
+        self._timer = Timer(
+            mode=Timer.PERIODIC, period=period_ms, callback=self._supervise
+        )
+
+    def stop(self):
+        """
+        Stops supervising the connection, the connection itself stays
+        """
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+
+    def disconnect(self):
+        """
+        Stops supervising and disconnects
+        """
+        self.stop()
+        self.wlan.disconnect()
+        self.state = STATE_IDLE
+
+    def _begin(self, deadline: int = None):
+        """
+        Starts a connection attempt
+        :param deadline: int, the ticks_ms() at which the attempt must end at the latest
+        """
+        self.wlan.active(True)
+        self.attempts += 1
+        self.error = None
+        self._used_bssid = self._bssid is not None
+        if self._used_bssid:
+            self.wlan.connect(self.ssid, self.password, bssid=self._bssid)
+        else:
+            self.wlan.connect(self.ssid, self.password)
+        self._deadline = ticks_add(ticks_ms(), self.timeout_ms)
+        if deadline is not None and ticks_diff(deadline, self._deadline) < 0:
+            self._deadline = deadline
+        self.state = STATE_CONNECTING
+
+    def _check_attempt(self):
+        """
+        Checks the status of the running connection attempt
+        """
+        status = self.wlan.status()
+        if status == network.STAT_GOT_IP:
+            self.state = STATE_CONNECTED
+            self._backoff_ms = self.min_backoff_ms
+            if self._bssid is None and self.cache_file is not None:
+                # Scanning and writing the file take too long for a timer callback
+                micropython.schedule(self._store_bssid_ref, None)
+        elif status in _FATAL_STATUSES:
+            self.wlan.disconnect()
+            self.state = STATE_FAILED
+            self.error = _FATAL_STATUSES[status]
+        elif status in _RETRY_STATUSES:
+            self._fail_attempt(_RETRY_STATUSES[status])
+        elif ticks_diff(self._deadline, ticks_ms()) <= 0:
+            self._fail_attempt("timeout")
+
+    def _fail_attempt(self, error: str):
+        """
+        Ends a failed connection attempt and waits before the next one
+        """
+        self.wlan.disconnect()
+        self.error = error
+        if self._used_bssid:
+            # The access point may have changed, search for the network next time
+            self._bssid = None
+        self.state = STATE_BACKOFF
+        self._deadline = ticks_add(ticks_ms(), self._backoff_ms)
+        self._backoff_ms = min(self._backoff_ms * 2, self.max_backoff_ms)
+
+    def _supervise(self, _timer):
+        """
+        Timer callback, moves the connection state forward
+        """
+        if self.state == STATE_CONNECTING:
+            self._check_attempt()
+        elif self.state == STATE_CONNECTED:
+            if not self.wlan.isconnected():
+                self.reconnects += 1
+                self._begin()
+        elif self.state == STATE_BACKOFF:
+            if ticks_diff(self._deadline, ticks_ms()) <= 0:
+                self._begin()
+
+    def _load_bssid(self):
+        if self.cache_file is None:
+            return None
+        try:
+            with open(self.cache_file, "r", encoding="utf8") as cache:
+                cached = json.load(cache)
+        except (OSError, ValueError):
+            return None
+        if cached.get("ssid") != self.ssid:
+            return None
+        return bytes.fromhex(cached["bssid"]) if cached.get("bssid") else None
+
+    def _store_bssid(self, _argument=None):
+        """
+        Caches the BSSID of the strongest access point of the network.
+
+        The ports do not report the BSSID of the connection, so it is found with
+        one scan, which takes a few seconds. It runs from micropython.schedule,
+        not in the timer callback, and only while nothing is cached.
+        """
+        if self.cache_file is None or self._bssid is not None:
+            return
+        if not self.wlan.isconnected():
+            return
+        try:
+            networks = self.wlan.scan()
+        except OSError:
+            return
+        ssid = self.ssid.encode()
+        best_rssi = None
+        bssid = None
+        for found in networks:
+            if found[0] == ssid and (best_rssi is None or found[3] > best_rssi):
+                best_rssi = found[3]
+                bssid = found[1]
+        if bssid is None:
+            return
+        self._bssid = bytes(bssid)
+        try:
+            with open(self.cache_file, "w", encoding="utf8") as cache:
+                json.dump({"ssid": self.ssid, "bssid": self._bssid.hex()}, cache)
+        except OSError:
+            pass
+
+
+def connect(ssid: str, password: str, timeout_ms: int = 30_000) -> str:
     """
     Connects the pico to the Wi-Fi
     :param ssid: gives the Wi-Fi name to the pico
     :param password: gives the password from the Wi-Fi to the pico
+    :param timeout_ms: the time in milliseconds to wait for the connection
     :return: ip_addresses: returns the address from the pico w
     """
-    wlan = network.WLAN(network.STA_IF)
-    wlan.active(True)
-    wlan.connect(ssid, password)
-    while not wlan.isconnected():
-        sleep(1)
-        print("Connecting to WiFi...")
-    return wlan.ifconfig()[0]
+    print("Connecting to WiFi...")
+    return WifiManager(ssid, password, timeout_ms=timeout_ms, cache_file=None).connect(
+        timeout_ms
+    )
@@ -0,0 +1,104 @@
+#!/bin/env python3
+"""
+Compiles the modules of leaphymicropython to .mpy files with mpy-cross.
+
+A board can import a precompiled .mpy file without compiling the source, so
+large drivers like vl53l0x and bmp280 no longer need RAM for the compiler.
+The files are written to dist/mpy, and package-mpy.json lists them for mip:
+
+    mip.install("github:leaphy-robotics/leaphy-micropython/package-mpy.json", version="mpy")
+
+where the mpy branch holds dist/mpy, see .github/workflows/publish_mpy.yaml. The .mpy files only work on firmware
+with the same .mpy version as mpy-cross (MicroPython 1.23 and later use
+version 6.3), so install mpy-cross of the same release as the firmware:
+
+    pip install mpy-cross==1.24.1.post2
+
+Usage: tools/build_mpy.py [--march armv6m] [--manifest-only]
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PACKAGE = ROOT / "package.json"
+MPY_PACKAGE = ROOT / "package-mpy.json"
+OUTPUT = ROOT / "dist" / "mpy"
+GITHUB_PREFIX = "github:leaphy-robotics/leaphy-micropython/"
+
+# The architectures of the supported boards, the library has no native code,
+# so the bytecode is the same for all of them
+ARCHITECTURES = {
+    "armv6m": "Raspberry Pi Pico (W), Arduino Nano RP2040 Connect",
+    "armv7emsp": "Raspberry Pi Pico 2 (W)",
+}
+
+
+def mpy_path(path: str) -> str:
+    """Returns the path of the .mpy file for a .py file"""
+    return path[: -len(".py")] + ".mpy"
+
+
+def mpy_manifest(package: dict) -> dict:
+    """Returns the manifest with the .mpy files for a package.json"""
+    urls = []
+    for target, _ in package["urls"]:
+        if target.endswith(".py"):
+            target = mpy_path(target)
+        urls.append([target, f"{GITHUB_PREFIX}dist/mpy/{target}"])
+    return {"urls": urls, "deps": package["deps"], "version": package["version"]}
+
+
+def write_manifest(manifest: dict) -> None:
+    """Writes package-mpy.json in the layout of package.json"""
+    lines = ["{", '    "urls": [']
+    for index, url in enumerate(manifest["urls"]):
+        comma = "," if index < len(manifest["urls"]) - 1 else ""
+        lines.append(f"        {json.dumps(url)}{comma}")
+    lines.append("    ],")
+    lines.append(f'    "deps": {json.dumps(manifest["deps"])},')
+    lines.append(f'    "version": {json.dumps(manifest["version"])}')
+    lines.append("}")
+    MPY_PACKAGE.write_text("\n".join(lines) + "\n", encoding="utf8")
+
+
+def compile_module(source: str, march: str) -> None:
+    """Compiles one module to dist/mpy with mpy-cross"""
+    target = OUTPUT / mpy_path(source)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    subprocess.run(
+        [
+            "mpy-cross",
+            f"-march={march}",
+            "-s",
+            source,
+            "-o",
+            str(target),
+            str(ROOT / source),
+        ],
+        check=True,
+    )
+    print(f"{source} -> {target.relative_to(ROOT)} ({target.stat().st_size} bytes)")
+
+
+def main() -> None:
+    """Builds the .mpy files and package-mpy.json"""
+    march = "armv6m"
+    if "--march" in sys.argv:
+        march = sys.argv[sys.argv.index("--march") + 1]
+    if march not in ARCHITECTURES:
+        sys.exit(f"Unknown architecture {march}, use one of {', '.join(ARCHITECTURES)}")
+    package = json.loads(PACKAGE.read_text(encoding="utf8"))
+    write_manifest(mpy_manifest(package))
+    print(f"Wrote {MPY_PACKAGE.relative_to(ROOT)}")
+    if "--manifest-only" in sys.argv:
+        return
+    for target, _ in package["urls"]:
+        if target.endswith(".py"):
+            compile_module(target, march)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Checks that every module in package-mpy.json imports from its .mpy file.
+
+Run with the MicroPython unix port, of the same release as mpy-cross, after
+tools/build_mpy.py:
+
+    micropython tools/check_mpy_imports.py
+
+Hardware modules are replaced by the placeholder objects of
+tools/placeholders.py, so this checks that the files load and their imports
+resolve, not that the drivers work.
+"""
+
+import json
+import sys
+
+from placeholders import install_placeholders
+
+ROOT = (__file__.rpartition("/")[0] or ".") + "/.."
+MPY_OUTPUT = ROOT + "/dist/mpy"
+
+
+def module_name(target: str) -> str:
+    """Returns the module name of a file in the manifest"""
+    name = target[: -len(".mpy")].replace("/", ".")
+    if name.endswith(".__init__"):
+        name = name[: -len(".__init__")]
+    return name
+
+
+def main() -> int:
+    """Imports every module, returns the amount of modules that failed"""
+    if sys.implementation.name != "micropython":
+        print("Run this check with the MicroPython unix port")
+        return 1
+    # Only the compiled files must be found, not the sources in the repository
+    sys.path[:] = [MPY_OUTPUT] + [
+        path for path in sys.path if path not in ("", ".", ROOT)
+    ]
+    install_placeholders()
+    with open(ROOT + "/package-mpy.json", encoding="utf8") as package_file:
+        package = json.load(package_file)
+    failed = 0
+    for target, _ in package["urls"]:
+        if not target.endswith(".mpy"):
+            continue
+        name = module_name(target)
+        try:
+            module = __import__(name, None, None, ["__name__"])
+            source = getattr(module, "__file__", "")
+            if not source.endswith(".mpy"):
+                raise ImportError(f"imported from {source} instead of the .mpy file")
+            print(f"{name}: 🍰")
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            print(f"{name}: ❌ {ex!r}")
+            failed += 1
+    return failed
+
+
+if __name__ == "__main__":
+    sys.exit(1 if main() else 0)
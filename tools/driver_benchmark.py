@@ -0,0 +1,375 @@
+#!/bin/env python3
+"""
+Measures what the public operations of the drivers cost, on the hardware
+simulation of tools/hwsim.
+
+For every operation it reports the I2C transactions and bytes, the time the
+bus is busy at 100 kHz and 400 kHz, the simulated time the operation takes
+(including waiting for the sensor), the wall time and the heap it allocates.
+The first use of a driver also sets up the bus and the device, it is
+reported as "<driver>.init".
+
+The bus numbers come from the simulation, so they are the same on every
+computer and can be compared with a baseline to catch regressions:
+
+    python tools/driver_benchmark.py --save tools/driver_benchmark.json
+    python tools/driver_benchmark.py --check tools/driver_benchmark.json
+
+The wall time and heap depend on the interpreter and include the simulated
+bus, so they are reported but not checked. Runs with CPython and with the
+MicroPython unix port.
+
+Usage: tools/driver_benchmark.py [--json] [--runs 20] [--save FILE] [--check FILE] [--tolerance 0.05]
+"""
+
+import gc
+import json
+import sys
+
+# The real clock, before the simulation replaces the time module
+from simulation import ticks_us, ticks_diff
+import hwsim
+
+try:
+    import tracemalloc
+except ImportError:  # MicroPython
+    tracemalloc = None
+
+hwsim.install()
+
+# pylint: disable=wrong-import-position
+from machine import I2C
+from leaphymicropython.utils.i2c_helper import i2c_bus_instances
+from leaphymicropython.sensors.tof import TimeOfFlight
+from leaphymicropython.sensors.barometer import BarometricPressure
+from leaphymicropython.sensors.compass import QMC5883L
+from leaphymicropython.sensors.adps9960 import Adps9960
+from leaphymicropython.actuators.oled_screen import OLEDSH1106
+from leaphymicropython.actuators.ssd1306 import SSD1306I2C
+
+FREQUENCIES = (100_000, 400_000)
+# The numbers that are the same on every computer, compared with the baseline
+CHECKED = ("transactions", "bytes", "bus_us_100k", "bus_us_400k", "sim_us_400k")
+
+
+def new_simulation(model):
+    """Starts a new simulation with one device on bus 0"""
+    hwsim.reset()
+    i2c_bus_instances.clear()
+    hwsim.get_bus(0).attach(model)
+
+
+def first_use(new_model, new_driver, operation):
+    """
+    Returns the setup of a benchmark of the first use of a driver
+    :param new_model: function, returns the device model
+    :param new_driver: function, returns the driver for a bus frequency
+    :param operation: function, the first call of the driver and model
+    """
+
+    def setup(freq):
+        model = new_model()
+        new_simulation(model)
+
+        def run():
+            i2c_bus_instances.clear()
+            operation(new_driver(freq), model)
+
+        return run
+
+    return setup
+
+
+def repeated_use(new_model, new_driver, operation, first=None):
+    """
+    Returns the setup of a benchmark of an operation of a driver that is in use
+    :param first: function, the first call of the driver, operation if None
+    """
+
+    def setup(freq):
+        model = new_model()
+        new_simulation(model)
+        driver = new_driver(freq)
+        (operation if first is None else first)(driver, model)
+        return lambda: operation(driver, model)
+
+    return setup
+
+
+def tof(freq):
+    """Returns a TimeOfFlight for the bus frequency"""
+    return TimeOfFlight(freq=freq, show_warnings=False)
+
+
+def barometer(freq):
+    """Returns a BarometricPressure for the bus frequency"""
+    return BarometricPressure(freq=freq, show_warnings=False)
+
+
+def compass(freq):
+    """Returns a QMC5883L for the bus frequency"""
+    return QMC5883L(I2C(0, freq=freq))
+
+
+def gesture_sensor(freq):
+    """Returns an Adps9960 for the bus frequency"""
+    return Adps9960(freq=freq, show_warnings=False)
+
+
+def ssd1306(freq):
+    """Returns an SSD1306I2C for the bus frequency"""
+    return SSD1306I2C(128, 64, freq=freq, show_warnings=False)
+
+
+def sh1106(freq):
+    """Returns an OLEDSH1106 for the bus frequency"""
+    return OLEDSH1106(freq=freq, show_warnings=False)
+
+
+def swipe_and_poll(driver, model):
+    """Queues a swipe and polls for it"""
+    model.swipe("left")
+    return driver.gesture_available()
+
+
+def fail_and_recover(driver, model):
+    """Fails a reading with a bus error, then reads again"""
+    hwsim.get_bus(0).inject(address=model.address)
+    driver.get_distance()
+    return driver.get_distance()
+
+
+def text_and_show(driver, _):
+    """Draws a line of text and shows it"""
+    driver.text("Leaphy", 0, 0, "white")
+    driver.show()
+
+
+BENCHMARKS = (
+    (
+        "TimeOfFlight.init",
+        first_use(hwsim.VL53L0XModel, tof, lambda driver, _: driver.get_distance()),
+    ),
+    (
+        "TimeOfFlight.get_distance",
+        repeated_use(hwsim.VL53L0XModel, tof, lambda driver, _: driver.get_distance()),
+    ),
+    (
+        "TimeOfFlight.get_distance+recovery",
+        repeated_use(
+            hwsim.VL53L0XModel,
+            tof,
+            fail_and_recover,
+            first=lambda driver, _: driver.get_distance(),
+        ),
+    ),
+    (
+        "BarometricPressure.init",
+        first_use(
+            hwsim.BMP280Model, barometer, lambda driver, _: driver.get_pressure()
+        ),
+    ),
+    (
+        "BarometricPressure.get_pressure",
+        repeated_use(
+            hwsim.BMP280Model, barometer, lambda driver, _: driver.get_pressure()
+        ),
+    ),
+    (
+        "BarometricPressure.get_temperature",
+        repeated_use(
+            hwsim.BMP280Model, barometer, lambda driver, _: driver.get_temperature()
+        ),
+    ),
+    (
+        "QMC5883L.init",
+        first_use(hwsim.QMC5883LModel, compass, lambda driver, _: None),
+    ),
+    (
+        "QMC5883L.magnetic",
+        repeated_use(hwsim.QMC5883LModel, compass, lambda driver, _: driver.magnetic),
+    ),
+    (
+        "Adps9960.init",
+        first_use(
+            hwsim.APDS9960Model, gesture_sensor, lambda driver, _: driver.begin()
+        ),
+    ),
+    (
+        "Adps9960.gesture_available",
+        repeated_use(
+            hwsim.APDS9960Model,
+            gesture_sensor,
+            lambda driver, _: driver.gesture_available(),
+            first=lambda driver, _: driver.begin(),
+        ),
+    ),
+    (
+        "Adps9960.gesture_available+swipe",
+        repeated_use(
+            hwsim.APDS9960Model,
+            gesture_sensor,
+            swipe_and_poll,
+            first=lambda driver, _: driver.begin(),
+        ),
+    ),
+    (
+        "Adps9960.read_color",
+        repeated_use(
+            hwsim.APDS9960Model,
+            gesture_sensor,
+            lambda driver, _: driver.read_color(),
+            first=lambda driver, _: driver.begin(),
+        ),
+    ),
+    (
+        "SSD1306I2C.init",
+        first_use(hwsim.SSD1306Model, ssd1306, lambda driver, _: driver.show()),
+    ),
+    (
+        "SSD1306I2C.show",
+        repeated_use(hwsim.SSD1306Model, ssd1306, lambda driver, _: driver.show()),
+    ),
+    (
+        "OLEDSH1106.init",
+        first_use(hwsim.SH1106Model, sh1106, lambda driver, _: driver.show()),
+    ),
+    (
+        "OLEDSH1106.text+show",
+        repeated_use(hwsim.SH1106Model, sh1106, text_and_show),
+    ),
+)
+
+
+def heap_allocated(run) -> int:
+    """Returns the bytes allocated on the heap while running"""
+    if tracemalloc is not None:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        run()
+        return tracemalloc.get_traced_memory()[1] - before
+    gc.collect()
+    gc.disable()
+    before = gc.mem_alloc()  # pylint: disable=no-member
+    run()
+    allocated = gc.mem_alloc() - before  # pylint: disable=no-member
+    gc.enable()
+    return allocated
+
+
+def measure(setup, runs: int) -> dict:
+    """
+    Runs a benchmark at every bus frequency
+    :return: dict, the numbers per operation, averaged over the runs
+    """
+    result = {}
+    for freq in FREQUENCIES:
+        run = setup(freq)
+        bus = hwsim.get_bus(0)
+        bus.reset_stats()
+        start_ns = hwsim.CLOCK.now_ns
+        start_us = ticks_us()
+        for _ in range(runs):
+            run()
+        wall_us = ticks_diff(ticks_us(), start_us)
+        stats = bus.stats()
+        suffix = f"_{freq // 1000}k"
+        result["bus_us" + suffix] = round(stats["bus_us"] / runs, 1)
+        result["sim_us" + suffix] = round(
+            (hwsim.CLOCK.now_ns - start_ns) / 1000 / runs, 1
+        )
+        # The transactions and bytes of the fastest bus, the polls of a sensor depend on the speed
+        result["transactions"] = round(stats["transactions"] / runs, 1)
+        result["bytes"] = round(
+            (stats["bytes_written"] + stats["bytes_read"]) / runs, 1
+        )
+        result["wall_us"] = round(wall_us / runs, 1)
+    run = setup(FREQUENCIES[-1])
+    if tracemalloc is not None:
+        tracemalloc.start()
+    result["heap_bytes"] = round(
+        sum(heap_allocated(run) for _ in range(runs)) / runs, 1
+    )
+    if tracemalloc is not None:
+        tracemalloc.stop()
+    return result
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> int:
+    """
+    Prints the numbers that changed compared to the baseline
+    :return: int, the amount of numbers that got worse
+    """
+    regressions = 0
+    for name, expected in baseline["results"].items():
+        if name not in results:
+            print(f"{name}: ❌ not measured anymore")
+            regressions += 1
+            continue
+        for key in CHECKED:
+            old, new = expected[key], results[name][key]
+            if new > old * (1 + tolerance) + 0.5:
+                print(f"{name} {key}: ❌ {old} -> {new}")
+                regressions += 1
+            elif new < old * (1 - tolerance) - 0.5:
+                print(
+                    f"{name} {key}: 🍰 {old} -> {new}, update the baseline with --save"
+                )
+    for name in results:
+        if name not in baseline["results"]:
+            print(f"{name}: not in the baseline, update it with --save")
+    return regressions
+
+
+def print_results(results: dict) -> None:
+    """Prints a table of the results"""
+    print(
+        f"{'operation':36} {'trans':>6} {'bytes':>7} {'bus100k':>8} {'bus400k':>8} "
+        f"{'sim ms':>7} {'wall us':>8} {'heap B':>7}"
+    )
+    for name, result in results.items():
+        print(
+            f"{name:36} {result['transactions']:6.1f} {result['bytes']:7.1f} "
+            f"{result['bus_us_100k']:8.1f} {result['bus_us_400k']:8.1f} "
+            f"{result['sim_us_400k'] / 1000:7.2f} {result['wall_us']:8.1f} {result['heap_bytes']:7.1f}"
+        )
+
+
+def argument(name: str, default):
+    """Returns the value after an option on the command line"""
+    if name in sys.argv:
+        return type(default)(sys.argv[sys.argv.index(name) + 1])
+    return default
+
+
+def main() -> int:
+    """Runs the benchmarks, returns the amount of regressions"""
+    runs = argument("--runs", 20)
+    results = {}
+    for name, setup in BENCHMARKS:
+        results[name] = measure(setup, runs)
+    report = {
+        "runs": runs,
+        "implementation": sys.implementation.name,
+        "results": results,
+    }
+    if "--json" in sys.argv:
+        print(json.dumps(report))
+    else:
+        print_results(results)
+    save = argument("--save", "")
+    if save:
+        with open(save, "w", encoding="utf8") as baseline_file:
+            json.dump(report, baseline_file, indent=4, sort_keys=True)
+            baseline_file.write("\n")
+        print(f"Wrote {save}")
+    check = argument("--check", "")
+    if check:
+        with open(check, encoding="utf8") as baseline_file:
+            baseline = json.load(baseline_file)
+        return compare(results, baseline, argument("--tolerance", 0.05))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(1 if main() else 0)
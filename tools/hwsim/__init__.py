@@ -0,0 +1,75 @@
+"""
+A simulation of the hardware, to run the drivers of the library on a computer.
+
+install() puts stand-ins for machine, network, socket, select, dht, utime and time in
+sys.modules, and for micropython, framebuf and ustruct when they are missing
+(with CPython). I2C devices are register-level models attached to a
+simulated bus, which has the timing of the bus frequency, counts every
+transaction and can inject errors:
+
+    import hwsim
+    hwsim.install()
+    bus = hwsim.get_bus(0)
+    tof = bus.attach(hwsim.VL53L0XModel(distance_mm=120))
+
+    from leaphymicropython.sensors.tof import TimeOfFlight
+    print(TimeOfFlight().get_distance(), bus.stats())
+
+Time is simulated too: see hwsim.clock. Runs with CPython and with the
+MicroPython unix port.
+"""
+
+import sys
+
+# pylint: disable=unused-import
+from .bus import I2CBus, Fault, get_bus, reset_buses
+from .clock import CLOCK
+from .devices import (
+    RegisterModel,
+    Multiplexer,
+    VL53L0XModel,
+    BMP280Model,
+    QMC5883LModel,
+    APDS9960Model,
+    SSD1306Model,
+    SH1106Model,
+)
+from . import dht, framebuf, machine, micropython, network, select, socket, utime
+
+# The modules that are always replaced, and the ones replaced only when missing
+SIMULATED_MODULES = {
+    "machine": machine,
+    "network": network,
+    "socket": socket,
+    "select": select,
+    "dht": dht,
+    "utime": utime,
+    "time": utime,
+}
+MICROPYTHON_MODULES = {"micropython": micropython, "framebuf": framebuf}
+
+
+def install(simulate_time: bool = True) -> None:
+    """
+    Puts the simulated modules in sys.modules, import the library after this
+    :param simulate_time: bool, if False, utime and time stay the modules of the computer
+    """
+    for name, module in SIMULATED_MODULES.items():
+        if simulate_time or name not in ("utime", "time"):
+            sys.modules[name] = module
+    for name, module in MICROPYTHON_MODULES.items():
+        try:
+            __import__(name)
+        except ImportError:
+            sys.modules[name] = module
+    try:
+        __import__("ustruct")
+    except ImportError:
+        sys.modules["ustruct"] = __import__("struct")
+
+
+def reset() -> None:
+    """Sets the clock to zero and removes all buses, their devices and the servers"""
+    CLOCK.now_ns = 0
+    reset_buses()
+    socket.SERVERS.clear()
@@ -0,0 +1,266 @@
+"""
+A simulated I2C bus with timing, counters and fault injection.
+
+Every machine.I2C or machine.SoftI2C object of the simulation talks to an
+I2CBus, which passes the bytes to the device models attached to it. A
+transaction takes the time its bits need at the bus frequency, plus a fixed
+overhead for the software, on the simulated clock. The bus counts the
+transactions and bytes, and can record every transaction in a trace.
+"""
+
+from errno import EIO, errorcode
+
+from .clock import CLOCK
+
+# The addresses machine.I2C.scan() tries
+SCAN_ADDRESSES = range(0x08, 0x78)
+
+
+class Fault:
+    """An error the bus raises instead of doing a transaction"""
+
+    # pylint: disable=too-many-positional-arguments
+    def __init__(self, errno: int, address: int, count: int, skip: int, kinds):
+        """
+        :param errno: int, the errno of the OSError, EIO for a NACK, ETIMEDOUT for a stuck bus
+        :param address: int, only fail transactions to this address, all addresses if None
+        :param count: int, the amount of transactions that fail, forever if None
+        :param skip: int, the amount of matching transactions that pass first
+        :param kinds: tuple, only fail these kinds of transactions, all kinds if None
+        """
+        self.errno = errno
+        self.address = address
+        self.count = count
+        self.skip = skip
+        self.kinds = kinds
+        self.raised = 0
+
+    @property
+    def done(self) -> bool:
+        """True when the fault will not raise anymore"""
+        return self.count is not None and self.raised >= self.count
+
+    def matches(self, kind: str, address: int) -> bool:
+        """Returns True if the transaction has to fail"""
+        if self.done:
+            return False
+        if self.address is not None and address != self.address:
+            return False
+        if self.kinds is not None and kind not in self.kinds:
+            return False
+        if self.skip > 0:
+            self.skip -= 1
+            return False
+        self.raised += 1
+        return True
+
+
+# pylint: disable=too-many-instance-attributes
+class I2CBus:
+    """
+    A simulated I2C bus.
+
+    Transactions are "probe" (a write without data, as scan() does), "write",
+    "read" and "write_read" (a write and a read with a repeated start, as
+    readfrom_mem() does). A device that is not attached, or not present,
+    does not acknowledge its address and the transaction raises OSError(EIO).
+    """
+
+    def __init__(self, freq: int = 400_000, overhead_us: int = 0, clock=CLOCK):
+        """
+        :param freq: int, the bus frequency in Hz, set by machine.I2C
+        :param overhead_us: int, the time the software needs for every transaction
+        :param clock: Clock, the simulated clock
+        """
+        self.freq = freq
+        self.overhead_us = overhead_us
+        self.clock = clock
+        self.devices = {}
+        self.multiplexer = None
+        self.faults = []
+        # A list to record every transaction in, None to not record
+        self.trace = None
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """Sets the counters to zero"""
+        self.transactions = 0
+        self.bytes_written = 0
+        self.bytes_read = 0
+        self.busy_ns = 0
+        self.nacks = 0
+        self.faults_raised = 0
+        self.kinds = {"probe": 0, "write": 0, "read": 0, "write_read": 0}
+
+    def stats(self) -> dict:
+        """
+        :return: dict, the transactions per kind, the bytes written and read,
+            the time the bus was busy in microseconds, the addresses that were not
+            acknowledged and the injected faults that were raised
+        """
+        return {
+            "transactions": self.transactions,
+            "bytes_written": self.bytes_written,
+            "bytes_read": self.bytes_read,
+            "bus_us": self.busy_ns // 1000,
+            "nacks": self.nacks,
+            "faults": self.faults_raised,
+            "kinds": dict(self.kinds),
+        }
+
+    def attach(self, device, channel: int = None):
+        """
+        Connects a device model to the bus
+        :param device: the model, see hwsim.devices
+        :param channel: int, the channel of the multiplexer, None to connect it to the bus itself
+        :return: the device
+        """
+        device.clock = self.clock
+        if channel is None:
+            self.devices[device.address] = device
+        else:
+            if self.multiplexer is None:
+                raise ValueError(
+                    "Add a multiplexer before attaching devices to a channel"
+                )
+            self.multiplexer.attach(device, channel)
+        return device
+
+    def detach(self, device) -> None:
+        """Removes a device model from the bus"""
+        if self.devices.get(device.address) is device:
+            del self.devices[device.address]
+        elif self.multiplexer is not None:
+            self.multiplexer.detach(device)
+
+    def add_multiplexer(self, multiplexer=None):
+        """
+        Connects a TCA9548A multiplexer to the bus
+        :param multiplexer: Multiplexer, a new one at 0x70 if None
+        :return: Multiplexer, the multiplexer
+        """
+        if multiplexer is None:
+            # pylint: disable-next=import-outside-toplevel
+            from .devices import Multiplexer
+
+            multiplexer = Multiplexer()
+        self.multiplexer = self.attach(multiplexer)
+        return multiplexer
+
+    # pylint: disable=too-many-positional-arguments
+    def inject(
+        self,
+        errno: int = EIO,
+        address: int = None,
+        count: int = 1,
+        skip: int = 0,
+        kinds=None,
+    ) -> Fault:
+        """
+        Makes transactions fail with an OSError, see Fault
+        :return: Fault, the fault
+        """
+        fault = Fault(errno, address, count, skip, kinds)
+        self.faults.append(fault)
+        return fault
+
+    def clear_faults(self) -> None:
+        """Removes all faults"""
+        self.faults = []
+
+    def device_at(self, address: int):
+        """
+        :return: the device that answers to the address, None if no device answers
+        """
+        device = self.devices.get(address)
+        if device is None and self.multiplexer is not None and self.multiplexer.present:
+            device = self.multiplexer.selected(address)
+        if device is None or not device.present:
+            return None
+        return device
+
+    def scan(self) -> list:
+        """Probes every address, like machine.I2C.scan()"""
+        found = []
+        for address in SCAN_ADDRESSES:
+            try:
+                self.transfer("probe", address)
+                found.append(address)
+            except OSError:
+                pass
+        return found
+
+    def _wire_time_ns(self, write_size: int, read_size: int, kind: str) -> int:
+        """Returns the time a transaction needs on the wire"""
+        # Start, address and acknowledge, every byte with its acknowledge, and stop
+        bits = 2 + 9 * (1 + write_size)
+        if kind == "read":
+            bits = 2 + 9 * (1 + read_size)
+        elif kind == "write_read":
+            bits += 1 + 9 * (1 + read_size)
+        return bits * 1_000_000_000 // self.freq + self.overhead_us * 1000
+
+    def transfer(self, kind: str, address: int, data=b"", read_size: int = 0) -> bytes:
+        """
+        Does one transaction
+        :param kind: str, "probe", "write", "read" or "write_read"
+        :param address: int, the 7-bit address
+        :param data: bytes, the bytes to write
+        :param read_size: int, the amount of bytes to read
+        :return: bytes, the bytes that were read
+        """
+        self.transactions += 1
+        self.kinds[kind] += 1
+        for fault in self.faults:
+            if fault.matches(kind, address):
+                self._finish(kind, address, 0, 0, self._wire_time_ns(0, 0, "probe"))
+                self.faults_raised += 1
+                raise OSError(fault.errno, errorcode.get(fault.errno, ""))
+        device = self.device_at(address)
+        if device is None:
+            # Only the address is sent, nobody acknowledges it
+            self._finish(kind, address, 0, 0, self._wire_time_ns(0, 0, "probe"))
+            self.nacks += 1
+            raise OSError(EIO, "EIO")
+        result = b""
+        if kind != "read":
+            device.write(bytes(data))
+        if kind in ("read", "write_read"):
+            result = bytes(device.read(read_size))
+        self.bytes_written += len(data)
+        self.bytes_read += len(result)
+        self._finish(
+            kind,
+            address,
+            len(data),
+            len(result),
+            self._wire_time_ns(len(data), read_size, kind),
+        )
+        return result
+
+    # pylint: disable=too-many-positional-arguments
+    def _finish(
+        self, kind: str, address: int, written: int, read: int, time_ns: int
+    ) -> None:
+        """Moves the clock and records the transaction"""
+        self.busy_ns += time_ns
+        self.clock.advance_ns(time_ns)
+        if self.trace is not None:
+            self.trace.append((kind, address, written, read, time_ns // 1000))
+
+
+BUSES = {}
+
+
+def get_bus(key=0) -> I2CBus:
+    """
+    Returns the bus of a machine.I2C id, or of the (scl, sda) pins of a machine.SoftI2C
+    """
+    if key not in BUSES:
+        BUSES[key] = I2CBus()
+    return BUSES[key]
+
+
+def reset_buses() -> None:
+    """Removes all buses and their devices"""
+    BUSES.clear()
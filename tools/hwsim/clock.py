@@ -0,0 +1,52 @@
+"""
+The simulated time of the simulation.
+
+Time only moves when the simulation says so: a bus transaction takes the time
+the bits need on the wire, and utime.sleep_ms() moves the clock instead of
+waiting. So a simulated run is repeatable, and a sensor that needs 30 ms for
+a measurement does not make a benchmark wait 30 ms.
+"""
+
+_TICKS_PERIOD = 1 << 30
+
+
+class Clock:
+    """A clock in nanoseconds that only moves forward when it is told to"""
+
+    def __init__(self):
+        self.now_ns = 0
+
+    def advance_ns(self, nanoseconds: int) -> None:
+        """Moves the clock forward"""
+        if nanoseconds > 0:
+            self.now_ns += int(nanoseconds)
+
+    def advance_us(self, microseconds) -> None:
+        """Moves the clock forward"""
+        self.advance_ns(microseconds * 1000)
+
+    @property
+    def now_us(self) -> int:
+        """The time in microseconds since the simulation started"""
+        return self.now_ns // 1000
+
+    def ticks_us(self) -> int:
+        """Returns the time in microseconds, wrapping like utime.ticks_us()"""
+        return (self.now_ns // 1000) % _TICKS_PERIOD
+
+    def ticks_ms(self) -> int:
+        """Returns the time in milliseconds, wrapping like utime.ticks_ms()"""
+        return (self.now_ns // 1_000_000) % _TICKS_PERIOD
+
+
+CLOCK = Clock()
+
+
+def ticks_diff(end: int, start: int) -> int:
+    """Returns the signed difference between two wrapping ticks values"""
+    return ((end - start + _TICKS_PERIOD // 2) % _TICKS_PERIOD) - _TICKS_PERIOD // 2
+
+
+def ticks_add(ticks: int, delta: int) -> int:
+    """Returns a ticks value delta after ticks"""
+    return (ticks + delta) % _TICKS_PERIOD
@@ -0,0 +1,548 @@
+"""
+Register-level models of the chips the library supports.
+
+A model gets the bytes of every transaction to its address from the I2CBus:
+write() for the bytes the driver writes, read() for the bytes it reads. The
+register models keep a register pointer that the first written byte sets and
+that moves on with every byte, like the real chips. Measurements take time
+on the simulated clock, so a driver that polls a status register sees the
+same amount of polls as on a robot.
+
+Set present to False to disconnect a chip, the bus then raises OSError(EIO).
+"""
+
+from .clock import CLOCK
+
+
+class RegisterModel:
+    """A chip with 256 byte registers and an auto-incrementing register pointer"""
+
+    def __init__(self, address: int):
+        self.address = address
+        self.present = True
+        self.clock = CLOCK
+        self.registers = bytearray(256)
+        self.pointer = 0
+
+    def write(self, data: bytes) -> None:
+        """Handles the bytes of a write, the first byte is the register"""
+        if not data:
+            return
+        self.pointer = data[0]
+        for value in data[1:]:
+            self.write_register(self.pointer, value)
+            self.pointer = (self.pointer + 1) & 0xFF
+
+    def read(self, size: int) -> bytes:
+        """Handles a read, starting at the register pointer"""
+        result = bytearray(size)
+        for index in range(size):
+            result[index] = self.read_register(self.pointer)
+            self.pointer = (self.pointer + 1) & 0xFF
+        return result
+
+    def read_register(self, register: int) -> int:
+        """Returns the value of a register, override for registers with behaviour"""
+        return self.registers[register]
+
+    def write_register(self, register: int, value: int) -> None:
+        """Sets the value of a register, override for registers with behaviour"""
+        self.registers[register] = value
+
+    def set_registers(self, register: int, data: bytes) -> None:
+        """Sets the values of registers without going through the bus"""
+        self.registers[register : register + len(data)] = bytes(data)
+
+
+class Multiplexer:
+    """A TCA9548A I2C multiplexer, every bit of its control register enables a channel"""
+
+    def __init__(self, address: int = 0x70):
+        self.address = address
+        self.present = True
+        self.clock = CLOCK
+        self.control = 0
+        self.channels = [{} for _ in range(8)]
+
+    def attach(self, device, channel: int) -> None:
+        """Connects a device model to a channel"""
+        device.clock = self.clock
+        self.channels[channel][device.address] = device
+
+    def detach(self, device) -> None:
+        """Removes a device model from its channel"""
+        for devices in self.channels:
+            if devices.get(device.address) is device:
+                del devices[device.address]
+
+    def selected(self, address: int):
+        """Returns the device at the address on an enabled channel, None if there is none"""
+        for channel, devices in enumerate(self.channels):
+            if self.control & (1 << channel) and address in devices:
+                return devices[address]
+        return None
+
+    def write(self, data: bytes) -> None:
+        """Sets the control register"""
+        if data:
+            self.control = data[-1]
+
+    def read(self, size: int) -> bytes:
+        """Reads the control register"""
+        return bytes([self.control]) * size
+
+
+# pylint: disable=too-many-instance-attributes
+class VL53L0XModel(RegisterModel):
+    """
+    A VL53L0X time-of-flight sensor.
+
+    The registers are in pages, selected with register 0xFF, as the driver
+    expects. Writing SYSRANGE_START starts a single or continuous measurement,
+    which is ready after measurement_us; RESULT_INTERRUPT_STATUS then reports
+    a new sample until the interrupt is cleared.
+    """
+
+    SYSRANGE_START = 0x00
+    INTERRUPT_CLEAR = 0x0B
+    RESULT_INTERRUPT_STATUS = 0x13
+    RESULT_RANGE = 0x1E
+    PAGE_SELECT = 0xFF
+
+    def __init__(
+        self, address: int = 0x29, distance_mm: int = 500, measurement_us: int = 33_000
+    ):
+        """
+        :param distance_mm: int, the distance the sensor measures
+        :param measurement_us: int, the time one measurement takes
+        """
+        super().__init__(address)
+        self.distance_mm = distance_mm
+        self.measurement_us = measurement_us
+        self.measurements = 0
+        self.page = 0
+        # The registers of the other pages, by (page, register)
+        self.paged = {(1, 0x91): 0x3C, (7, 0x92): 0x8C}
+        self.registers[0xC0] = 0xEE
+        self.set_registers(0xB0, b"\xff" * 6)
+        self._ready_ns = None
+        self._continuous = False
+
+    def _start_measurement(self) -> None:
+        self._ready_ns = self.clock.now_ns + self.measurement_us * 1000
+
+    def _sample_ready(self) -> bool:
+        return self._ready_ns is not None and self.clock.now_ns >= self._ready_ns
+
+    def read_register(self, register: int) -> int:
+        if register == self.PAGE_SELECT:
+            return self.page
+        if self.page:
+            return self.paged.get((self.page, register), 0)
+        if register == self.RESULT_INTERRUPT_STATUS:
+            return 0x04 if self._sample_ready() else 0x00
+        if register == self.RESULT_RANGE:
+            return (self.distance_mm >> 8) & 0xFF
+        if register == self.RESULT_RANGE + 1:
+            return self.distance_mm & 0xFF
+        return self.registers[register]
+
+    def write_register(self, register: int, value: int) -> None:
+        if register == self.PAGE_SELECT:
+            self.page = value
+            return
+        if self.page:
+            if (self.page, register) == (7, 0x83) and value == 0:
+                # The SPAD information is ready right away
+                value = 0x10
+            self.paged[(self.page, register)] = value
+            return
+        if register == self.SYSRANGE_START:
+            if value & 0x01 and self._continuous:
+                # Writing 1 while ranging continuously stops the ranging
+                self._continuous = False
+                self._ready_ns = None
+            elif value & 0x07:
+                self._continuous = not value & 0x01
+                self._start_measurement()
+            # The start bit is cleared once the measurement has started
+            self.registers[register] = value & ~0x01
+            return
+        if register == self.INTERRUPT_CLEAR and value & 0x01:
+            if self._sample_ready():
+                self.measurements += 1
+            self._ready_ns = None
+            if self._continuous:
+                self._start_measurement()
+            return
+        self.registers[register] = value
+
+
+class BMP280Model(RegisterModel):
+    """
+    A BMP280 pressure and temperature sensor.
+
+    The calibration values and raw readings default to the example of the
+    datasheet: 25.08 degrees Celsius and 100653 Pa. In forced mode, a
+    measurement takes the time of the oversampling settings, and the sensor
+    goes back to sleep mode afterwards.
+    """
+
+    CALIBRATION = (
+        27504,
+        26435,
+        -1000,
+        36477,
+        -10685,
+        3024,
+        2855,
+        140,
+        -7,
+        15500,
+        -14600,
+        6000,
+    )
+    REGISTER_ID = 0xD0
+    REGISTER_RESET = 0xE0
+    REGISTER_STATUS = 0xF3
+    REGISTER_CONTROL = 0xF4
+    REGISTER_DATA = 0xF7
+    OVERSAMPLING = (0, 1, 2, 4, 8, 16, 16, 16)
+
+    def __init__(
+        self,
+        address: int = 0x76,
+        raw_temperature: int = 519888,
+        raw_pressure: int = 415148,
+    ):
+        """
+        :param raw_temperature: int, the 20-bit temperature reading
+        :param raw_pressure: int, the 20-bit pressure reading
+        """
+        super().__init__(address)
+        self.raw_temperature = raw_temperature
+        self.raw_pressure = raw_pressure
+        self.measurements = 0
+        self.registers[self.REGISTER_ID] = 0x58
+        for index, value in enumerate(self.CALIBRATION):
+            value &= 0xFFFF
+            self.registers[0x88 + 2 * index] = value & 0xFF
+            self.registers[0x89 + 2 * index] = value >> 8
+        self._done_ns = None
+        self._reset_data()
+
+    def _reset_data(self) -> None:
+        # The data registers read 0x80000 until the first measurement
+        self.set_registers(self.REGISTER_DATA, b"\x80\x00\x00\x80\x00\x00")
+
+    def measurement_us(self) -> int:
+        """Returns the time a measurement takes with the oversampling in the control register"""
+        control = self.registers[self.REGISTER_CONTROL]
+        temperature = self.OVERSAMPLING[control >> 5]
+        pressure = self.OVERSAMPLING[(control >> 2) & 0x07]
+        return 1250 + 2300 * temperature + 2300 * pressure + (575 if pressure else 0)
+
+    def _measure(self) -> None:
+        self.measurements += 1
+        pressure = self.raw_pressure << 4
+        temperature = self.raw_temperature << 4
+        self.set_registers(
+            self.REGISTER_DATA,
+            bytes(
+                (
+                    (pressure >> 16) & 0xFF,
+                    (pressure >> 8) & 0xFF,
+                    pressure & 0xF0,
+                    (temperature >> 16) & 0xFF,
+                    (temperature >> 8) & 0xFF,
+                    temperature & 0xF0,
+                )
+            ),
+        )
+
+    def _update(self) -> None:
+        """Finishes a forced measurement that is done"""
+        if self._done_ns is not None and self.clock.now_ns >= self._done_ns:
+            self._done_ns = None
+            self._measure()
+            # Back to sleep mode
+            self.registers[self.REGISTER_CONTROL] &= 0xFC
+
+    def read_register(self, register: int) -> int:
+        self._update()
+        if register == self.REGISTER_STATUS:
+            return 0x08 if self._done_ns is not None else 0x00
+        if (
+            register == self.REGISTER_DATA
+            and self.registers[self.REGISTER_CONTROL] & 0x03 == 0x03
+        ):
+            # Normal mode measures all the time
+            self._measure()
+        return self.registers[register]
+
+    def write_register(self, register: int, value: int) -> None:
+        self._update()
+        if register == self.REGISTER_RESET:
+            if value == 0xB6:
+                self.registers[self.REGISTER_CONTROL] = 0
+                self.registers[0xF5] = 0
+                self._done_ns = None
+                self._reset_data()
+            return
+        self.registers[register] = value
+        if register == self.REGISTER_CONTROL and value & 0x03 in (0x01, 0x02):
+            self._done_ns = self.clock.now_ns + self.measurement_us() * 1000
+
+
+class QMC5883LModel(RegisterModel):
+    """
+    A QMC5883L magnetometer.
+
+    In continuous mode, the chip makes a new sample at the output data rate.
+    The status register reports a new sample (DRDY) until the data is read,
+    and a skipped sample (DOR) when a sample came in before the previous
+    one was read.
+    """
+
+    REGISTER_STATUS = 0x06
+    REGISTER_CONTROL = 0x09
+    DATA_RATES = (10, 50, 100, 200)
+
+    def __init__(self, address: int = 0x0D, field=(1200, -300, 4000)):
+        """
+        :param field: tuple, the raw x, y and z readings
+        """
+        super().__init__(address)
+        self.field = field
+        self.registers[0x0D] = 0xFF
+        self._last_read_ns = 0
+
+    def _samples_since_read(self) -> int:
+        control = self.registers[self.REGISTER_CONTROL]
+        if control & 0x03 != 0x01:
+            return 0
+        period_ns = 1_000_000_000 // self.DATA_RATES[(control >> 2) & 0x03]
+        return (self.clock.now_ns - self._last_read_ns) // period_ns
+
+    def read_register(self, register: int) -> int:
+        if register == self.REGISTER_STATUS:
+            samples = self._samples_since_read()
+            return (0x01 if samples >= 1 else 0) | (0x04 if samples >= 2 else 0)
+        if register < 6:
+            value = self.field[register // 2] & 0xFFFF
+            if register == 5:
+                self._last_read_ns = self.clock.now_ns
+            return value >> 8 if register & 1 else value & 0xFF
+        return self.registers[register]
+
+    def write_register(self, register: int, value: int) -> None:
+        if register == self.REGISTER_CONTROL:
+            self._last_read_ns = self.clock.now_ns
+        self.registers[register] = value
+
+
+class APDS9960Model(RegisterModel):
+    """
+    An APDS-9960 gesture and color sensor.
+
+    A color reading is valid one integration time (ATIME) after the color
+    engine is enabled. Gestures are queued with swipe() or add_gesture_data()
+    and read from the FIFO registers 0xFC to 0xFF, four bytes per dataset.
+    """
+
+    REGISTER_ENABLE = 0x80
+    REGISTER_ATIME = 0x81
+    REGISTER_ID = 0x92
+    REGISTER_STATUS = 0x93
+    REGISTER_CDATAL = 0x94
+    REGISTER_GFLVL = 0xAE
+    REGISTER_GSTATUS = 0xAF
+    REGISTER_GFIFO_U = 0xFC
+    # The (up, down, left, right) datasets of a hand moving over the sensor
+    SWIPES = {
+        "left": ((90, 90, 160, 40), (90, 90, 40, 160)),
+        "right": ((90, 90, 40, 160), (90, 90, 160, 40)),
+        "up": ((160, 40, 90, 90), (40, 160, 90, 90)),
+        "down": ((40, 160, 90, 90), (160, 40, 90, 90)),
+    }
+
+    def __init__(self, address: int = 0x39, color=(1000, 400, 300, 200)):
+        """
+        :param color: tuple, the raw clear, red, green and blue readings
+        """
+        super().__init__(address)
+        self.color = color
+        self.gesture_fifo = []
+        self.registers[self.REGISTER_ID] = 0xAB
+        self.registers[self.REGISTER_ATIME] = 0xFF
+        self._color_start_ns = None
+
+    def add_gesture_data(self, datasets) -> None:
+        """Puts (up, down, left, right) datasets in the gesture FIFO"""
+        for dataset in datasets:
+            self.gesture_fifo.extend(dataset)
+
+    def swipe(self, direction: str) -> None:
+        """Puts the datasets of a hand moving left, right, up or down in the FIFO"""
+        away = (0, 0, 0, 0)
+        self.add_gesture_data((away,) + self.SWIPES[direction] + (away,))
+
+    def _color_valid(self) -> bool:
+        enable = self.registers[self.REGISTER_ENABLE]
+        if enable & 0x03 != 0x03 or self._color_start_ns is None:
+            return False
+        integration_ns = (256 - self.registers[self.REGISTER_ATIME]) * 2_780_000
+        return self.clock.now_ns - self._color_start_ns >= integration_ns
+
+    def read(self, size: int) -> bytes:
+        if self.pointer < self.REGISTER_GFIFO_U:
+            return super().read(size)
+        # A read from the FIFO takes the datasets in order
+        result = bytes(self.gesture_fifo[:size])
+        del self.gesture_fifo[:size]
+        return result + bytes(size - len(result))
+
+    def read_register(self, register: int) -> int:
+        if register == self.REGISTER_STATUS:
+            return 0x01 if self._color_valid() else 0x00
+        if self.REGISTER_CDATAL <= register < self.REGISTER_CDATAL + 8:
+            value = self.color[(register - self.REGISTER_CDATAL) // 2]
+            return value >> 8 if register & 1 else value & 0xFF
+        gesture_on = self.registers[self.REGISTER_ENABLE] & 0x41 == 0x41
+        if register == self.REGISTER_GFLVL:
+            return len(self.gesture_fifo) // 4 if gesture_on else 0
+        if register == self.REGISTER_GSTATUS:
+            return 0x01 if gesture_on and self.gesture_fifo else 0x00
+        return self.registers[register]
+
+    def write_register(self, register: int, value: int) -> None:
+        if register == self.REGISTER_ENABLE:
+            if value & 0x03 == 0x03 and self.registers[register] & 0x03 != 0x03:
+                self._color_start_ns = self.clock.now_ns
+        self.registers[register] = value
+
+
+class DisplayModel:
+    """
+    An SSD1306 or SH1106 OLED controller.
+
+    The first byte of a write is the control byte: 0x80 for one command,
+    0x00 for a stream of commands and 0x40 for a stream of display data.
+    The model follows the page and column addresses, and keeps the display
+    RAM, so pixel() shows what the screen would show.
+    """
+
+    # The amount of arguments of the commands that have them
+    ARGUMENTS = {
+        0x20: 1,
+        0x21: 2,
+        0x22: 2,
+        0x81: 1,
+        0x8D: 1,
+        0xA8: 1,
+        0xAD: 1,
+        0xD3: 1,
+        0xD5: 1,
+        0xD9: 1,
+        0xDA: 1,
+        0xDB: 1,
+    }
+    COLUMNS = 128
+    COLUMN_OFFSET = 0
+
+    def __init__(self, address: int = 0x3C, height: int = 64):
+        self.address = address
+        self.present = True
+        self.clock = CLOCK
+        self.pages = height // 8
+        self.ram = bytearray(self.COLUMNS * self.pages)
+        self.display_on = False
+        self.commands = 0
+        self.data_bytes = 0
+        self.page = 0
+        self.column = 0
+        # The column and page window of the horizontal addressing mode, None for page addressing
+        self.window = None
+        self._command = []
+
+    def write(self, data: bytes) -> None:
+        """Handles the control byte and the commands or data after it"""
+        if not data:
+            return
+        if data[0] & 0x40:
+            for value in data[1:]:
+                self._write_ram(value)
+        elif data[0] & 0x80:
+            # One command byte after every control byte
+            for index in range(1, len(data), 2):
+                self._command_byte(data[index])
+        else:
+            for value in data[1:]:
+                self._command_byte(value)
+
+    def read(self, size: int) -> bytes:
+        """Reads the status byte, bit 6 is set when the display is off"""
+        return bytes([0x00 if self.display_on else 0x40]) * size
+
+    def pixel(self, x: int, y: int) -> int:
+        """Returns the pixel of the display RAM"""
+        return (
+            self.ram[(y // 8) * self.COLUMNS + x + self.COLUMN_OFFSET] >> (y % 8)
+        ) & 1
+
+    def _write_ram(self, value: int) -> None:
+        self.data_bytes += 1
+        if 0 <= self.column < self.COLUMNS and self.page < self.pages:
+            self.ram[self.page * self.COLUMNS + self.column] = value
+        if self.window is None:
+            self.column += 1
+            return
+        first_column, last_column, first_page, last_page = self.window
+        self.column += 1
+        if self.column > last_column:
+            self.column = first_column
+            self.page = first_page if self.page >= last_page else self.page + 1
+
+    def _command_byte(self, value: int) -> None:
+        command = self._command
+        if command:
+            command.append(value)
+        else:
+            command.append(value)
+            self.commands += 1
+        if len(command) > self.ARGUMENTS.get(command[0], 0):
+            self._command = []
+            self.execute(command[0], command[1:])
+
+    def execute(self, command: int, arguments: list) -> None:
+        """Runs a command with all its arguments"""
+        if command in (0xAE, 0xAF):
+            self.display_on = command == 0xAF
+        elif 0xB0 <= command <= 0xB7:
+            self.page = command & 0x07
+        elif command <= 0x0F:
+            self.column = (self.column & 0xF0) | command
+        elif command <= 0x1F:
+            self.column = (self.column & 0x0F) | ((command & 0x0F) << 4)
+        elif command == 0x20:
+            if arguments[0] == 0x02:
+                self.window = None
+            elif self.window is None:
+                self.window = [0, self.COLUMNS - 1, 0, self.pages - 1]
+        elif command == 0x21 and self.window is not None:
+            self.window[0], self.window[1] = arguments
+            self.column = arguments[0]
+        elif command == 0x22 and self.window is not None:
+            self.window[2], self.window[3] = arguments
+            self.page = arguments[0]
+
+
+class SSD1306Model(DisplayModel):
+    """An SSD1306 OLED controller with 128 columns"""
+
+
+class SH1106Model(DisplayModel):
+    """An SH1106 OLED controller, its 132 columns are centered on the 128 pixel screen"""
+
+    COLUMNS = 132
+    COLUMN_OFFSET = 2
@@ -0,0 +1,54 @@
+"""
+The dht module of the simulation.
+
+A measurement takes the time of the transfer on the simulated clock, and
+reads the temperature and humidity attributes. Set error to an OSError to
+make measure() raise it, like a sensor that does not answer.
+"""
+
+from .clock import CLOCK
+
+
+class DHTBase:
+    """A DHT sensor"""
+
+    # The time the start signal and the 40 bits take
+    MEASURE_US = 5_000
+
+    def __init__(self, pin, temperature=21.5, humidity=45.0):
+        self.pin = pin
+        self.temperature_c = temperature
+        self.humidity_rh = humidity
+        self.error = None
+        self.measurements = 0
+        self._values = (None, None)
+
+    def measure(self) -> None:
+        """Reads the sensor"""
+        CLOCK.advance_us(self.MEASURE_US)
+        if self.error is not None:
+            raise self.error
+        self.measurements += 1
+        self._values = (self.temperature_c, self.humidity_rh)
+
+    def temperature(self):
+        """Returns the temperature of the last measurement"""
+        return self._values[0]
+
+    def humidity(self):
+        """Returns the humidity of the last measurement"""
+        return self._values[1]
+
+
+class DHT11(DHTBase):
+    """A DHT11 sensor, it reports whole numbers"""
+
+    MEASURE_US = 23_000
+
+    def measure(self) -> None:
+        super().measure()
+        self._values = (int(self.temperature_c), int(self.humidity_rh))
+
+
+class DHT22(DHTBase):
+    """A DHT22 sensor"""
@@ -0,0 +1,189 @@
+"""
+The framebuf module of the simulation, for CPython.
+
+Only the monochrome formats are supported, which is what the displays of
+the library use. text() draws a pattern made from the character code instead
+of the font of MicroPython, so the amount of pixels is right but the letters
+are not.
+"""
+
+MONO_VLSB = 0
+RGB565 = 1
+GS4_HMSB = 2
+MONO_HLSB = 3
+MONO_HMSB = 4
+GS2_HMSB = 5
+GS8 = 6
+
+
+class FrameBuffer:
+    """A monochrome frame buffer on top of a bytearray"""
+
+    # pylint: disable=too-many-positional-arguments
+    def __init__(
+        self,
+        buf,
+        width: int,
+        height: int,
+        buf_format: int = MONO_VLSB,
+        stride: int = None,
+    ):
+        if buf_format not in (MONO_VLSB, MONO_HLSB, MONO_HMSB):
+            raise ValueError("the simulation only supports the monochrome formats")
+        self.buf = buf
+        self.width = width
+        self.height = height
+        self.format = buf_format
+        self.stride = width if stride is None else stride
+        if buf_format != MONO_VLSB:
+            self.stride = (self.stride + 7) & ~7
+
+    def _position(self, x: int, y: int):
+        """Returns the byte index and bit of a pixel"""
+        if self.format == MONO_VLSB:
+            return (y >> 3) * self.stride + x, y & 7
+        index = (x + y * self.stride) >> 3
+        return index, (7 - (x & 7)) if self.format == MONO_HLSB else x & 7
+
+    def pixel(self, x: int, y: int, color: int = None):
+        """Returns the color of a pixel, or sets it"""
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        index, bit = self._position(x, y)
+        if color is None:
+            return (self.buf[index] >> bit) & 1
+        if color:
+            self.buf[index] |= 1 << bit
+        else:
+            self.buf[index] &= ~(1 << bit) & 0xFF
+        return None
+
+    def fill(self, color: int) -> None:
+        """Sets every pixel"""
+        value = 0xFF if color else 0x00
+        if self.format == MONO_VLSB:
+            size = ((self.height + 7) >> 3) * self.stride
+        else:
+            size = (self.stride * self.height) >> 3
+        for index in range(size):
+            self.buf[index] = value
+
+    # pylint: disable=too-many-positional-arguments
+    def fill_rect(self, x: int, y: int, width: int, height: int, color: int) -> None:
+        """Sets the pixels of a rectangle"""
+        for row in range(max(y, 0), min(y + height, self.height)):
+            for column in range(max(x, 0), min(x + width, self.width)):
+                self.pixel(column, row, color)
+
+    def hline(self, x: int, y: int, width: int, color: int) -> None:
+        """Draws a horizontal line"""
+        self.fill_rect(x, y, width, 1, color)
+
+    def vline(self, x: int, y: int, height: int, color: int) -> None:
+        """Draws a vertical line"""
+        self.fill_rect(x, y, 1, height, color)
+
+    # pylint: disable=too-many-positional-arguments
+    def rect(
+        self, x: int, y: int, width: int, height: int, color: int, fill: bool = False
+    ) -> None:
+        """Draws the outline of a rectangle, or a filled one"""
+        if fill:
+            self.fill_rect(x, y, width, height, color)
+            return
+        self.hline(x, y, width, color)
+        self.hline(x, y + height - 1, width, color)
+        self.vline(x, y, height, color)
+        self.vline(x + width - 1, y, height, color)
+
+    # pylint: disable=too-many-positional-arguments
+    def line(self, x0: int, y0: int, x1: int, y1: int, color: int) -> None:
+        """Draws a line with the algorithm of Bresenham"""
+        dx = abs(x1 - x0)
+        dy = -abs(y1 - y0)
+        step_x = 1 if x0 < x1 else -1
+        step_y = 1 if y0 < y1 else -1
+        error = dx + dy
+        while True:
+            self.pixel(x0, y0, color)
+            if x0 == x1 and y0 == y1:
+                return
+            double = 2 * error
+            if double >= dy:
+                error += dy
+                x0 += step_x
+            if double <= dx:
+                error += dx
+                y0 += step_y
+
+    # pylint: disable=too-many-positional-arguments
+    def ellipse(
+        self,
+        x: int,
+        y: int,
+        x_radius: int,
+        y_radius: int,
+        color: int,
+        fill: bool = False,
+        quadrants=0xF,
+    ):
+        """Draws an ellipse, all four quadrants are always drawn"""
+        # pylint: disable=unused-argument
+        limit = (x_radius * y_radius) ** 2
+
+        def inside(column, row):
+            return (column * y_radius) ** 2 + (row * x_radius) ** 2 <= limit
+
+        for row in range(-y_radius, y_radius + 1):
+            for column in range(-x_radius, x_radius + 1):
+                if not inside(column, row):
+                    continue
+                edge = not (
+                    inside(column + 1, row)
+                    and inside(column - 1, row)
+                    and inside(column, row + 1)
+                    and inside(column, row - 1)
+                )
+                if fill or edge:
+                    self.pixel(x + column, y + row, color)
+
+    def text(self, string: str, x: int, y: int, color: int = 1) -> None:
+        """Draws 8x8 characters, with a pattern instead of the font"""
+        for character in string:
+            code = ord(character)
+            if code > 32:
+                for column in range(8):
+                    pattern = (code * 37 + column * 11) & 0x7E
+                    for row in range(8):
+                        if pattern & (1 << row):
+                            self.pixel(x + column, y + row, color)
+            x += 8
+
+    def scroll(self, x_step: int, y_step: int) -> None:
+        """Moves the pixels, the pixels that are uncovered keep their color"""
+        columns = range(self.width - 1, -1, -1) if x_step > 0 else range(self.width)
+        rows = range(self.height - 1, -1, -1) if y_step > 0 else range(self.height)
+        for row in rows:
+            for column in columns:
+                source_x = column - x_step
+                source_y = row - y_step
+                if 0 <= source_x < self.width and 0 <= source_y < self.height:
+                    self.pixel(column, row, self.pixel(source_x, source_y))
+
+    # pylint: disable=too-many-positional-arguments
+    def blit(self, source, x: int, y: int, key: int = -1, palette=None) -> None:
+        """Draws another frame buffer, pixels with the key color are skipped"""
+        for row in range(source.height):
+            for column in range(source.width):
+                color = source.pixel(column, row)
+                if palette is not None:
+                    color = palette.pixel(color, 0)
+                if color != key:
+                    self.pixel(x + column, y + row, color)
+
+
+def FrameBuffer1(
+    buf, width: int, height: int, stride: int = None
+):  # pylint: disable=invalid-name
+    """Returns a MONO_VLSB frame buffer, the old way to make one"""
+    return FrameBuffer(buf, width, height, MONO_VLSB, stride)
@@ -0,0 +1,350 @@
+"""
+The machine module of the simulation.
+
+I2C and SoftI2C talk to the simulated buses of hwsim.bus. Pins, PWM and ADC
+keep their state so it can be checked, timers only run when fire() is
+called, and sleeping moves the simulated clock.
+"""
+
+# The functions of the module have the names of arguments, like freq
+# pylint: disable=redefined-outer-name
+from .bus import get_bus
+from .clock import CLOCK
+
+
+class Pin:
+    """A GPIO pin that keeps its mode and value"""
+
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_RISING = 4
+    IRQ_FALLING = 8
+
+    # pylint: disable=too-many-positional-arguments
+    def __init__(self, pin_id, mode=-1, pull=-1, value=None, **kwargs):
+        self.id = pin_id
+        self.mode = mode
+        self.pull = pull
+        self.irq_handler = None
+        self._value = 0
+        self.init(mode, pull, value=value, **kwargs)
+
+    # pylint: disable-next=unused-argument
+    def init(self, mode=-1, pull=-1, value=None, **kwargs):
+        """Sets the mode, pull and value of the pin"""
+        if mode != -1:
+            self.mode = mode
+        if pull != -1:
+            self.pull = pull
+        if value is not None:
+            self._value = 1 if value else 0
+
+    def value(self, value=None):
+        """Returns the value of the pin, or sets it"""
+        if value is None:
+            return self._value
+        self._value = 1 if value else 0
+        return None
+
+    def __call__(self, value=None):
+        return self.value(value)
+
+    def on(self):
+        """Sets the pin high"""
+        self._value = 1
+
+    def off(self):
+        """Sets the pin low"""
+        self._value = 0
+
+    high = on
+    low = off
+
+    def toggle(self):
+        """Changes the value of the pin"""
+        self._value ^= 1
+
+    # pylint: disable-next=unused-argument
+    def irq(self, handler=None, trigger=IRQ_RISING | IRQ_FALLING, hard=False):
+        """Keeps the interrupt handler, it runs when the simulation calls it"""
+        self.irq_handler = handler
+        return self
+
+
+class PWM:
+    """A PWM output that keeps its frequency and duty cycle"""
+
+    def __init__(self, pin, freq: int = 1000, duty_u16: int = 0):
+        self.pin = pin
+        self._freq = freq
+        self._duty_u16 = duty_u16
+
+    def freq(self, value=None):
+        """Returns the frequency, or sets it"""
+        if value is None:
+            return self._freq
+        self._freq = value
+        return None
+
+    def duty_u16(self, value=None):
+        """Returns the duty cycle from 0 to 65535, or sets it"""
+        if value is None:
+            return self._duty_u16
+        self._duty_u16 = value
+        return None
+
+    def duty_ns(self, value=None):
+        """Returns the high time in nanoseconds, or sets it"""
+        period_ns = 1_000_000_000 // self._freq
+        if value is None:
+            return self._duty_u16 * period_ns // 65535
+        self._duty_u16 = value * 65535 // period_ns
+        return None
+
+    def deinit(self):
+        """Stops the output"""
+        self._duty_u16 = 0
+
+
+class ADC:  # pylint: disable=too-few-public-methods
+    """An analog input, it reads value_u16 or the return value of a function"""
+
+    CORE_TEMP = 4
+
+    def __init__(self, pin, value_u16=32768):
+        self.pin = pin
+        self.value_u16 = value_u16
+
+    def read_u16(self) -> int:
+        """Returns the value from 0 to 65535"""
+        value = self.value_u16
+        return value() if callable(value) else value
+
+
+class Timer:
+    """A timer that keeps its callback, call fire() to run it"""
+
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, timer_id=-1, **kwargs):
+        self.id = timer_id
+        self.mode = self.PERIODIC
+        self.period = None
+        self.callback = None
+        if kwargs:
+            self.init(**kwargs)
+
+    # pylint: disable-next=unused-argument
+    def init(self, mode=PERIODIC, freq=None, period=None, callback=None, **kwargs):
+        """Sets the mode, period and callback"""
+        self.mode = mode
+        self.period = 1000 // freq if freq else period
+        self.callback = callback
+
+    def fire(self):
+        """Runs the callback, as the timer would after its period"""
+        if self.callback is not None:
+            callback = self.callback
+            if self.mode == self.ONE_SHOT:
+                self.callback = None
+            callback(self)
+
+    def deinit(self):
+        """Stops the timer"""
+        self.callback = None
+
+
+# pylint: disable=too-many-positional-arguments,unused-argument,redefined-builtin
+class I2C:
+    """A hardware I2C bus, it uses the simulated bus with the same id"""
+
+    def __init__(self, id=0, *, scl=None, sda=None, freq=400_000, timeout=50_000):
+        self.bus = get_bus(id)
+        self.bus.freq = freq
+        self.scl = scl
+        self.sda = sda
+        self.timeout = timeout
+
+    def scan(self) -> list:
+        """Returns the addresses that acknowledge"""
+        return self.bus.scan()
+
+    def writeto(self, addr: int, buf, stop: bool = True) -> int:
+        """Writes the bytes, returns the amount of acknowledged bytes"""
+        self.bus.transfer("write" if len(buf) else "probe", addr, buf)
+        return len(buf)
+
+    def writevto(self, addr: int, vector, stop: bool = True) -> int:
+        """Writes the bytes of every buffer in one transaction"""
+        data = b"".join(bytes(buf) for buf in vector)
+        self.bus.transfer("write" if data else "probe", addr, data)
+        return len(data)
+
+    def readfrom(self, addr: int, nbytes: int, stop: bool = True) -> bytes:
+        """Reads nbytes"""
+        return self.bus.transfer("read", addr, read_size=nbytes)
+
+    def readfrom_into(self, addr: int, buf, stop: bool = True) -> None:
+        """Reads into buf"""
+        buf[:] = self.bus.transfer("read", addr, read_size=len(buf))
+
+    def _memory_address(self, memaddr: int, addrsize: int) -> bytes:
+        return memaddr.to_bytes(addrsize // 8, "big")
+
+    def readfrom_mem(
+        self, addr: int, memaddr: int, nbytes: int, *, addrsize: int = 8
+    ) -> bytes:
+        """Writes the register and reads nbytes, with a repeated start"""
+        return self.bus.transfer(
+            "write_read", addr, self._memory_address(memaddr, addrsize), nbytes
+        )
+
+    def readfrom_mem_into(
+        self, addr: int, memaddr: int, buf, *, addrsize: int = 8
+    ) -> None:
+        """Writes the register and reads into buf, with a repeated start"""
+        buf[:] = self.bus.transfer(
+            "write_read", addr, self._memory_address(memaddr, addrsize), len(buf)
+        )
+
+    def writeto_mem(self, addr: int, memaddr: int, buf, *, addrsize: int = 8) -> None:
+        """Writes the register and the bytes"""
+        self.bus.transfer(
+            "write", addr, self._memory_address(memaddr, addrsize) + bytes(buf)
+        )
+
+
+class SoftI2C(I2C):
+    """A bit-banged I2C bus, it uses the simulated bus of its (scl, sda) pins"""
+
+    def __init__(self, scl, sda, *, freq=400_000, timeout=50_000):
+        super().__init__(
+            (_pin_id(scl), _pin_id(sda)), scl=scl, sda=sda, freq=freq, timeout=timeout
+        )
+
+
+# pylint: disable=too-many-instance-attributes
+class UART:
+    """
+    A serial port, written bytes are kept in sent, bytes in received can be read.
+
+    Like on the boards, the receive buffer holds rxbuf bytes and bytes that do
+    not fit are lost. With loopback set to True, written bytes are received.
+    """
+
+    def __init__(self, uart_id, baudrate=115200, **kwargs):
+        self.id = uart_id
+        self.baudrate = baudrate
+        self.settings = kwargs
+        self.rxbuf = kwargs.get("rxbuf", 256)
+        self.loopback = False
+        self.overflows = 0
+        self.sent = bytearray()
+        self.received = bytearray()
+
+    def init(self, baudrate=115200, **kwargs):
+        """Sets the baud rate and settings"""
+        self.baudrate = baudrate
+        self.settings = kwargs
+        self.rxbuf = kwargs.get("rxbuf", self.rxbuf)
+
+    def write(self, buf) -> int:
+        """Sends the bytes, moving the clock by their time on the wire"""
+        self.sent.extend(buf)
+        CLOCK.advance_ns(len(buf) * 10 * 1_000_000_000 // self.baudrate)
+        if self.loopback:
+            self.receive(buf)
+        return len(buf)
+
+    def receive(self, data) -> None:
+        """Puts bytes in the receive buffer, as if they came in on the wire"""
+        room = self.rxbuf - len(self.received)
+        if len(data) > room:
+            self.overflows += 1
+            data = data[:room]
+        self.received.extend(data)
+
+    def any(self) -> int:
+        """Returns the amount of bytes that can be read"""
+        return len(self.received)
+
+    def read(self, nbytes=None):
+        """Reads the received bytes, None if there are none"""
+        if not self.received:
+            return None
+        if nbytes is None:
+            nbytes = len(self.received)
+        data = bytes(self.received[:nbytes])
+        del self.received[:nbytes]
+        return data
+
+    def readinto(self, buf, nbytes=None):
+        """Reads the received bytes into buf, returns the amount, None if there are none"""
+        if not self.received:
+            return None
+        if nbytes is None:
+            nbytes = len(buf)
+        nbytes = min(nbytes, len(self.received))
+        buf[:nbytes] = self.received[:nbytes]
+        del self.received[:nbytes]
+        return nbytes
+
+
+def _pin_id(pin):
+    return getattr(pin, "id", pin)
+
+
+def idle():
+    """Waits for the next interrupt, a millisecond in the simulation"""
+    CLOCK.advance_us(1000)
+
+
+def lightsleep(time_ms=None):
+    """Sleeps for time_ms milliseconds"""
+    if time_ms is not None:
+        CLOCK.advance_us(time_ms * 1000)
+
+
+deepsleep = lightsleep
+
+
+def time_pulse_us(pin, pulse_level, timeout_us=1_000_000):
+    """Returns -1, as no pulse comes in the simulation"""
+    CLOCK.advance_us(timeout_us)
+    return -1
+
+
+def bitstream(pin, encoding, timing, buf):
+    """Moves the clock by the time of the bits"""
+    CLOCK.advance_ns(len(buf) * 8 * (timing[0] + timing[1]))
+
+
+def disable_irq():
+    """Returns the interrupt state to give to enable_irq()"""
+    return 0
+
+
+def enable_irq(state=0):
+    """Enables the interrupts again"""
+
+
+def freq(hz=None):
+    """Returns the CPU frequency"""
+    return 125_000_000 if hz is None else None
+
+
+def unique_id() -> bytes:
+    """Returns the id of the simulated board"""
+    return b"hwsim\x00\x00\x01"
+
+
+def reset():
+    """Raises SystemExit, as the board would restart"""
+    raise SystemExit("machine.reset()")
+
+
+soft_reset = reset
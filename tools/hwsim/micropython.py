@@ -0,0 +1,46 @@
+"""
+The micropython module of the simulation, for CPython.
+"""
+
+
+def const(value):
+    """Returns the value, MicroPython replaces constants while compiling"""
+    return value
+
+
+def native(function):
+    """Returns the function, there is no native code emitter"""
+    return function
+
+
+viper = native
+
+
+def opt_level(level=None):  # pylint: disable=unused-argument
+    """Returns the optimisation level"""
+    return 0
+
+
+def schedule(function, argument) -> None:
+    """Runs the function right away"""
+    function(argument)
+
+
+def alloc_emergency_exception_buf(size) -> None:  # pylint: disable=unused-argument
+    """Does nothing, CPython does not need a buffer"""
+
+
+def heap_lock() -> int:
+    """Does nothing, returns the lock depth"""
+    return 0
+
+
+heap_unlock = heap_lock
+
+
+def mem_info(verbose=None) -> None:  # pylint: disable=unused-argument
+    """Does nothing"""
+
+
+def kbd_intr(character) -> None:  # pylint: disable=unused-argument
+    """Does nothing"""
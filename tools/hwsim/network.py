@@ -0,0 +1,99 @@
+"""
+The network module of the simulation.
+
+A WLAN interface connects to the networks in NETWORKS, CONNECT_MS after
+connect() on the simulated clock.
+"""
+
+from .clock import CLOCK
+
+STA_IF = 0
+AP_IF = 1
+
+STAT_IDLE = 0
+STAT_CONNECTING = 1
+STAT_WRONG_PASSWORD = -3
+STAT_NO_AP_FOUND = -2
+STAT_CONNECT_FAIL = -1
+STAT_GOT_IP = 3
+
+# The networks that can be found, by ssid: (password, bssid, channel, rssi)
+NETWORKS = {"leaphy": ("leaphy123", b"\x02\x00\x00\x00\x00\x01", 6, -50)}
+CONNECT_MS = 2000
+
+
+class WLAN:
+    """A WiFi interface"""
+
+    def __init__(self, interface=STA_IF):
+        self.interface = interface
+        self._active = False
+        self._status = STAT_IDLE
+        self._connected_ns = None
+        self._config = {"mac": b"\x02\x00\x00\x00\x00\x02", "ssid": "", "channel": 0}
+
+    def active(self, active=None):
+        """Returns if the interface is on, or turns it on or off"""
+        if active is None:
+            return self._active
+        self._active = bool(active)
+        if not active:
+            self.disconnect()
+        return None
+
+    def connect(self, ssid=None, key=None, *, bssid=None) -> None:
+        """Starts connecting to a network in NETWORKS"""
+        if not self._active:
+            raise OSError("the interface is not active")
+        found = NETWORKS.get(ssid)
+        if found is None or (bssid is not None and bssid != found[1]):
+            self._status = STAT_NO_AP_FOUND
+        elif key != found[0]:
+            self._status = STAT_WRONG_PASSWORD
+        else:
+            self._status = STAT_CONNECTING
+            self._connected_ns = CLOCK.now_ns + CONNECT_MS * 1_000_000
+            self._config["ssid"] = ssid
+            self._config["channel"] = found[2]
+
+    def disconnect(self) -> None:
+        """Leaves the network"""
+        self._status = STAT_IDLE
+        self._connected_ns = None
+
+    def status(self, param=None):
+        """Returns the connection status, or the rssi"""
+        if self._status == STAT_CONNECTING and CLOCK.now_ns >= self._connected_ns:
+            self._status = STAT_GOT_IP
+        if param == "rssi":
+            return NETWORKS[self._config["ssid"]][3] if self.isconnected() else 0
+        return self._status
+
+    def isconnected(self) -> bool:
+        """Returns True when connected and an address was given"""
+        return self.status() == STAT_GOT_IP
+
+    def ifconfig(self, config=None):
+        """Returns the address, netmask, gateway and dns server"""
+        if config is not None:
+            return None
+        if self.isconnected():
+            return ("192.168.4.2", "255.255.255.0", "192.168.4.1", "192.168.4.1")
+        return ("0.0.0.0", "0.0.0.0", "0.0.0.0", "0.0.0.0")
+
+    def config(self, *args, **kwargs):
+        """Returns a setting, or changes settings"""
+        if args:
+            if args[0] not in self._config:
+                raise ValueError("unknown config param")
+            return self._config[args[0]]
+        self._config.update(kwargs)
+        return None
+
+    def scan(self) -> list:
+        """Returns (ssid, bssid, channel, rssi, security, hidden) of every network"""
+        CLOCK.advance_us(1_500_000)
+        return [
+            (ssid.encode(), bssid, channel, rssi, 3, False)
+            for ssid, (_, bssid, channel, rssi) in NETWORKS.items()
+        ]
@@ -0,0 +1,32 @@
+"""
+The select module of the simulation, only poll() for the sockets of hwsim.socket.
+
+poll() never waits: the simulated clock only moves when the simulation says so.
+"""
+
+from .socket import POLLIN, POLLOUT, POLLERR, POLLHUP  # pylint: disable=unused-import
+
+
+class poll:  # pylint: disable=invalid-name
+    """Checks which sockets are ready"""
+
+    def __init__(self):
+        self._registered = []
+
+    def register(self, obj, eventmask: int = POLLIN | POLLOUT) -> None:
+        """Adds a socket, or changes the events of a socket that was added"""
+        self.unregister(obj)
+        self._registered.append((obj, eventmask))
+
+    def unregister(self, obj) -> None:
+        """Removes a socket"""
+        self._registered = [entry for entry in self._registered if entry[0] is not obj]
+
+    def poll(self, _timeout: int = -1) -> list:
+        """Returns (socket, events) of every socket with an event"""
+        ready = []
+        for obj, eventmask in self._registered:
+            events = obj.poll_events() & (eventmask | POLLERR | POLLHUP)
+            if events:
+                ready.append((obj, events))
+        return ready
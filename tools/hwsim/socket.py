@@ -0,0 +1,157 @@
+"""
+The socket module of the simulation.
+
+A socket connects to a server model in SERVERS, by (host, port). What the
+socket sends is given to server.receive(), and what that returns is what the
+socket receives. A server model may also push data with reply() and drop the
+connection with hang_up(). Only TCP client sockets are simulated.
+
+A server accepts a connection CONNECT_MS after connect() on the simulated
+clock. A host without a server model does not answer: a blocking connect()
+waits for the timeout, a non-blocking one never becomes writable (see
+hwsim.select).
+"""
+
+import errno
+
+from .clock import CLOCK
+
+AF_INET = 2
+SOCK_STREAM = 1
+
+POLLIN = 0x0001
+POLLOUT = 0x0004
+POLLERR = 0x0008
+POLLHUP = 0x0010
+
+CONNECT_MS = 1
+
+# The servers that can be connected to, by (host, port)
+SERVERS = {}
+
+
+class ServerModel:
+    """Base class of a server that a simulated socket can connect to"""
+
+    def __init__(self, max_write: int = None):
+        """
+        :param max_write: int, the most bytes one write is accepted, None for no limit
+        """
+        self.max_write = max_write
+        self.connections = 0
+        self.socket = None
+
+    def accept(self, sock) -> None:
+        """Called when a socket connects"""
+        self.connections += 1
+        self.socket = sock
+
+    def receive(self, data: bytes) -> bytes:
+        """Handles what the socket sent, returns the answer"""
+        raise NotImplementedError
+
+    def reply(self, data: bytes) -> None:
+        """Sends data to the socket, without being asked"""
+        if self.socket is not None:
+            self.socket.inbox += data
+
+    def hang_up(self) -> None:
+        """Closes the connection from the side of the server"""
+        if self.socket is not None:
+            self.socket.hung_up = True
+            self.socket = None
+
+
+def getaddrinfo(host, port, *_args):
+    """Returns the address of a host, every host name is known"""
+    return [(AF_INET, SOCK_STREAM, 0, "", (host, port))]
+
+
+class socket:  # pylint: disable=invalid-name
+    """A TCP client socket"""
+
+    def __init__(self, *_args):
+        self.server = None
+        self.blocking = True
+        self.timeout = None
+        self.inbox = bytearray()
+        self.hung_up = False
+        self._address = None
+        self._connect_ns = 0
+
+    def settimeout(self, timeout) -> None:
+        """Sets the time in seconds a blocking call waits, 0 turns waiting off"""
+        self.timeout = timeout
+        self.blocking = timeout != 0
+
+    def setblocking(self, blocking: bool) -> None:
+        """Turns waiting on or off"""
+        self.blocking = blocking
+        self.timeout = None if blocking else 0
+
+    def connect(self, address) -> None:
+        """Connects to the server model at the address"""
+        self._address = tuple(address)
+        self._connect_ns = CLOCK.now_ns + CONNECT_MS * 1_000_000
+        if not self.blocking:
+            raise OSError(errno.EINPROGRESS, "operation in progress")
+        if self._address not in SERVERS:
+            # Nobody answers, so the connect waits until it times out
+            if self.timeout is not None:
+                CLOCK.advance_us(self.timeout * 1_000_000)
+            raise OSError(errno.ETIMEDOUT, "timed out")
+        CLOCK.advance_ns(self._connect_ns - CLOCK.now_ns)
+        self.poll_events()
+
+    def poll_events(self) -> int:
+        """Returns the POLL flags of the socket, used by hwsim.select"""
+        if self.server is None:
+            server = SERVERS.get(self._address)
+            if server is None or CLOCK.now_ns < self._connect_ns:
+                return 0
+            self.server = server
+            server.accept(self)
+        if self.hung_up:
+            return POLLIN | POLLOUT | POLLHUP
+        return POLLOUT | (POLLIN if self.inbox else 0)
+
+    def _check_open(self):
+        if self.server is None:
+            raise OSError(errno.EBADF, "socket is closed")
+        if self.hung_up:
+            raise OSError(errno.ECONNRESET, "connection reset")
+
+    def send(self, data) -> int:
+        """Sends data, returns the amount of bytes the server accepted"""
+        self._check_open()
+        if self.server.max_write is not None:
+            data = data[: self.server.max_write]
+        self.inbox += self.server.receive(bytes(data)) or b""
+        return len(data)
+
+    def sendall(self, data) -> None:
+        """Sends all data"""
+        sent = 0
+        while sent < len(data):
+            sent += self.send(data[sent:])
+
+    def recv(self, size: int) -> bytes:
+        """Returns up to size received bytes"""
+        if self.server is None:
+            raise OSError(errno.EBADF, "socket is closed")
+        if not self.inbox:
+            if self.hung_up:
+                return b""
+            if self.blocking:
+                raise OSError(errno.ETIMEDOUT, "timed out")
+            raise OSError(errno.EAGAIN, "no data")
+        data = bytes(self.inbox[:size])
+        self.inbox = self.inbox[size:]
+        return data
+
+    def close(self) -> None:
+        """Closes the socket"""
+        if self.server is not None and self.server.socket is self:
+            self.server.socket = None
+        self.server = None
+        self._address = None
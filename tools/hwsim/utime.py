@@ -0,0 +1,60 @@
+"""
+The utime (and time) module of the simulation.
+
+The ticks and sleep functions use the simulated clock of hwsim.clock, so
+sleeping moves the clock instead of waiting. The date functions are the ones
+of the computer.
+"""
+
+import time as _time
+
+# The date functions and ticks arithmetic are part of the module
+# pylint: disable=unused-import,wrong-import-order
+from time import gmtime, localtime, mktime
+
+from .clock import CLOCK, ticks_add, ticks_diff
+
+
+def ticks_ms() -> int:
+    """Returns the simulated time in milliseconds"""
+    return CLOCK.ticks_ms()
+
+
+def ticks_us() -> int:
+    """Returns the simulated time in microseconds"""
+    return CLOCK.ticks_us()
+
+
+def ticks_cpu() -> int:
+    """Returns the simulated time in microseconds"""
+    return CLOCK.ticks_us()
+
+
+def sleep(seconds) -> None:
+    """Moves the simulated clock"""
+    CLOCK.advance_ns(seconds * 1_000_000_000)
+
+
+def sleep_ms(milliseconds: int) -> None:
+    """Moves the simulated clock"""
+    CLOCK.advance_ns(milliseconds * 1_000_000)
+
+
+def sleep_us(microseconds: int) -> None:
+    """Moves the simulated clock"""
+    CLOCK.advance_ns(microseconds * 1000)
+
+
+def time() -> int:
+    """Returns the simulated time in seconds"""
+    return CLOCK.now_ns // 1_000_000_000
+
+
+def time_ns() -> int:
+    """Returns the simulated time in nanoseconds"""
+    return CLOCK.now_ns
+
+
+def __getattr__(name):
+    """Returns the other functions of the time module of the computer, like monotonic()"""
+    return getattr(_time, name)
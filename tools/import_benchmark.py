@@ -0,0 +1,204 @@
+#!/bin/env python3
+"""
+Measures how long importing every module of leaphymicropython takes and how
+much heap it keeps, to find the modules that are expensive on a Pico.
+
+Runs with CPython or with the MicroPython unix port. Every module is imported
+on its own, together with the modules it needs, and removed again before the
+next one, so the numbers include compiling the source. Hardware modules that
+do not exist on a computer (machine, network, dht) are replaced by the
+placeholder objects of tools/placeholders.py.
+
+The last part shows which modules the lazy packages load: importing a
+package should load nothing, and using a name should only load its module.
+
+With --compare, every module is imported from the source, from the .mpy
+files of tools/build_mpy.py and from the frozen modules, to show the RAM that
+precompiling and freezing save. This needs the MicroPython unix port, built
+with firmware/unix.py for the frozen modules.
+
+Usage: tools/import_benchmark.py [--json] [--compare]
+"""
+
+import gc
+import json
+import sys
+
+from simulation import ROOT, ticks_us, ticks_diff
+
+try:
+    import tracemalloc
+except ImportError:  # MicroPython
+    tracemalloc = None
+
+# The path without the folders the library can be imported from
+BASE_PATH = [path for path in sys.path if path not in ("", ".", ".frozen", ROOT)]
+
+# Where the modules are imported from, for --compare
+SOURCES = {
+    "source": ROOT,
+    "mpy": ROOT + "/dist/mpy",
+    "frozen": ".frozen",
+}
+
+# pylint: disable=wrong-import-position
+from placeholders import install_placeholders
+
+LAZY_CHECKS = (
+    ("leaphymicropython.sensors", None),
+    ("leaphymicropython.sensors", "TimeOfFlight"),
+    ("leaphymicropython.actuators", "OLEDSH1106"),
+    ("leaphymicropython.utils", "Scheduler"),
+)
+
+
+def heap_used() -> int:
+    """Returns the amount of bytes in use on the heap"""
+    gc.collect()
+    if tracemalloc is not None:
+        return tracemalloc.get_traced_memory()[0]
+    return gc.mem_alloc()  # pylint: disable=no-member
+
+
+def package_modules() -> list:
+    """Returns the names of the modules in package.json"""
+    with open(ROOT + "/package.json", encoding="utf8") as package_file:
+        package = json.load(package_file)
+    modules = []
+    for url in package["urls"]:
+        path = url[0]
+        if path.endswith(".py"):
+            name = path[:-3].replace("/", ".")
+            modules.append(
+                name[: -len(".__init__")] if name.endswith(".__init__") else name
+            )
+    return modules
+
+
+def unload(keep):
+    """Removes the modules that were imported after keep was taken"""
+    for name in list(sys.modules):
+        if name not in keep:
+            del sys.modules[name]
+    gc.collect()
+
+
+def measure(module: str, attribute: str = None) -> dict:
+    """
+    Imports a module, and optionally uses one of its names, then unloads it again
+    :return: dict, the time in us, the heap kept in bytes and the modules that were loaded
+    """
+    keep = set(sys.modules)
+    before = heap_used()
+    start = ticks_us()
+    error = None
+    try:
+        imported = __import__(module, None, None, [attribute or "__name__"])
+        if attribute is not None:
+            getattr(imported, attribute)
+    except Exception as ex:  # pylint: disable=broad-exception-caught
+        error = repr(ex)
+    elapsed = ticks_diff(ticks_us(), start)
+    used = heap_used() - before
+    loaded = sorted(name for name in sys.modules if name not in keep)
+    unload(keep)
+    return {
+        "module": module if attribute is None else f"{module}.{attribute}",
+        "time_us": elapsed,
+        "heap_bytes": used,
+        "loaded": loaded,
+        "error": error,
+    }
+
+
+def use_source(source: str) -> None:
+    """Makes the library import from one of SOURCES only"""
+    sys.path[:] = [SOURCES[source]] + BASE_PATH
+
+
+def compare(modules: list) -> list:
+    """
+    Measures the heap every module keeps when imported from every source
+    :return: list, for every module a dict with the heap in bytes per source, None if not available
+    """
+    rows = []
+    for module in modules:
+        row = {"module": module}
+        for source in SOURCES:
+            use_source(source)
+            result = measure(module)
+            row[source] = None if result["error"] else result["heap_bytes"]
+        rows.append(row)
+    use_source("source")
+    return rows
+
+
+def print_comparison(rows: list) -> None:
+    """Prints the heap per source and the RAM saved by freezing"""
+
+    def kilobytes(value):
+        return "       -" if value is None else f"{value / 1024:8.1f}"
+
+    print(f"{'module':48} {'source':>8} {'mpy':>8} {'frozen':>8} {'saved':>8}  (kB)")
+    totals = {source: 0 for source in SOURCES}
+    for row in rows:
+        for source in SOURCES:
+            totals[source] += row[source] or 0
+        saved = None
+        if row["source"] is not None and row["frozen"] is not None:
+            saved = row["source"] - row["frozen"]
+        print(
+            f"{row['module']:48} {kilobytes(row['source'])} {kilobytes(row['mpy'])} "
+            f"{kilobytes(row['frozen'])} {kilobytes(saved)}"
+        )
+    print(
+        f"{'total':48} {kilobytes(totals['source'])} {kilobytes(totals['mpy'])} "
+        f"{kilobytes(totals['frozen'])}"
+    )
+
+
+def library_modules(result: dict) -> list:
+    """Returns the modules of leaphymicropython that were loaded, without the packages"""
+    return [
+        name[len("leaphymicropython.") :]
+        for name in result["loaded"]
+        if name.startswith("leaphymicropython.") and name.count(".") == 2
+    ]
+
+
+def main():
+    """Runs the benchmark and prints the results"""
+    install_placeholders()
+    if tracemalloc is not None:
+        tracemalloc.start()
+    # The first import also sets up caches of the interpreter, it is not counted
+    measure("leaphymicropython.utils.lazy")
+    if "--compare" in sys.argv:
+        if sys.implementation.name != "micropython":
+            sys.exit("--compare needs the MicroPython unix port")
+        rows = compare(package_modules())
+        if "--json" in sys.argv:
+            print(json.dumps(rows))
+        else:
+            print_comparison(rows)
+        return
+    results = [measure(module) for module in package_modules()]
+    lazy = [measure(module, attribute) for module, attribute in LAZY_CHECKS]
+    if "--json" in sys.argv:
+        print(json.dumps({"modules": results, "lazy": lazy}))
+        return
+    print(f"{'module':48} {'time ms':>8} {'heap kB':>8}  library modules loaded")
+    for result in sorted(results, key=lambda result: -result["heap_bytes"]):
+        print(
+            f"{result['module']:48} {result['time_us'] / 1000:8.2f} "
+            f"{result['heap_bytes'] / 1024:8.1f}  {', '.join(library_modules(result))}"
+            + (f"  {result['error']}" if result["error"] else "")
+        )
+    print()
+    print("Lazy packages:")
+    for result in lazy:
+        print(f"  {result['module']}: {', '.join(library_modules(result))}")
+
+
+if __name__ == "__main__":
+    main()
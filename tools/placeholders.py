@@ -0,0 +1,62 @@
+"""
+Placeholder modules to import leaphymicropython on a computer.
+
+Hardware modules that do not exist on a computer (machine, network, dht) are
+replaced by objects that accept any attribute and any call, so the modules of
+the library can be imported and compiled, but not used.
+"""
+
+import sys
+
+# The modules that are always replaced, and the ones replaced only when missing
+HARDWARE_MODULES = ("machine", "network", "dht")
+OPTIONAL_MODULES = ("micropython", "utime", "ustruct", "framebuf")
+# Standard modules are loaded up front, so a benchmark does not count them for the first module using them
+STANDARD_MODULES = ("array", "errno", "heapq", "json", "math", "socket", "struct")
+
+
+class Placeholder:
+    """Stands in for any class, function or constant of a hardware module"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+    def __getattr__(self, name):
+        return Placeholder()
+
+
+class PlaceholderModule:
+    """Stands in for a module that does not exist on a computer"""
+
+    # Names that are used as base class or at import time
+    FrameBuffer = Placeholder
+
+    def __init__(self, name: str):
+        self.__name__ = name
+
+    @staticmethod
+    def const(value):
+        """micropython.const"""
+        return value
+
+    def __getattr__(self, name):
+        return Placeholder()
+
+
+def install_placeholders():
+    """Puts placeholder modules in sys.modules for the modules that are not available"""
+    for name in HARDWARE_MODULES:
+        sys.modules[name] = PlaceholderModule(name)
+    for name in OPTIONAL_MODULES:
+        try:
+            __import__(name)
+        except ImportError:
+            if name == "ustruct":
+                sys.modules[name] = __import__("struct")
+            else:
+                sys.modules[name] = PlaceholderModule(name)
+    for name in STANDARD_MODULES:
+        __import__(name)
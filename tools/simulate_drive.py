@@ -0,0 +1,173 @@
+#!/bin/env python3
+"""
+Runs the closed loop drive of leaphymicropython.actuators.drive on the
+hardware simulation of tools/hwsim, with a model of two DC motors that turn
+wheels with encoders:
+
+1. both wheels reach the target speed, although one motor is weaker
+2. a spin in place of one turn adds up to a heading of 360 degrees
+3. driving straight adds up to the distance the wheels travelled
+
+It also measures the time one control update takes, which has to stay a
+small part of the control period. Runs with CPython and with the MicroPython
+unix port:
+
+    python tools/simulate_drive.py
+    micropython tools/simulate_drive.py
+"""
+
+import sys
+
+# The real clock, before the simulation replaces the time module
+from simulation import ticks_us, ticks_diff, run_checks
+import hwsim
+
+hwsim.install()
+
+# pylint: disable=wrong-import-position
+from leaphymicropython.actuators.dcmotor import DCMotors
+from leaphymicropython.actuators.drive import ClosedLoopDrive, Odometry
+from leaphymicropython.sensors.encoder import WheelEncoder
+
+MM_PER_COUNT = 0.5
+WHEEL_BASE_MM = 100
+PERIOD_MS = 20
+TARGET_MM_S = 200
+# An update may take this part of the control period
+MAX_UPDATE_SHARE = 0.1
+
+
+# pylint: disable=too-few-public-methods
+class WheelModel:
+    """A DC motor with a first order response that turns a wheel with an encoder"""
+
+    # pylint: disable=too-many-positional-arguments
+    def __init__(self, motor, encoder, full_speed_mm_s: int, time_constant_ms: int):
+        """
+        :param motor: DCMotor, the motor that drives the wheel
+        :param encoder: WheelEncoder, the encoder that counts the turns of the wheel
+        :param full_speed_mm_s: int, the speed of the wheel at full pwm
+        :param time_constant_ms: int, the time the wheel takes to reach 63% of a new speed
+        """
+        self.motor = motor
+        self.encoder = encoder
+        self.full_speed_mm_s = full_speed_mm_s
+        self.time_constant_ms = time_constant_ms
+        self.speed_mm_s = 0.0
+        self.position_mm = 0.0
+        self.counts = 0
+
+    def step(self, step_ms: int) -> None:
+        """Moves the wheel for step_ms and sends the encoder pulses"""
+        sign = 1 if self.motor.direction.value() else -1
+        target = sign * self.full_speed_mm_s * self.motor.pwm.duty_u16() / 65535
+        self.speed_mm_s += (target - self.speed_mm_s) * step_ms / self.time_constant_ms
+        self.position_mm += self.speed_mm_s * step_ms / 1000
+        counts = int(self.position_mm / MM_PER_COUNT)
+        encoder = self.encoder
+        while self.counts != counts:
+            forward = counts > self.counts
+            self.counts += 1 if forward else -1
+            if encoder.pin_b is not None:
+                # The B channel is low on the rising edge of A when turning forward
+                encoder.pin_b.value(0 if forward else 1)
+            encoder.pin_a.irq_handler(encoder.pin_a)
+
+
+def new_drive():
+    """Returns a closed loop drive and the models of its wheels"""
+    hwsim.reset()
+    motors = DCMotors()
+    # A quadrature encoder on the left wheel, a single channel one on the right
+    left_encoder = WheelEncoder("GP6", "GP7")
+    right_encoder = WheelEncoder("GP8")
+    drive = ClosedLoopDrive(
+        motors, left_encoder, right_encoder, MM_PER_COUNT, WHEEL_BASE_MM, PERIOD_MS
+    )
+    wheels = (
+        WheelModel(motors.motor_a, left_encoder, 400, 60),
+        WheelModel(motors.motor_b, right_encoder, 320, 80),
+    )
+    return drive, wheels
+
+
+def run(drive, wheels, duration_ms: int) -> int:
+    """
+    Runs the wheels and the control loop
+    :return: int, the average time of a control update in microseconds
+    """
+    update_us = 0
+    updates = 0
+    for time_ms in range(1, duration_ms + 1):
+        for wheel in wheels:
+            wheel.step(1)
+        hwsim.CLOCK.advance_us(1000)
+        if time_ms % PERIOD_MS == 0:
+            start = ticks_us()
+            drive.update()
+            update_us += ticks_diff(ticks_us(), start)
+            updates += 1
+    return update_us // updates
+
+
+def check_convergence() -> str:
+    """
+    Checks that both wheels reach the target speed
+    :return: str, what went wrong, None if nothing went wrong
+    """
+    drive, wheels = new_drive()
+    drive.set_speed(TARGET_MM_S, TARGET_MM_S)
+    update_us = run(drive, wheels, 3000)
+    starts = [wheel.position_mm for wheel in wheels]
+    update_us = max(update_us, run(drive, wheels, 1000))
+    drive.stop()
+    print(f"Control update: {update_us} us")
+    for wheel, start in zip(wheels, starts):
+        speed = wheel.position_mm - start
+        if abs(speed - TARGET_MM_S) > TARGET_MM_S // 50:
+            return f"a wheel runs at {speed:.1f} mm/s instead of {TARGET_MM_S}"
+    if update_us > PERIOD_MS * 1000 * MAX_UPDATE_SHARE:
+        return f"an update takes {update_us} us, the period is {PERIOD_MS} ms"
+    return None
+
+
+def check_spin() -> str:
+    """
+    Checks that a spin in place of one turn gives a heading of 360 degrees
+    :return: str, what went wrong, None if nothing went wrong
+    """
+    odometry = Odometry(MM_PER_COUNT, WHEEL_BASE_MM)
+    for _ in range(157):
+        odometry.update(-4, 4)
+    # 628 counts of 0.5 mm on a circle of 314.16 mm
+    expected = 628 * MM_PER_COUNT / (3.14159265 * WHEEL_BASE_MM) * 360
+    _, _, heading = odometry.pose()
+    if abs(heading - expected) > 0.2:
+        return f"the heading is {heading:.2f} degrees instead of {expected:.2f}"
+    return None
+
+
+def check_straight() -> str:
+    """
+    Checks that driving straight adds up to the distance of the wheels
+    :return: str, what went wrong, None if nothing went wrong
+    """
+    odometry = Odometry(MM_PER_COUNT, WHEEL_BASE_MM)
+    odometry.reset(heading_degrees=90)
+    for _ in range(200):
+        odometry.update(5, 5)
+    x, y, _ = odometry.pose()
+    if abs(x) > 0.5 or abs(y - 500) > 0.5:
+        return f"the robot is at ({x:.1f}, {y:.1f}) instead of (0, 500)"
+    return None
+
+
+CHECKS = (
+    ("Speed control converges", check_convergence),
+    ("Odometry of a spin in place", check_spin),
+    ("Odometry of driving straight", check_straight),
+)
+
+
+if __name__ == "__main__":
+    sys.exit(1 if run_checks(CHECKS) else 0)
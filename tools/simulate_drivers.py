@@ -0,0 +1,150 @@
+#!/bin/env python3
+"""
+Runs the I2C drivers of the library against the hardware simulation of
+tools/hwsim, in the situations of the "Tests" in their docstrings:
+
+1. no multiplexer, device connected, then disconnected and connected again
+2. no multiplexer, device not connected
+3. with a multiplexer, device connected, then disconnected and connected again
+4. with a multiplexer, device not connected
+
+A driver must give valid readings while its device is connected, None (or
+nothing on the screen) while it is not, and valid readings again once it is
+connected again. Runs with CPython and with the MicroPython unix port:
+
+    python tools/simulate_drivers.py
+    micropython tools/simulate_drivers.py
+"""
+
+import sys
+
+from simulation import run_checks
+import hwsim
+
+hwsim.install()
+
+# pylint: disable=wrong-import-position
+from leaphymicropython.utils.i2c_helper import i2c_bus_instances
+from leaphymicropython.sensors.tof import TimeOfFlight
+from leaphymicropython.sensors.barometer import BarometricPressure
+from leaphymicropython.sensors.adps9960 import Adps9960
+from leaphymicropython.actuators.oled_screen import OLEDSH1106
+from leaphymicropython.actuators.ssd1306 import SSD1306I2C
+
+MULTIPLEXER_CHANNEL = 3
+# Connecting a cable again takes a person at least this long, the drivers
+# back off while their device does not answer
+RECONNECT_MS = 1000
+
+
+def show_white(screen, model):
+    """Fills the screen and returns the color of a pixel in the display RAM"""
+    model.ram[:] = bytes(len(model.ram))
+    if isinstance(screen, OLEDSH1106):
+        screen.fill("white")
+    else:
+        screen.fill(1)
+    screen.show()
+    return model.pixel(10, 10)
+
+
+# Name, model, driver for a channel, reading of the driver and its model, expected reading
+DEVICES = (
+    (
+        "TimeOfFlight",
+        lambda: hwsim.VL53L0XModel(distance_mm=123),
+        lambda channel: TimeOfFlight(channel=channel, show_warnings=False),
+        lambda driver, model: driver.get_distance(),
+        123,
+    ),
+    (
+        "BarometricPressure",
+        hwsim.BMP280Model,
+        lambda channel: BarometricPressure(channel=channel, show_warnings=False),
+        lambda driver, model: driver.get_temperature(),
+        25.08,
+    ),
+    (
+        "Adps9960",
+        hwsim.APDS9960Model,
+        lambda channel: Adps9960(channel=channel, show_warnings=False),
+        lambda driver, model: driver.read_color(),
+        (400, 300, 200, 1000),
+    ),
+    (
+        "OLEDSH1106",
+        hwsim.SH1106Model,
+        lambda channel: OLEDSH1106(channel=channel, show_warnings=False),
+        show_white,
+        1,
+    ),
+    (
+        "SSD1306I2C",
+        hwsim.SSD1306Model,
+        lambda channel: SSD1306I2C(128, 64, channel=channel, show_warnings=False),
+        show_white,
+        1,
+    ),
+)
+
+
+def new_bus(multiplexer: bool):
+    """Starts a new simulation with an empty bus, and optionally a multiplexer"""
+    hwsim.reset()
+    i2c_bus_instances.clear()
+    bus = hwsim.get_bus(0)
+    if multiplexer:
+        bus.add_multiplexer()
+    return bus
+
+
+def run_scenario(device, multiplexer: bool, connected: bool) -> str:
+    """
+    Runs one scenario
+    :return: str, what went wrong, None if nothing went wrong
+    """
+    _, new_model, new_driver, reading, expected = device
+    bus = new_bus(multiplexer)
+    model = new_model()
+    channel = MULTIPLEXER_CHANNEL if multiplexer else 255
+    if connected:
+        bus.attach(model, MULTIPLEXER_CHANNEL if multiplexer else None)
+    driver = new_driver(channel)
+    if not connected:
+        value = reading(driver, model)
+        return None if value != expected else f"read {value} without a device"
+    value = reading(driver, model)
+    if value != expected:
+        return f"read {value} instead of {expected}"
+    model.present = False
+    for _ in range(2):
+        value = reading(driver, model)
+        if value == expected:
+            return f"read {value} while disconnected"
+    model.present = True
+    hwsim.CLOCK.advance_us(RECONNECT_MS * 1000)
+    value = reading(driver, model)
+    if value != expected:
+        return f"read {value} instead of {expected} after connecting again"
+    return None
+
+
+def scenarios() -> list:
+    """Returns the name and check of every scenario for every device"""
+    return [
+        (
+            f"{device[0]} test {number}",
+            lambda d=device, m=multiplexer, c=connected: run_scenario(d, m, c),
+        )
+        for device in DEVICES
+        for number, multiplexer, connected in (
+            (1, False, True),
+            (2, False, False),
+            (3, True, True),
+            (4, True, False),
+        )
+    ]
+
+
+if __name__ == "__main__":
+    sys.exit(1 if run_checks(scenarios()) else 0)
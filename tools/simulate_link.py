@@ -0,0 +1,111 @@
+#!/bin/env python3
+"""
+Sends messages with the MessageLink of leaphymicropython.utils.bluetooth over
+a simulated UART with its TX wired to its RX (tools/hwsim), and checks:
+
+1. every message comes back whole and in order, in batches
+2. a damaged byte only loses its own message, the next one is received
+3. the payload throughput is close to the speed of the UART
+
+The throughput is measured in simulated time, the time the bytes take on the
+wire, and the time encoding and decoding take is measured on the real clock.
+Runs with CPython and with the MicroPython unix port:
+
+    python tools/simulate_link.py
+    micropython tools/simulate_link.py
+"""
+
+import sys
+
+# The real clock, before the simulation replaces the time module
+from simulation import ticks_us, ticks_diff, run_checks
+import hwsim
+
+hwsim.install()
+
+# pylint: disable=wrong-import-position
+from leaphymicropython.utils.bluetooth import Bluetooth, MessageLink
+
+BAUDRATE = 115_200
+MESSAGES = 400
+MESSAGE_SIZE = 32
+BATCH = 4
+# CRC, COBS and delimiter add 4 bytes to a message of 32
+MIN_EFFICIENCY = 0.85
+
+
+def new_link():
+    """Returns a message link over a UART in loopback"""
+    hwsim.reset()
+    bluetooth = Bluetooth(BAUDRATE, rxbuf=1024, txbuf=1024)
+    bluetooth.uart.loopback = True
+    return MessageLink(bluetooth, max_payload=MESSAGE_SIZE)
+
+
+def message(number: int) -> bytes:
+    """Returns a message with its number and a pattern that contains zero bytes"""
+    return bytes((number + index) & 0xFF for index in range(MESSAGE_SIZE))
+
+
+def check_loopback() -> str:
+    """
+    Sends messages in batches and receives them
+    :return: str, what went wrong, None if nothing went wrong
+    """
+    link = new_link()
+    received = 0
+    start_ns = hwsim.CLOCK.now_ns
+    cpu_us = 0
+    for number in range(MESSAGES):
+        start = ticks_us()
+        link.queue(message(number))
+        if number % BATCH == BATCH - 1:
+            link.flush()
+            while True:
+                payload = link.receive()
+                if payload is None:
+                    break
+                if bytes(payload) != message(received):
+                    return f"message {received} came back as {bytes(payload)}"
+                received += 1
+        cpu_us += ticks_diff(ticks_us(), start)
+    if received != MESSAGES:
+        return f"{received} of {MESSAGES} messages came back"
+    wire_s = (hwsim.CLOCK.now_ns - start_ns) / 1e9
+    throughput = MESSAGES * MESSAGE_SIZE / wire_s
+    efficiency = throughput / (BAUDRATE / 10)
+    print(
+        f"Throughput: {throughput:.0f} B/s of payload at {BAUDRATE} baud "
+        f"({efficiency * 100:.1f}%), {cpu_us // MESSAGES} us per message to encode and decode"
+    )
+    if efficiency < MIN_EFFICIENCY:
+        return f"only {efficiency * 100:.1f}% of the UART carries payload"
+    return None
+
+
+def check_damaged() -> str:
+    """
+    Damages a byte of a message on the wire
+    :return: str, what went wrong, None if nothing went wrong
+    """
+    link = new_link()
+    uart = link.uart
+    link.send(message(1))
+    uart.received[5] ^= 0x40
+    link.send(message(2))
+    payload = link.receive()
+    if payload is None or bytes(payload) != message(2):
+        return f"received {payload} instead of the message after the damaged one"
+    if link.crc_errors != 1:
+        return f"counted {link.crc_errors} CRC errors instead of 1"
+    return None
+
+
+CHECKS = (
+    ("Messages come back in batches", check_loopback),
+    ("A damaged message is dropped", check_damaged),
+)
+
+
+if __name__ == "__main__":
+    sys.exit(1 if run_checks(CHECKS) else 0)
@@ -0,0 +1,265 @@
+#!/bin/env python3
+"""
+Publishes messages with the MQTTPublisher and HTTPPublisher of
+leaphymicropython.utils.publish to a broker and a web server simulated by
+tools/hwsim, and checks:
+
+1. every message reaches the server whole and in order, over one connection
+2. when the server drops the connection, the publisher connects again and
+   no message is lost
+3. a reply the HTTP server sends without a request is ignored
+4. while the broker does not answer, flush() returns at once, and the
+   messages are sent when the broker is started
+
+Runs with CPython and with the MicroPython unix port:
+
+    python tools/simulate_publish.py
+    micropython tools/simulate_publish.py
+"""
+
+import struct
+import sys
+
+from simulation import run_checks
+import hwsim
+
+hwsim.install()
+
+# pylint: disable=wrong-import-position
+from hwsim.socket import SERVERS, ServerModel
+from leaphymicropython.utils.publish import HTTPPublisher, MQTTPublisher
+
+HOST = "192.168.4.1"
+MESSAGES = 200
+MESSAGE_SIZE = 20
+# The longest time in ms a flush() may take while connecting
+MAX_FLUSH_MS = 1
+
+
+def message(number: int) -> bytes:
+    """Returns a message with its number"""
+    return bytes((number + index) & 0xFF for index in range(MESSAGE_SIZE))
+
+
+def split_batch(batch: bytes) -> list:
+    """Returns the messages in a batch, which start with their length"""
+    messages = []
+    offset = 0
+    while offset < len(batch):
+        length = batch[offset]
+        messages.append(batch[offset + 1 : offset + 1 + length])
+        offset += 1 + length
+    return messages
+
+
+class BrokerModel(ServerModel):
+    """An MQTT broker that keeps the payloads published to it"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.data = b""
+        self.messages = []
+
+    def accept(self, sock) -> None:
+        super().accept(sock)
+        self.data = b""
+
+    def receive(self, data: bytes) -> bytes:
+        self.data += data
+        answer = b""
+        while len(self.data) >= 2:
+            length = 0
+            shift = 0
+            offset = 1
+            while True:
+                if offset >= len(self.data):
+                    return answer
+                byte = self.data[offset]
+                length |= (byte & 0x7F) << shift
+                shift += 7
+                offset += 1
+                if not byte & 0x80:
+                    break
+            if len(self.data) < offset + length:
+                return answer
+            kind = self.data[0] >> 4
+            body = self.data[offset : offset + length]
+            self.data = self.data[offset + length :]
+            if kind == 1:  # CONNECT
+                answer += b"\x20\x02\x00\x00"
+            elif kind == 3:  # PUBLISH
+                topic_length = struct.unpack("!H", body[:2])[0]
+                self.messages += split_batch(body[2 + topic_length :])
+            elif kind == 12:  # PINGREQ
+                answer += b"\xd0\x00"
+        return answer
+
+
+class WebServerModel(ServerModel):
+    """An HTTP server that keeps the bodies posted to it"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.data = b""
+        self.messages = []
+
+    def accept(self, sock) -> None:
+        super().accept(sock)
+        self.data = b""
+
+    def receive(self, data: bytes) -> bytes:
+        self.data += data
+        answer = b""
+        while True:
+            end = self.data.find(b"\r\n\r\n")
+            if end < 0:
+                return answer
+            length = 0
+            for line in self.data[:end].decode().split("\r\n")[1:]:
+                name, _, value = line.partition(":")
+                if name.strip().lower() == "content-length":
+                    length = int(value)
+            if len(self.data) < end + 4 + length:
+                return answer
+            self.messages += split_batch(self.data[end + 4 : end + 4 + length])
+            self.data = self.data[end + 4 + length :]
+            answer += b"HTTP/1.1 204 No Content\r\nContent-Length: 0\r\n\r\n"
+
+
+def publish(publisher, server, hang_up_at: int = None, reply_at: int = None):
+    """
+    Queues the messages every 10 ms and flushes the publisher in between
+    :param hang_up_at: int, the message before which the server drops the connection
+    :param reply_at: int, the message before which the server replies without a request
+    """
+    for number in range(MESSAGES):
+        if number == hang_up_at:
+            server.hang_up()
+        if number == reply_at:
+            server.reply(b"HTTP/1.1 408 Request Timeout\r\nContent-Length: 0\r\n\r\n")
+        if not publisher.queue(message(number)):
+            return f"message {number} was dropped"
+        publisher.flush()
+        hwsim.CLOCK.advance_us(10_000)
+    for _ in range(100):
+        publisher.flush(force=True)
+        hwsim.CLOCK.advance_us(100_000)
+    return None
+
+
+def check_messages(server, connections: int) -> str:
+    """
+    Checks that the server received every message once and in order
+    :return: str, what went wrong, None if nothing went wrong
+    """
+    if len(server.messages) != MESSAGES:
+        return f"the server received {len(server.messages)} of {MESSAGES} messages"
+    for number, received in enumerate(server.messages):
+        if received != message(number):
+            return f"message {number} arrived as {received}"
+    if server.connections != connections:
+        return f"{server.connections} connections instead of {connections}"
+    return None
+
+
+def new_server(model, port: int):
+    """Starts a new simulation with one server"""
+    hwsim.reset()
+    SERVERS[(HOST, port)] = model
+    return model
+
+
+def check_mqtt() -> str:
+    """
+    Publishes to the broker
+    :return: str, what went wrong, None if nothing went wrong
+    """
+    broker = new_server(BrokerModel(max_write=100), 1883)
+    publisher = MQTTPublisher(HOST, "robot/telemetry", max_batch=128)
+    problem = publish(publisher, broker)
+    if problem is None:
+        problem = check_messages(broker, 1)
+    print(f"MQTT: {publisher.batches} batches of {MESSAGES} messages")
+    return problem
+
+
+def check_mqtt_reconnect() -> str:
+    """
+    Publishes to the broker, which drops the connection halfway
+    :return: str, what went wrong, None if nothing went wrong
+    """
+    broker = new_server(BrokerModel(), 1883)
+    publisher = MQTTPublisher(HOST, "robot/telemetry", max_batch=128)
+    problem = publish(publisher, broker, hang_up_at=MESSAGES // 2)
+    if problem is None:
+        problem = check_messages(broker, 2)
+    if problem is None and publisher.reconnects != 1:
+        problem = f"{publisher.reconnects} reconnects instead of 1"
+    return problem
+
+
+def check_http() -> str:
+    """
+    Posts to the web server
+    :return: str, what went wrong, None if nothing went wrong
+    """
+    server = new_server(WebServerModel(max_write=100), 8080)
+    publisher = HTTPPublisher(HOST, "/telemetry", port=8080, max_batch=128)
+    problem = publish(publisher, server)
+    if problem is None:
+        problem = check_messages(server, 1)
+    print(f"HTTP: {publisher.batches} batches of {MESSAGES} messages")
+    return problem
+
+
+def check_http_unasked_reply() -> str:
+    """
+    Posts to the web server, which sends a reply without a request halfway
+    :return: str, what went wrong, None if nothing went wrong
+    """
+    server = new_server(WebServerModel(), 8080)
+    publisher = HTTPPublisher(HOST, "/telemetry", port=8080, max_batch=128)
+    problem = publish(publisher, server, reply_at=MESSAGES // 2)
+    if problem is None:
+        problem = check_messages(server, 1)
+    if problem is None and publisher.errors != 1:
+        problem = f"{publisher.errors} errors counted instead of 1"
+    return problem
+
+
+def check_unreachable() -> str:
+    """
+    Publishes a message every 100 ms while the broker does not answer, and
+    starts the broker halfway
+    :return: str, what went wrong, None if nothing went wrong
+    """
+    hwsim.reset()
+    publisher = MQTTPublisher(HOST, "robot/telemetry", max_batch=128)
+    broker = BrokerModel()
+    longest_ns = 0
+    for number in range(MESSAGES):
+        if number == MESSAGES // 2:
+            SERVERS[(HOST, 1883)] = broker
+        publisher.queue(message(number))
+        start_ns = hwsim.CLOCK.now_ns
+        publisher.flush()
+        longest_ns = max(longest_ns, hwsim.CLOCK.now_ns - start_ns)
+        hwsim.CLOCK.advance_us(100_000)
+    publisher.flush(force=True)
+    print(f"Unreachable broker: the longest flush took {longest_ns / 1e6:.1f} ms")
+    if longest_ns > MAX_FLUSH_MS * 1_000_000:
+        return f"a flush waited {longest_ns / 1e6:.0f} ms for the broker"
+    return check_messages(broker, 1)
+
+
+CHECKS = (
+    ("MQTT messages arrive in order", check_mqtt),
+    ("MQTT connects again", check_mqtt_reconnect),
+    ("HTTP messages arrive in order", check_http),
+    ("HTTP reply without a request", check_http_unasked_reply),
+    ("An unreachable broker does not block", check_unreachable),
+)
+
+
+if __name__ == "__main__":
+    sys.exit(1 if run_checks(CHECKS) else 0)
@@ -0,0 +1,55 @@
+"""
+What the scripts in tools share: the real clock, the path to the library and
+a runner that prints the result of every check.
+
+The scripts that run the library on tools/hwsim import it before
+hwsim.install(), which replaces the time module with the simulated clock:
+
+    from simulation import ticks_us, ticks_diff, run_checks
+    import hwsim
+
+    hwsim.install()
+
+Runs with CPython and with the MicroPython unix port.
+"""
+
+import sys
+
+try:
+    from time import ticks_us, ticks_diff  # pylint: disable=unused-import
+except ImportError:  # CPython
+    from time import perf_counter_ns
+
+    def ticks_us() -> int:
+        """Returns the time in microseconds"""
+        return perf_counter_ns() // 1000
+
+    def ticks_diff(end: int, start: int) -> int:
+        """Returns the difference between two ticks_us() values"""
+        return end - start
+
+
+ROOT = (__file__.rpartition("/")[0] or ".") + "/.."
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def run_checks(checks) -> int:
+    """
+    Runs checks and prints a line with the result of every check
+    :param checks: list[tuple[str, function]], the name and function of every check,
+        a function returns what went wrong, or None if nothing went wrong
+    :return: int, the amount of failed checks
+    """
+    failed = 0
+    for name, check in checks:
+        try:
+            problem = check()
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            problem = repr(ex)
+        if problem is None:
+            print(f"{name}: 🍰")
+        else:
+            print(f"{name}: ❌ {problem}")
+            failed += 1
+    return failed
@@ -0,0 +1,73 @@
+#!/bin/env python3
+"""
+Decodes the telemetry records sent by leaphymicropython.utils.telemetry.
+
+Reads a serial port or a file with the raw stream and prints every record as
+a CSV line: kind, source, timestamp in ms and the readings.
+
+Usage: tools/telemetry_decoder.py /dev/ttyACM0
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# pylint: disable=wrong-import-position
+from leaphymicropython.utils.framing import cobs_decode, crc16
+from leaphymicropython.utils.telemetry import decode_record
+
+MAX_FRAME = 1024
+READ_SIZE = 256
+
+
+def decode_frame(frame: bytes):
+    """Decodes one COBS frame and checks its CRC, returns the payload or None"""
+    decoded = bytearray(len(frame))
+    length = cobs_decode(frame, len(frame), decoded)
+    if length < 2:
+        return None
+    crc = (decoded[length - 2] << 8) | decoded[length - 1]
+    if crc16(decoded, length - 2) != crc:
+        return None
+    return bytes(decoded[: length - 2])
+
+
+def print_record(frame: bytes, output) -> bool:
+    """Prints the record in a frame as a CSV line, returns False if the frame is bad"""
+    payload = decode_frame(frame)
+    if payload is None:
+        return False
+    try:
+        name, source, timestamp, readings = decode_record(payload)
+    except ValueError:
+        return False
+    values = ",".join(f"{key}={value}" for key, value in readings.items())
+    print(f"{name},{source},{timestamp},{values}", file=output, flush=True)
+    return True
+
+
+def decode_stream(stream, output=sys.stdout) -> int:
+    """Decodes records from a binary stream until it ends, returns the amount of bad frames"""
+    bad_frames = 0
+    rest = b""
+    while True:
+        # A stream without buffering returns what is available, up to READ_SIZE bytes
+        data = stream.read(READ_SIZE)
+        if not data:
+            return bad_frames
+        frames = (rest + data).split(b"\x00")
+        # The bytes after the last delimiter are the start of the next frame
+        rest = frames.pop()[:MAX_FRAME]
+        for frame in frames:
+            if frame and not print_record(frame[:MAX_FRAME], output):
+                bad_frames += 1
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print(__doc__)
+        sys.exit(1)
+    with open(sys.argv[1], "rb", buffering=0) as input_stream:
+        BAD = decode_stream(input_stream)
+    print(f"bad frames: {BAD}", file=sys.stderr)